@@ -24,6 +24,84 @@ DEFAULT_AGGREGATION="mean"
 DEFAULT_TR_START = datetime.datetime(2020,8,1)
 DEFAULT_TOD_BUCKET_WIDTH = 60
 
+DATA_LOADER_MAX_WORKERS = int(os.environ.get("DATA_LOADER_MAX_WORKERS", 8))
+DATA_LOADER_TIMEOUT_S = float(os.environ.get("DATA_LOADER_TIMEOUT_S", 30))
+# worker processes for cpu heavy analytics and map aggregation, 0 computes
+# everything in the web process. Inputs with fewer than COMPUTE_POOL_MIN_SIZE
+# values, or maps with fewer than COMPUTE_POOL_MIN_POINTS locations, are computed
+# inline. Arrays of at least COMPUTE_POOL_SHM_MIN_BYTES go through shared memory.
+# Results not ready after COMPUTE_POOL_TIMEOUT_S seconds are computed inline.
+COMPUTE_POOL_WORKERS = int(os.environ.get("COMPUTE_POOL_WORKERS", 2))
+COMPUTE_POOL_MIN_SIZE = int(os.environ.get("COMPUTE_POOL_MIN_SIZE", 200000))
+COMPUTE_POOL_MIN_POINTS = int(os.environ.get("COMPUTE_POOL_MIN_POINTS", 20000))
+COMPUTE_POOL_SHM_MIN_BYTES = int(os.environ.get("COMPUTE_POOL_SHM_MIN_BYTES", 2**20))
+COMPUTE_POOL_TIMEOUT_S = float(os.environ.get("COMPUTE_POOL_TIMEOUT_S", 60))
+
+# the callbacks of a compare or timeseries page share one view bundle, kept for
+# VIEW_BUNDLE_TTL_S seconds, or VIEW_BUNDLE_ERROR_TTL_S if a dataset failed to load
+VIEW_BUNDLE_TTL_S = int(os.environ.get("VIEW_BUNDLE_TTL_S", 60))
+VIEW_BUNDLE_ERROR_TTL_S = int(os.environ.get("VIEW_BUNDLE_ERROR_TTL_S", 5))
+VIEW_BUNDLE_CACHE_SIZE = int(os.environ.get("VIEW_BUNDLE_CACHE_SIZE", 64))
+
+# pooled http connections used by all api clients
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 16))
+HTTP_CONNECT_TIMEOUT_S = float(os.environ.get("HTTP_CONNECT_TIMEOUT_S", 5))
+HTTP_READ_TIMEOUT_S = float(os.environ.get("HTTP_READ_TIMEOUT_S", 30))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.5))
+# max number of parsed responses kept in memory per api client cache
+MEMORY_CACHE_MAXSIZE = int(os.environ.get("MEMORY_CACHE_MAXSIZE", 128))
+# seconds an expired data api response is still served while it is refreshed
+STALE_WHILE_REVALIDATE_S = int(os.environ.get("STALE_WHILE_REVALIDATE_S", 60 * 60))
+CACHE_TIME_RESOLUTION_S = int(os.environ.get("CACHE_TIME_RESOLUTION_S", 60))
+CACHE_OPEN_END_S = int(os.environ.get("CACHE_OPEN_END_S", 60 * 60))
+CACHE_WARMER_ENABLED = os.environ.get("CACHE_WARMER_ENABLED", "true").lower() == "true"
+CACHE_WARMER_INTERVAL_S = int(os.environ.get("CACHE_WARMER_INTERVAL_S", 5 * 60))
+CACHE_WARMER_TOP_N = int(os.environ.get("CACHE_WARMER_TOP_N", 20))
+# fourier spectra of series with at least FFT_WELCH_MIN_SEGMENTS segments of
+# FFT_WELCH_SEGMENT_S seconds are averaged over half overlapping segments
+# (Welch), sub-hourly and hourly series only, 0 disables the averaging
+FFT_WELCH_SEGMENT_S = int(os.environ.get("FFT_WELCH_SEGMENT_S", 365 * 24 * 60 * 60))
+FFT_WELCH_MIN_SEGMENTS = int(os.environ.get("FFT_WELCH_MIN_SEGMENTS", 3))
+FFT_CACHE_SIZE = int(os.environ.get("FFT_CACHE_SIZE", 64))
+# lomb-scargle periodograms are evaluated at up to LOMBSCARGLE_MAX_FREQUENCIES
+# frequencies, oversampled LOMBSCARGLE_OVERSAMPLING times
+LOMBSCARGLE_OVERSAMPLING = int(os.environ.get("LOMBSCARGLE_OVERSAMPLING", 4))
+LOMBSCARGLE_MAX_FREQUENCIES = int(os.environ.get("LOMBSCARGLE_MAX_FREQUENCIES", 2**18))
+# lag window of the lagged correlation on the compare page, in both directions
+CROSS_CORRELATION_MAX_LAG_S = int(
+    os.environ.get("CROSS_CORRELATION_MAX_LAG_S", 7 * 24 * 60 * 60)
+)
+# month or year tiles of loaded time series, see dashboard/series_cache.py
+SERIES_TILE_CACHE_SIZE = int(os.environ.get("SERIES_TILE_CACHE_SIZE", 1024))
+SERIES_TILE_TTL_S = int(os.environ.get("SERIES_TILE_TTL_S", 6 * 60 * 60))
+SERIES_OPEN_TILE_TTL_S = int(os.environ.get("SERIES_OPEN_TILE_TTL_S", 15 * 60))
+# hexbin maps only draw the cells in the viewport, plus a margin of this
+# fraction of the viewport on each side
+MAP_VIEWPORT_PX = (1920, 1080)
+MAP_VIEWPORT_MARGIN = float(os.environ.get("MAP_VIEWPORT_MARGIN", 0.5))
+CELL_BOUNDARY_CACHE_SIZE = int(os.environ.get("CELL_BOUNDARY_CACHE_SIZE", 50000))
+# swap hexbin resolutions in the browser on zoom, for resolutions with at most
+# MAP_CLIENTSIDE_MAX_CELLS cells
+MAP_CLIENTSIDE_HEXBINS = (
+    os.environ.get("MAP_CLIENTSIDE_HEXBINS", "false").lower() == "true"
+)
+MAP_CLIENTSIDE_MAX_CELLS = int(os.environ.get("MAP_CLIENTSIDE_MAX_CELLS", 3000))
+# static geojson of the h3 cells, one file per resolution and parent cell
+# H3_GEOJSON_TILE_LEVELS resolutions coarser, served from /public
+H3_GEOJSON_DIR = "public/h3"
+H3_GEOJSON_URL = "/public/h3"
+H3_GEOJSON_TILE_LEVELS = 3
+H3_GEOJSON_MAX_AGE_S = 365 * 24 * 60 * 60
+# resolutions written for the whole map area when the app starts
+H3_GEOJSON_PRECOMPUTE = [7, 8]
+# point layers of datasets with more than MAP_CLUSTER_MIN_POINTS points are
+# clustered on a grid of MAP_CLUSTER_GRID_PX pixels up to MAP_CLUSTER_MAX_ZOOM
+MAP_CLUSTER_MIN_POINTS = int(os.environ.get("MAP_CLUSTER_MIN_POINTS", 500))
+MAP_CLUSTER_GRID_PX = 64
+MAP_CLUSTER_MAX_ZOOM = 16
+
 DEFAULT_LAT = 47.53522891224535
 DEFAULT_LON = 7.606299048260731
 DEFAULT_ZOOM = 11.5
\ No newline at end of file
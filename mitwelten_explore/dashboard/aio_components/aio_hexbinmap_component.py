@@ -1,4 +1,18 @@
-from dash import Dash, Output, Input, State, html, dcc, callback, MATCH, ctx
+from dash import (
+    Dash,
+    Output,
+    Input,
+    State,
+    html,
+    dcc,
+    callback,
+    clientside_callback,
+    ClientsideFunction,
+    MATCH,
+    ctx,
+    no_update,
+    Patch,
+)
 from dash.exceptions import PreventUpdate
 import numpy as np
 import uuid
@@ -7,11 +21,27 @@ from dashboard.charts.map_charts import (
     generate_h3hexbin_map,
     generate_multi_h3hexbin_map,
     generate_multi_bubble_map,
+    hexbin_view_key,
+    hexbin_resolution_traces,
+    point_view_key,
+    get_mapbox_layers,
     LocationData,
 )
 from configuration import DEFAULT_LAT, DEFAULT_LON, DEFAULT_ZOOM
 
 
+# config keys that only select the mapbox layers
+LAYER_CONFIG_KEYS = ["base_layer", "overlay_layer"]
+
+
+def layers_changed_only(old_config, new_config):
+    """True if the configs differ in their map layers only."""
+    if old_config is None or new_config is None:
+        return False
+    keys = (set(old_config) | set(new_config)) - set(LAYER_CONFIG_KEYS)
+    return all(old_config.get(k) == new_config.get(k) for k in keys)
+
+
 class H3HexBinMapAIO(html.Div):
     class ids:
         graph = lambda aio_id: {
@@ -24,6 +54,11 @@ class H3HexBinMapAIO(html.Div):
             "subcomponent": "store",
             "aio_id": aio_id,
         }
+        view_store = lambda aio_id: {
+            "component": "H3HexBinMapAIO",
+            "subcomponent": "view_store",
+            "aio_id": aio_id,
+        }
 
     ids = ids
 
@@ -78,6 +113,7 @@ class H3HexBinMapAIO(html.Div):
                 dcc.Store(
                     data=data, id=self.ids.store(self.aio_id), **self.store_props
                 ),
+                dcc.Store(id=self.ids.view_store(self.aio_id)),
                 dcc.Graph(
                     figure=figure, id=self.ids.graph(self.aio_id), **self.graph_props
                 ),
@@ -86,12 +122,14 @@ class H3HexBinMapAIO(html.Div):
 
     @callback(
         Output(ids.graph(MATCH), "figure"),
+        Output(ids.view_store(MATCH), "data"),
         Input(ids.graph(MATCH), "relayoutData"),
         Input(ids.store(MATCH), "data"),
         State(ids.store(MATCH), "data"),
+        State(ids.view_store(MATCH), "data"),
         # prevent_initial_callbacks=True,
     )
-    def update_hexbins(event_data, data_input, data):
+    def update_hexbins(event_data, data_input, data, view_key):
         if ctx.triggered_id is None or data is None:
             raise PreventUpdate
 
@@ -100,19 +138,25 @@ class H3HexBinMapAIO(html.Div):
         ]
 
         if "store" in trg_subcomponents:
-            return generate_h3hexbin_map(
-                data.get("latitude"),
-                data.get("longitude"),
-                data.get("val"),
-                data.get("id"),
-            )
-        elif "graph" in trg_subcomponents:
-            if event_data.get("autosize") == True:
-                return generate_h3hexbin_map(
+            return (
+                generate_h3hexbin_map(
                     data.get("latitude"),
                     data.get("longitude"),
                     data.get("val"),
                     data.get("id"),
+                ),
+                None,
+            )
+        elif "graph" in trg_subcomponents:
+            if event_data.get("autosize") == True:
+                return (
+                    generate_h3hexbin_map(
+                        data.get("latitude"),
+                        data.get("longitude"),
+                        data.get("val"),
+                        data.get("id"),
+                    ),
+                    None,
                 )
 
             zoomlvl = event_data.get("mapbox.zoom")
@@ -120,15 +164,24 @@ class H3HexBinMapAIO(html.Div):
             if None in [zoomlvl, center_coords]:
                 raise PreventUpdate
             center = (center_coords.get("lat"), center_coords.get("lon"))
+            dataset = LocationData(lat=data.get("latitude"), lon=data.get("longitude"))
+            new_view_key = hexbin_view_key([dataset], zoomlvl, *center) + [
+                point_view_key([dataset], zoomlvl, *center)
+            ]
+            if new_view_key == view_key:
+                raise PreventUpdate
 
-            return generate_h3hexbin_map(
-                data.get("latitude"),
-                data.get("longitude"),
-                data.get("val"),
-                data.get("id"),
-                zoom=zoomlvl,
-                clat=center[0],
-                clon=center[1],
+            return (
+                generate_h3hexbin_map(
+                    data.get("latitude"),
+                    data.get("longitude"),
+                    data.get("val"),
+                    data.get("id"),
+                    zoom=zoomlvl,
+                    clat=center[0],
+                    clon=center[1],
+                ),
+                new_view_key,
             )
 
         raise PreventUpdate
@@ -146,11 +199,31 @@ class H3HexBinMapMultiAIO(html.Div):
             "subcomponent": "store",
             "aio_id": aio_id,
         }
+        view_store = lambda aio_id: {
+            "component": "H3HexBinMapMultiAIO",
+            "subcomponent": "view_store",
+            "aio_id": aio_id,
+        }
         config_store = lambda aio_id: {
             "component": "H3HexBinMapMultiAIO",
             "subcomponent": "config_store",
             "aio_id": aio_id,
         }
+        resolution_store = lambda aio_id: {
+            "component": "H3HexBinMapMultiAIO",
+            "subcomponent": "resolution_store",
+            "aio_id": aio_id,
+        }
+        rendered_config_store = lambda aio_id: {
+            "component": "H3HexBinMapMultiAIO",
+            "subcomponent": "rendered_config_store",
+            "aio_id": aio_id,
+        }
+        relayout_store = lambda aio_id: {
+            "component": "H3HexBinMapMultiAIO",
+            "subcomponent": "relayout_store",
+            "aio_id": aio_id,
+        }
 
     ids = ids
 
@@ -168,6 +241,7 @@ class H3HexBinMapMultiAIO(html.Div):
         store_clicked_props=None,
         aio_id=None,
         config={"scatter": False},
+        clientside=False,
     ):
         self.aio_id = aio_id if aio_id is not None else str(uuid.uuid4())
         self.graph_props = (
@@ -193,11 +267,23 @@ class H3HexBinMapMultiAIO(html.Div):
                 dcc.Store(
                     data=data, id=self.ids.store(self.aio_id), **self.store_props
                 ),
+                dcc.Store(id=self.ids.view_store(self.aio_id)),
                 dcc.Store(
                     data=config,
                     id=self.ids.config_store(self.aio_id),
                     **self.store_props
                 ),
+                # hexbin traces of each resolution, None if zooming is handled
+                # by the server only
+                dcc.Store(
+                    data={"resolutions": {}} if clientside else None,
+                    id=self.ids.resolution_store(self.aio_id),
+                ),
+                # the config the figure was last rendered with
+                dcc.Store(id=self.ids.rendered_config_store(self.aio_id)),
+                # the zoom and pan events the server has to render, set by
+                # handle_relayout
+                dcc.Store(id=self.ids.relayout_store(self.aio_id)),
                 dcc.Graph(
                     figure=figure, id=self.ids.graph(self.aio_id), **self.graph_props
                 ),
@@ -206,19 +292,45 @@ class H3HexBinMapMultiAIO(html.Div):
 
     @callback(
         Output(ids.graph(MATCH), "figure"),
-        Input(ids.graph(MATCH), "relayoutData"),
+        Output(ids.view_store(MATCH), "data"),
+        Output(ids.resolution_store(MATCH), "data"),
+        Output(ids.rendered_config_store(MATCH), "data"),
+        Input(ids.relayout_store(MATCH), "data"),
         Input(ids.store(MATCH), "modified_timestamp"),
-        Input(ids.store(MATCH), "data"),
         Input(ids.config_store(MATCH), "modified_timestamp"),
         Input(ids.config_store(MATCH), "data"),
+        State(ids.store(MATCH), "data"),
+        State(ids.view_store(MATCH), "data"),
+        State(ids.resolution_store(MATCH), "data"),
+        State(ids.rendered_config_store(MATCH), "data"),
         # prevent_initial_callbacks=True,
     )
-    def update_hexbins(event_data, data_input, data, config_trg, config):
+    def update_hexbins(
+        event_data,
+        data_trg,
+        config_trg,
+        config,
+        data,
+        view_key,
+        resolution_traces,
+        rendered_config,
+    ):
         if ctx.triggered_id is None or data is None:
             raise PreventUpdate
         trg_subcomponents = [
             v.get("subcomponent") for v in list(ctx.triggered_prop_ids.values())
         ]
+        if (
+            "config_store" in trg_subcomponents
+            and "store" not in trg_subcomponents
+            and layers_changed_only(rendered_config, config)
+        ):
+            # the map layers are part of the layout, the traces stay
+            patch = Patch()
+            patch["layout"]["mapbox"]["layers"] = get_mapbox_layers(
+                config.get("base_layer"), config.get("overlay_layer")
+            )
+            return patch, no_update, no_update, config
         show_scatter = config.get("scatter", False) if config is not None else False
         range0 = config.get("range0", None) if config is not None else None
         range1 = config.get("range1", None) if config is not None else None
@@ -231,14 +343,7 @@ class H3HexBinMapMultiAIO(html.Div):
         dataset0 = LocationData(**data[0])
         dataset1 = LocationData(**data[1]) if not single_map else LocationData()
 
-        if "store" in trg_subcomponents or "config_store" in trg_subcomponents:
-            if bubblemap:
-                return generate_multi_bubble_map(
-                    ds0=dataset0,
-                    ds1=dataset1,
-                    base_layer=base_layer,
-                    overlay_layer=overlay_layer,
-                )
+        def hexbin_map(**kwargs):
             return generate_multi_h3hexbin_map(
                 ds0=dataset0,
                 ds1=dataset1,
@@ -247,45 +352,96 @@ class H3HexBinMapMultiAIO(html.Div):
                 range1=range1,
                 base_layer=base_layer,
                 overlay_layer=overlay_layer,
+                **kwargs
             )
 
-        elif "graph" in trg_subcomponents:
-            if event_data.get("autosize") == True:
-                if bubblemap:
-                    return generate_multi_bubble_map(
-                        ds0=dataset0,
-                        ds1=dataset1,
-                        base_layer=base_layer,
-                        overlay_layer=overlay_layer,
-                    )
-                else:
-                    return generate_multi_h3hexbin_map(
+        if "store" in trg_subcomponents or "config_store" in trg_subcomponents:
+            if resolution_traces is None:
+                resolution_traces = no_update
+            elif bubblemap:
+                resolution_traces = {"resolutions": {}}
+            else:
+                resolution_traces = hexbin_resolution_traces(
+                    [dataset0, dataset1], lambda zoom: hexbin_map(zoom=zoom)
+                )
+            if bubblemap:
+                return (
+                    generate_multi_bubble_map(
                         ds0=dataset0,
                         ds1=dataset1,
-                        scatter=show_scatter,
-                        range0=range0,
-                        range1=range1,
                         base_layer=base_layer,
                         overlay_layer=overlay_layer,
+                    ),
+                    None,
+                    resolution_traces,
+                    config,
+                )
+            return hexbin_map(), None, resolution_traces, config
+
+        elif "relayout_store" in trg_subcomponents:
+            if event_data.get("autosize") == True:
+                if bubblemap:
+                    return (
+                        generate_multi_bubble_map(
+                            ds0=dataset0,
+                            ds1=dataset1,
+                            base_layer=base_layer,
+                            overlay_layer=overlay_layer,
+                        ),
+                        None,
+                        no_update,
+                        no_update,
                     )
-            if bubblemap:
-                raise PreventUpdate
+                return hexbin_map(), None, no_update, no_update
             zoomlvl = event_data.get("mapbox.zoom")
             center_coords = event_data.get("mapbox.center")
             if None in [zoomlvl, center_coords]:
                 raise PreventUpdate
             center = (center_coords.get("lat"), center_coords.get("lon"))
-            return generate_multi_h3hexbin_map(
-                ds0=dataset0,
-                ds1=dataset1,
-                zoom=zoomlvl,
-                clat=center[0],
-                clon=center[1],
-                scatter=show_scatter,
-                range0=range0,
-                range1=range1,
-                base_layer=base_layer,
-                overlay_layer=overlay_layer,
+            # clustered points change with the zoom level and viewport
+            points_key = point_view_key([dataset0, dataset1], zoomlvl, *center)
+            if bubblemap:
+                if points_key is None or points_key == view_key:
+                    raise PreventUpdate
+                return (
+                    generate_multi_bubble_map(
+                        ds0=dataset0,
+                        ds1=dataset1,
+                        zoom=zoomlvl,
+                        clat=center[0],
+                        clon=center[1],
+                        base_layer=base_layer,
+                        overlay_layer=overlay_layer,
+                    ),
+                    points_key,
+                    no_update,
+                    no_update,
+                )
+            if not show_scatter:
+                points_key = None
+            new_view_key = hexbin_view_key([dataset0, dataset1], zoomlvl, *center) + [
+                points_key
+            ]
+            if new_view_key == view_key:
+                raise PreventUpdate
+            return (
+                hexbin_map(zoom=zoomlvl, clat=center[0], clon=center[1]),
+                new_view_key,
+                no_update,
+                no_update,
             )
 
         raise PreventUpdate
+
+    # zooms to a resolution in the resolution store are swapped in the browser,
+    # only the others reach update_hexbins through the relayout store
+    clientside_callback(
+        ClientsideFunction(namespace="clientside", function_name="handle_relayout"),
+        Output(ids.graph(MATCH), "figure", allow_duplicate=True),
+        Output(ids.relayout_store(MATCH), "data"),
+        Input(ids.graph(MATCH), "relayoutData"),
+        State(ids.resolution_store(MATCH), "data"),
+        State(ids.config_store(MATCH), "data"),
+        State(ids.graph(MATCH), "figure"),
+        prevent_initial_call=True,
+    )
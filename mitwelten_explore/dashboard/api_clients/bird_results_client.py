@@ -1,6 +1,14 @@
-from dashboard.utils.communication import CachedRequest, construct_url
+from dashboard.utils.communication import (
+    CachedRequest,
+    construct_url,
+    list_or_none,
+    trim_buckets,
+)
+from configuration import STALE_WHILE_REVALIDATE_S
 
-cr = CachedRequest("bird_cache", 2 * 60 * 60)
+cr = CachedRequest(
+    "bird_cache", 2 * 60 * 60, stale_while_revalidate=STALE_WHILE_REVALIDATE_S
+)
 
 
 def get_detection_dates(
@@ -20,19 +28,14 @@ def get_detection_dates(
             "from": time_from,
             "to": time_to,
             "distinctspecies": distinctspecies,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
 
         data = res.json()
-        return data
+        return trim_buckets(data, "bucket", time_from, time_to, bucket_width)
     return None
 
 
@@ -51,14 +54,9 @@ def get_detection_locations(
             "from": time_from,
             "to": time_to,
             "distinctspecies": distinctspecies,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
 
@@ -84,14 +82,9 @@ def get_detection_time_of_day(
             "from": time_from,
             "to": time_to,
             "distinctspecies": distinctspecies,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
 
@@ -130,11 +123,14 @@ def get_detection_list_by_deployment(
 ):
     url = construct_url(
         f"birds/detectionlist",
-        {"conf": confidence, "limit": limit, "from": time_from, "to": time_to},
+        {
+            "conf": confidence,
+            "limit": limit,
+            "from": time_from,
+            "to": time_to,
+            "deployment_ids": list_or_none(deployment_ids),
+        },
     )
-    if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-        for d in deployment_ids:
-            url += f"&deployment_ids={d}"
     res = cr.get(url)
     if res.status_code == 200:
 
@@ -57,14 +57,9 @@ def get_total_image_count(deployment_ids=None, time_from=None, time_to=None):
         {
             "from": time_from,
             "to": time_to,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
         return res.json()
@@ -77,14 +72,9 @@ def get_total_audio_duration(deployment_ids=None, time_from=None, time_to=None):
         {
             "from": time_from,
             "to": time_to,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
         return res.json()
@@ -97,14 +87,9 @@ def get_daily_audio_duration(deployment_ids=None, time_from=None, time_to=None):
         {
             "from": time_from,
             "to": time_to,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
         return res.json()
@@ -117,14 +102,9 @@ def get_daily_image_captures(deployment_ids=None, time_from=None, time_to=None):
         {
             "from": time_from,
             "to": time_to,
+            "deployment_ids": deployment_ids,
         },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
         return res.json()
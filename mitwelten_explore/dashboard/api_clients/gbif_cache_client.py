@@ -1,6 +1,13 @@
-from dashboard.utils.communication import CachedRequest, construct_url
+from dashboard.utils.communication import (
+    CachedRequest,
+    construct_url,
+    trim_buckets,
+)
+from configuration import STALE_WHILE_REVALIDATE_S
 
-cr = CachedRequest("gbif_cache", 2 * 60 * 60)
+cr = CachedRequest(
+    "gbif_cache", 2 * 60 * 60, stale_while_revalidate=STALE_WHILE_REVALIDATE_S
+)
 
 
 def get_gbif_detection_dates(taxon_id, bucket_width, time_from=None, time_to=None):
@@ -12,7 +19,7 @@ def get_gbif_detection_dates(taxon_id, bucket_width, time_from=None, time_to=Non
     if res.status_code == 200:
 
         data = res.json()
-        return data
+        return trim_buckets(data, "bucket", time_from, time_to, bucket_width)
     return None
 
 
@@ -1,7 +1,13 @@
-from dashboard.utils.communication import CachedRequest, construct_url
-from configuration import DATA_API_URL
+from dashboard.utils.communication import (
+    CachedRequest,
+    construct_url,
+    trim_buckets,
+)
+from configuration import DATA_API_URL, STALE_WHILE_REVALIDATE_S
 
-cr = CachedRequest("meteo_cache", 60 * 60)
+cr = CachedRequest(
+    "meteo_cache", 60 * 60, stale_while_revalidate=STALE_WHILE_REVALIDATE_S
+)
 
 
 def get_meteo_stations(station_id=None):
@@ -59,7 +65,7 @@ def get_meteo_measurements(
         if res.status_code == 200:
 
             data = res.json()
-            return data
+            return trim_buckets(data, "time", time_from, time_to, bucket_width)
     return []
 
 
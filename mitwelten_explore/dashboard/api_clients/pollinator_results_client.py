@@ -1,4 +1,10 @@
-from dashboard.utils.communication import CachedRequest, construct_url
+from dashboard.utils.communication import (
+    CachedRequest,
+    construct_url,
+    list_or_none,
+    trim_buckets,
+)
+from configuration import STALE_WHILE_REVALIDATE_S
 import json
 
 with open("dashboard/data/pollinator_mapping.json", "r") as f:
@@ -6,7 +12,16 @@ with open("dashboard/data/pollinator_mapping.json", "r") as f:
 
 POLLINATOR_IDS = [int(k) for k in pollinator_mapping.keys()]
 
-cr = CachedRequest("pollinator_cache", 2 * 60 * 60)
+cr = CachedRequest(
+    "pollinator_cache", 2 * 60 * 60, stale_while_revalidate=STALE_WHILE_REVALIDATE_S
+)
+
+
+def pollinator_class_filter(pollinator_classes):
+    # 5 means that all classes are selected
+    if isinstance(pollinator_classes, list) and 0 < len(pollinator_classes) < 5:
+        return pollinator_classes
+    return None
 
 
 def get_polli_detection_dates_by_id(
@@ -22,23 +37,16 @@ def get_polli_detection_dates_by_id(
                 "conf": confidence,
                 "from": time_from,
                 "to": time_to,
+                "deployment_ids": list_or_none(deployment_ids),
+                "pollinator_class": pollinator_class_filter(pollinator_classes),
             },
         )
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        if isinstance(pollinator_classes, list):
-            if (
-                len(pollinator_classes) > 0 and len(pollinator_classes) < 5
-            ):  # 5 means that all classes are selected
-                for pc in pollinator_classes:
-                    url += f"&pollinator_class={pc}"
 
         res = cr.get(url)
         if res.status_code == 200:
 
             data = res.json()
-            return data
+            return trim_buckets(data, "bucket", time_from, time_to, bucket_width)
     return None
 
 
@@ -58,17 +66,14 @@ def get_polli_detection_dates(
             "conf": confidence,
             "from": time_from,
             "to": time_to,
+            "deployment_ids": list_or_none(deployment_ids),
         },
     )
-    if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-        for d in deployment_ids:
-            url += f"&deployment_ids={d}"
-
     res = cr.get(url)
     if res.status_code == 200:
 
         data = res.json()
-        return data
+        return trim_buckets(data, "bucket", time_from, time_to, bucket_width)
     return None
 
 
@@ -79,17 +84,14 @@ def get_polli_detection_locations_by_id(
         pollinator_classes = pollinator_mapping[str(taxon_id)]
         url = construct_url(
             f"pollinators/location",
-            {"conf": confidence, "from": time_from, "to": time_to},
+            {
+                "conf": confidence,
+                "from": time_from,
+                "to": time_to,
+                "deployment_ids": list_or_none(deployment_ids),
+                "pollinator_class": pollinator_class_filter(pollinator_classes),
+            },
         )
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        if isinstance(pollinator_classes, list):
-            if (
-                len(pollinator_classes) > 0 and len(pollinator_classes) < 5
-            ):  # 5 means that all classes are selected
-                for pc in pollinator_classes:
-                    url += f"&pollinator_class={pc}"
         res = cr.get(url)
         if res.status_code == 200:
 
@@ -108,11 +110,9 @@ def get_polli_detection_locations(
             "conf": confidence,
             "from": time_from,
             "to": time_to,
+            "deployment_ids": list_or_none(deployment_ids),
         },
     )
-    if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-        for d in deployment_ids:
-            url += f"&deployment_ids={d}"
     res = cr.get(url)
     if res.status_code == 200:
 
@@ -138,17 +138,10 @@ def get_polli_detection_tod_by_id(
                 "conf": confidence,
                 "from": time_from,
                 "to": time_to,
+                "deployment_ids": list_or_none(deployment_ids),
+                "pollinator_class": pollinator_class_filter(pollinator_classes),
             },
         )
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        if isinstance(pollinator_classes, list):
-            if (
-                len(pollinator_classes) > 0 and len(pollinator_classes) < 5
-            ):  # 5 means that all classes are selected
-                for pc in pollinator_classes:
-                    url += f"&pollinator_class={pc}"
         res = cr.get(url)
         if res.status_code == 200:
 
@@ -173,11 +166,9 @@ def get_polli_detection_tod(
             "conf": confidence,
             "from": time_from,
             "to": time_to,
+            "deployment_ids": list_or_none(deployment_ids),
         },
     )
-    if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-        for d in deployment_ids:
-            url += f"&deployment_ids={d}"
     res = cr.get(url)
     if res.status_code == 200:
 
@@ -197,14 +188,10 @@ def get_polli_detection_count_by_id(taxon_id, confidence, time_from=None, time_t
                 "conf": confidence,
                 "from": time_from,
                 "to": time_to,
+                "pollinator_class": pollinator_class_filter(pollinator_classes),
             },
+            align_buckets=False,
         )
-        if isinstance(pollinator_classes, list):
-            if (
-                len(pollinator_classes) > 0 and len(pollinator_classes) < 5
-            ):  # 5 means that all classes are selected
-                for pc in pollinator_classes:
-                    url += f"&pollinator_class={pc}"
 
         res = cr.get(url)
         if res.status_code == 200:
@@ -221,14 +208,14 @@ def get_polli_detection_list_by_deployment(
 ):
     url = construct_url(
         f"pollinators/detectionlist",
-        {"conf": confidence, "limit": limit, "from": time_from, "to": time_to},
+        {
+            "conf": confidence,
+            "limit": limit,
+            "from": time_from,
+            "to": time_to,
+            "deployment_ids": deployment_ids,
+        },
     )
-    if deployment_ids is not None:
-        if isinstance(deployment_ids, list) and len(deployment_ids) > 0:
-            for d in deployment_ids:
-                url += f"&deployment_ids={d}"
-        else:
-            url += f"&deployment_ids={deployment_ids}"
     res = cr.get(url)
     if res.status_code == 200:
 
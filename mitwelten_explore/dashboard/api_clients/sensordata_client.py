@@ -1,12 +1,13 @@
-from dashboard.utils.communication import CachedRequest, construct_url
+from dashboard.utils.communication import CachedRequest, construct_url, trim_buckets
+from configuration import STALE_WHILE_REVALIDATE_S
 
-cr = CachedRequest("sensordata_client",30*60)
+cr = CachedRequest("sensordata_client",30*60, stale_while_revalidate=STALE_WHILE_REVALIDATE_S)
 
 def get_pax_timeseries(deployment_id,bucket_width,  time_from=None, time_to = None):
     url = construct_url(f"sensordata/pax/{deployment_id}", {"bucket_width":bucket_width, "from":time_from,"to":time_to})
     res = cr.get(url)
     if res.status_code == 200:
-        return res.json()
+        return trim_buckets(res.json(), "buckets", time_from, time_to, bucket_width)
        
     return None
 
@@ -31,7 +32,7 @@ def get_env_timeseries(deployment_id,measurement_type, aggregation, bucket_width
     url = construct_url(f"sensordata/{measurement_type}/{deployment_id}", {"aggregation":aggregation,"bucket_width":bucket_width, "from":time_from,"to":time_to})
     res = cr.get(url)
     if res.status_code == 200:
-        return res.json()
+        return trim_buckets(res.json(), "time", time_from, time_to, bucket_width)
        
     return None
 
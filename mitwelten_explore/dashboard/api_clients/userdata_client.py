@@ -1,13 +1,13 @@
 from dashboard.models import Annotation, AppUser
-import requests
 import os
 import datetime
+from dashboard.utils.communication import http_session
 from configuration import DATA_API_URL
 
 
 def get_annotations(auth_cookie=None):
     url = f"{DATA_API_URL}explore/annotations"
-    res = requests.get(url, headers={"Authorization": f"Bearer {auth_cookie}"})
+    res = http_session.get(url, headers={"Authorization": f"Bearer {auth_cookie}"})
     if res.status_code != 200:
         return []
     annots = res.json()
@@ -38,7 +38,7 @@ def get_annotations(auth_cookie=None):
 
 def get_annotation(annot_id, auth_cookie=None):
     url = f"{DATA_API_URL}explore/annotations/{annot_id}"
-    res = requests.get(url, headers={"Authorization": f"Bearer {auth_cookie}"})
+    res = http_session.get(url, headers={"Authorization": f"Bearer {auth_cookie}"})
     if res.status_code == 200:
         annot = res.json()
 
@@ -65,7 +65,7 @@ def get_annotation_by_user(user_sub, auth_cookie):
 
 def post_annotation(annotation: Annotation, auth_cookie):
     url = f"{DATA_API_URL}explore/annotations"
-    res = requests.post(
+    res = http_session.post(
         url=url,
         json=annotation.to_dict(),
         headers={"Authorization": f"Bearer {auth_cookie}"},
@@ -75,7 +75,7 @@ def post_annotation(annotation: Annotation, auth_cookie):
 
 def update_annotation(annot_id: int, annot_content: str, auth_cookie):
     url = f"{DATA_API_URL}explore/annotations/{annot_id}"
-    res = requests.put(
+    res = http_session.put(
         url=url,
         json=dict(content=annot_content),
         headers={"Authorization": f"Bearer {auth_cookie}"},
@@ -88,18 +88,20 @@ def update_annotation(annot_id: int, annot_content: str, auth_cookie):
 
 def delete_annotation(annot_id: int, auth_cookie):
     url = f"{DATA_API_URL}explore/annotations/{annot_id}"
-    res = requests.delete(url=url, headers={"Authorization": f"Bearer {auth_cookie}"})
+    res = http_session.delete(
+        url=url, headers={"Authorization": f"Bearer {auth_cookie}"}
+    )
     return True
 
 
 def update_collection(datasets, auth_cookie):
     url = f"{DATA_API_URL}explore/collection"
-    res = requests.post(
+    res = http_session.post(
         url=url, headers={"Authorization": f"Bearer {auth_cookie}"}, json=datasets
     )
 
 
 def get_collection(auth_cookie):
     url = f"{DATA_API_URL}explore/collection"
-    res = requests.get(url=url, headers={"Authorization": f"Bearer {auth_cookie}"})
+    res = http_session.get(url=url, headers={"Authorization": f"Bearer {auth_cookie}"})
     return res.json()
@@ -21,6 +21,10 @@ from dashboard.components.notifications import generate_notification
 from dashboard.utils.communication import get_user_from_cookies
 from dashboard.api_clients.userdata_client import update_collection, get_collection
 from dashboard.models import to_typed_dataset
+from dashboard.cache_warmer import start_cache_warmer
+from dashboard.utils.geo_utils import write_map_geojson_tiles
+from dashboard.utils.compute_pool import start_compute_pool
+import threading
 
 app = Dash(
     __name__,
@@ -31,6 +35,23 @@ app = Dash(
     update_title=None,
 )
 
+if CACHE_WARMER_ENABLED:
+    start_cache_warmer()
+
+if COMPUTE_POOL_WORKERS > 0:
+    # the workers import numpy, scipy and h3 when they start, off the main thread
+    threading.Thread(
+        target=start_compute_pool, name="compute_pool", daemon=True
+    ).start()
+
+if H3_GEOJSON_PRECOMPUTE:
+    threading.Thread(
+        target=write_map_geojson_tiles,
+        args=(H3_GEOJSON_PRECOMPUTE,),
+        name="geojson_tiles",
+        daemon=True,
+    ).start()
+
 notification_provider = dmc.NotificationsProvider(
     html.Div(id="noti_container"),
 )
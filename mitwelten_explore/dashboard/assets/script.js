@@ -59,5 +59,50 @@ window.dash_clientside.clientside = {
             }
         }
         return window.dash_clientside.no_update;
+    },
+    handle_relayout: function(relayoutData, resolutionTraces, config, figure) {
+        // same thresholds as zoom_to_cell_resolution in utils/geo_utils.py
+        function zoomToCellResolution(zoom) {
+            if (zoom > 18.5) return 14;
+            if (zoom > 17) return 13;
+            if (zoom > 16.2) return 12;
+            if (zoom > 15.2) return 11;
+            if (zoom > 14) return 10;
+            if (zoom > 12.5) return 9;
+            if (zoom > 10.5) return 8;
+            return 7;
+        }
+        var no_update = window.dash_clientside.no_update;
+        if (!relayoutData) {
+            return [no_update, no_update];
+        }
+        var zoom = relayoutData["mapbox.zoom"];
+        var center = relayoutData["mapbox.center"];
+        // bubble maps and point layers are clustered by the server
+        var clustered = config && (config.bubble || config.scatter);
+        var local = resolutionTraces && figure && !clustered;
+        if (!local || zoom === undefined || center === undefined) {
+            // update_hexbins renders it, the data stays in the browser otherwise
+            return [no_update, relayoutData];
+        }
+        var resolution = zoomToCellResolution(zoom);
+        var traces = resolutionTraces.resolutions[resolution];
+        if (!traces) {
+            return [no_update, relayoutData];
+        }
+        var meta = figure.layout.meta || {};
+        if (meta.resolution === resolution) {
+            return [no_update, no_update];
+        }
+        var mapbox = Object.assign({}, figure.layout.mapbox, {zoom: zoom, center: center});
+        var layout = Object.assign({}, figure.layout, {
+            mapbox: mapbox,
+            meta: Object.assign({}, meta, {resolution: resolution}),
+        });
+        // the point traces are drawn on top of the cells and do not change
+        var data = traces.concat(figure.data.filter(function(trace) {
+            return trace.type === "scattermapbox";
+        }));
+        return [Object.assign({}, figure, {data: data, layout: layout}), no_update];
     }
 }
\ No newline at end of file
@@ -0,0 +1,57 @@
+import time
+import threading
+
+from dashboard.utils.communication import CachedRequest
+from dashboard.api_clients.deployments_client import get_deployments
+from dashboard.api_clients.meteodata_client import (
+    get_meteo_stations,
+    get_meteo_parameters,
+)
+from configuration import CACHE_WARMER_INTERVAL_S, CACHE_WARMER_TOP_N
+
+# requests every page needs, loaded when the app starts
+STARTUP_REQUESTS = [get_deployments, get_meteo_stations, get_meteo_parameters]
+
+
+class CacheWarmer(threading.Thread):
+    """Keeps the most requested urls of each api client cached.
+
+    Loads `STARTUP_REQUESTS` on start, then every `interval_s` seconds
+    refreshes the `top_n` most requested urls of each CachedRequest that
+    would expire before the next run.
+    """
+
+    def __init__(
+        self, interval_s=CACHE_WARMER_INTERVAL_S, top_n=CACHE_WARMER_TOP_N
+    ) -> None:
+        super().__init__(name="cache_warmer", daemon=True)
+        self.interval_s = interval_s
+        self.top_n = top_n
+
+    def run(self):
+        for request_fcn in STARTUP_REQUESTS:
+            try:
+                request_fcn()
+            except Exception as e:
+                print(f"cache warmer: {request_fcn.__name__} failed: {e}")
+        while True:
+            time.sleep(self.interval_s)
+            self.warm()
+
+    def warm(self):
+        for cr in list(CachedRequest.instances.values()):
+            for key in cr.most_requested(self.top_n):
+                expires_in = cr.memory.expires_in(key)
+                if expires_in is None or expires_in < 1.5 * self.interval_s:
+                    cr.revalidate(key, force_refresh=True)
+
+
+_warmer = None
+
+
+def start_cache_warmer():
+    global _warmer
+    if _warmer is None:
+        _warmer = CacheWarmer()
+        _warmer.start()
+    return _warmer
@@ -1,8 +1,13 @@
-import plotly.graph_objects as go
 from dashboard.styles import MULTI_VIZ_COLORSCALE
 from dashboard.utils.text_utils import chart_dataset_label
+from dashboard.charts.figure_dicts import (
+    template,
+    subplot_layout,
+    subplot_axes,
+    update_axes,
+)
+import numpy as np
 import pandas as pd
-from plotly.subplots import make_subplots
 import datetime
 import re
 
@@ -40,9 +45,81 @@ fft_tick_labels = [
 ]
 
 
-def correlation_matrix_heatmap(matrix, labels, light_mode=True):
+def correlation_matrix_heatmap(
+    matrix, labels, light_mode=True, pvalues=None, overlap=None
+):
     z = [c[1:] for c in matrix[:-1]]
     text = [[f"{zj:.2f}" if zj != 0 else "" for zj in zi] for zi in z]
+    hover = None
+    if pvalues is not None and overlap is not None:
+        hover = [
+            [
+                f"p-value: {pvalues[i][j]:.3g}, n = {overlap[i][j]}"
+                for j in range(1, len(labels))
+            ]
+            for i in range(len(labels) - 1)
+        ]
+    return pair_matrix_heatmap(
+        z,
+        text,
+        labels,
+        hover,
+        "<sup>Datasets</sup><br><i>%{customdata}</i> <br>Pearson Coefficient: <b>%{text}</b><extra></extra>",
+        "Pearson correlation coefficient",
+        light_mode,
+    )
+
+
+def format_lag(seconds):
+    """Signed lag label, e.g. "+3h", "-2d 6h", "0"."""
+    if seconds == 0:
+        return "0"
+    sign = "+" if seconds > 0 else "-"
+    days, rest = divmod(abs(int(seconds)), 24 * 3600)
+    hours, rest = divmod(rest, 3600)
+    minutes, rest = divmod(rest, 60)
+    units = [(days, "d"), (hours, "h"), (minutes, "min"), (rest, "s")]
+    parts = [f"{v}{u}" for v, u in units if v]
+    return sign + " ".join(parts)
+
+
+def lagged_correlation_heatmap(stats, labels, light_mode=True):
+    """Peak coefficients and lags of `lagged_correlation_stats`, a positive lag
+    means the column dataset follows the row dataset."""
+    r = np.triu(np.nan_to_num(stats["r"], nan=0), k=1)
+    z = [c[1:] for c in r[:-1]]
+    lags = [[format_lag(lag) for lag in row] for row in stats["lag_s"]]
+    text = [
+        [f"{zj:.2f}<br>{lags[i][j + 1]}" if zj != 0 else "" for j, zj in enumerate(zi)]
+        for i, zi in enumerate(z)
+    ]
+    hover = [
+        [
+            f"Peak Coefficient: <b>{zj:.2f}</b> at a lag of {lags[i][j + 1]}, "
+            f"n = {stats['n'][i][j + 1]}"
+            for j, zj in enumerate(zi)
+        ]
+        for i, zi in enumerate(z)
+    ]
+    return pair_matrix_heatmap(
+        z,
+        text,
+        labels,
+        hover,
+        "<sup>Datasets</sup><br><i>%{customdata}</i><extra></extra>",
+        "Peak lagged correlation coefficient",
+        light_mode,
+    )
+
+
+def pair_matrix_heatmap(
+    z, text, labels, hover, hovertemplate, colorbar_title, light_mode
+):
+    """Heatmap of a value per dataset pair with the dataset labels as axes.
+
+    z and text hold the upper triangle cells, row i and column j are the datasets
+    i and j + 1. hover is an optional line per cell added to the dataset names.
+    """
     ylabels = labels[:-1]
     xlabels = labels[1:]
     xlabels_short = [re.split(r" |:", str(x))[0] for x in xlabels]
@@ -55,14 +132,17 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
     ylabels_idx = [i for i in range(len(labels) - 1)]
     xlabels_idx = [i for i in range(len(labels) - 1)]
     hovertemplate_matrix = []
-    for y in ylabels:
+    for i, y in enumerate(ylabels):
         ylist = []
-        for x in xlabels:
-            ylist.append(f"{y}<br>{x}")
+        for j, x in enumerate(xlabels):
+            cell_hover = f"{y}<br>{x}"
+            if hover is not None:
+                cell_hover += f"<br>{hover[i][j]}"
+            ylist.append(cell_hover)
 
         hovertemplate_matrix.append(ylist)
 
-    fig = make_subplots(
+    layout = subplot_layout(
         cols=3,
         rows=3,
         shared_xaxes=True,
@@ -72,8 +152,9 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
         column_widths=[0.01, 0.25, 0.74],
         row_heights=[0.79, 0.2, 0.01],
     )
-    fig.add_trace(
-        go.Heatmap(
+    traces = [
+        dict(
+            type="heatmap",
             z=z,
             text=text,
             texttemplate="%{text}",
@@ -86,16 +167,13 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
             zmin=-1,
             ygap=2,
             xgap=2,
-            hovertemplate="<sup>Datasets</sup><br><i>%{customdata}</i> <br>Pearson Coefficient: <b>%{text}</b><extra></extra>",
+            hovertemplate=hovertemplate,
             showlegend=False,
-            colorbar_title="Pearson correlation coefficient",
-            colorbar_title_side="right",
+            colorbar=dict(title=dict(text=colorbar_title, side="right")),
+            cell=(1, 3),
         ),
-        row=1,
-        col=3,
-    )
-    fig.add_trace(
-        go.Scatter(
+        dict(
+            type="scatter",
             x=[-1 for i in range(len(ylabels))],
             y=[y for y in ylabels_idx],
             customdata=ylabels,
@@ -103,12 +181,10 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
             marker=dict(color=MULTI_VIZ_COLORSCALE, size=30, symbol="square"),
             showlegend=False,
             hovertemplate="%{customdata}<extra></extra>",
+            cell=(1, 1),
         ),
-        row=1,
-        col=1,
-    )
-    fig.add_trace(
-        go.Scatter(
+        dict(
+            type="scatter",
             x=[-1 for i in range(len(ylabels))],
             y=[y for y in ylabels_idx],
             text=ylabels_short,
@@ -118,13 +194,10 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
             # textfont=dict(color=MULTI_VIZ_COLORSCALE, size=12),
             textposition="middle center",
             hovertemplate="%{customdata}<extra></extra>",
+            cell=(1, 2),
         ),
-        row=1,
-        col=2,
-    )
-
-    fig.add_trace(
-        go.Scatter(
+        dict(
+            type="scatter",
             y=[-1 for i in range(len(xlabels))],
             x=xlabels_idx,
             text=xlabels_short,
@@ -133,12 +206,10 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
             # textfont=dict(color=MULTI_VIZ_COLORSCALE[1:], size=12),
             showlegend=False,
             hovertemplate="%{customdata}<extra></extra>",
+            cell=(2, 3),
         ),
-        row=2,
-        col=3,
-    )
-    fig.add_trace(
-        go.Scatter(
+        dict(
+            type="scatter",
             y=[-1 for i in range(len(xlabels))],
             x=xlabels_idx,
             customdata=xlabels,
@@ -146,60 +217,65 @@ def correlation_matrix_heatmap(matrix, labels, light_mode=True):
             marker=dict(color=MULTI_VIZ_COLORSCALE[1:], size=30, symbol="square"),
             showlegend=False,
             hovertemplate="%{customdata}<extra></extra>",
+            cell=(3, 3),
         ),
-        row=3,
-        col=3,
-    )
-    fig.update_yaxes(visible=False)
-    fig.update_xaxes(visible=False)
-    fig.update_layout(
+    ]
+    for trace in traces:
+        trace["xaxis"], trace["yaxis"] = subplot_axes(*trace.pop("cell"), cols=3)
+    update_axes(layout, "y", visible=False)
+    update_axes(layout, "x", visible=False)
+    layout.update(
         margin=dict(l=20, r=20, t=20, b=20),
-        template="plotly_white" if light_mode else "plotly_dark",
+        template=template(light_mode),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
     )
-    return fig
+    return dict(data=traces, layout=layout)
+
+
+def fft_layout(layout, has_data):
+    if not has_data:
+        layout["annotations"] = [
+            dict(
+                text="Decrease the time bucket size to compute the fourier transform",
+                xref="paper",
+                yref="paper",
+                showarrow=False,
+            )
+        ]
+    update_axes(
+        layout,
+        "x",
+        type="log",
+        autorange="reversed",
+        ticktext=fft_tick_labels,
+        tickvals=fft_tick_values,
+    )
+    update_axes(layout, "y", type="log")
+    return layout
 
 
 def fft_single(amplitude, periods_s, light_mode, color="#15AABF"):
-    fig = go.Figure()
-    fig.update_layout(
+    layout = dict(
         margin=dict(l=20, r=20, t=20, b=20),
-        template="plotly_white" if light_mode else "plotly_dark",
+        template=template(light_mode),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
         # autosize=True
     )
-    fig.add_trace(
-        go.Scatter(
-            x=periods_s,  # [:max(peaks_index)*2],
-            y=amplitude,  # [:max(peaks_index)*2],
-            mode="lines",
-            line_width=1.5,
-            opacity=1,
-            customdata=[None] + [str(datetime.timedelta(seconds=f)) for f in periods_s],
-            hovertemplate="<b>Period: %{customdata}</b><br>Amplitude: %{y} <br><extra></extra>",
-            showlegend=False,
-            marker_color=color,
-        )
+    trace = dict(
+        type="scatter",
+        x=periods_s,  # [:max(peaks_index)*2],
+        y=amplitude,  # [:max(peaks_index)*2],
+        mode="lines",
+        line=dict(width=1.5),
+        opacity=1,
+        customdata=[None] + [str(datetime.timedelta(seconds=f)) for f in periods_s],
+        hovertemplate="<b>Period: %{customdata}</b><br>Amplitude: %{y} <br><extra></extra>",
+        showlegend=False,
+        marker=dict(color=color),
     )
-
-    if len(amplitude) < 2:
-        fig.add_annotation(
-            text="Decrease the time bucket size to compute the fourier transform",
-            xref="paper",
-            yref="paper",
-            showarrow=False,
-        )
-    fig.update_xaxes(
-        type="log",
-        autorange="reversed",
-        ticktext=fft_tick_labels,
-        tickvals=fft_tick_values,
-    )
-    fig.update_yaxes(type="log")
-
-    return fig
+    return dict(data=[trace], layout=fft_layout(layout, len(amplitude) >= 2))
 
 
 def fft_multi(data, dataset_names=None, light_mode=True):
@@ -210,47 +286,28 @@ def fft_multi(data, dataset_names=None, light_mode=True):
         else:
             dataset_names = None
 
-    fig = go.Figure()
-    fig.update_layout(
+    layout = dict(
         margin=dict(l=20, r=20, t=20, b=20),
-        template="plotly_white" if light_mode else "plotly_dark",
+        template=template(light_mode),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
-        legend_orientation="h",
+        legend=dict(orientation="h"),
     )
     traces = []
     for i in range(len(data)):
         if len(data[i][0]) > 1:
-
-            traces.append(
-                go.Scatter(
-                    x=data[i][0],  # [:max(peaks_index)*2],
-                    y=data[i][1],  # [:max(peaks_index)*2],
-                    mode="lines",
-                    line_color=MULTI_VIZ_COLORSCALE[i],
-                    line_width=2,
-                    opacity=0.8,
-                    customdata=[str(datetime.timedelta(seconds=f)) for f in data[i][0]],
-                    hovertemplate="<b>Period: %{customdata}</b><br>Amplitude: %{y} <br><extra></extra>",
-                    showlegend=False if dataset_names is None else True,
-                    name=dataset_names[i] if dataset_names is not None else None,
-                )
+            trace = dict(
+                type="scatter",
+                x=data[i][0],  # [:max(peaks_index)*2],
+                y=data[i][1],  # [:max(peaks_index)*2],
+                mode="lines",
+                line=dict(color=MULTI_VIZ_COLORSCALE[i], width=2),
+                opacity=0.8,
+                customdata=[str(datetime.timedelta(seconds=f)) for f in data[i][0]],
+                hovertemplate="<b>Period: %{customdata}</b><br>Amplitude: %{y} <br><extra></extra>",
+                showlegend=False if dataset_names is None else True,
             )
-    if len(traces) > 0:
-        fig.add_traces(traces)
-    else:
-        fig.add_annotation(
-            text="Decrease the time bucket size to compute the fourier transform",
-            xref="paper",
-            yref="paper",
-            showarrow=False,
-        )
-    fig.update_xaxes(
-        type="log",
-        autorange="reversed",
-        ticktext=fft_tick_labels,
-        tickvals=fft_tick_values,
-    )
-    fig.update_yaxes(type="log")
-
-    return fig
+            if dataset_names is not None:
+                trace["name"] = dataset_names[i]
+            traces.append(trace)
+    return dict(data=traces, layout=fft_layout(layout, len(traces) > 0))
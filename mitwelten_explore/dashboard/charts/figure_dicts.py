@@ -0,0 +1,81 @@
+import copy
+from functools import lru_cache
+import numpy as np
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+# The charts with large inputs build their figures as plain dicts of numpy
+# arrays, dcc.Graph takes them as they are. Building them through plotly
+# graph objects validates and copies every array, which costs more than
+# loading the data for long time series and large location sets.
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    return pio.templates[name].to_plotly_json()
+
+
+def template(light_mode=True):
+    """plotly_white or plotly_dark, shared between figures, must not be mutated."""
+    return _template("plotly_white" if light_mode else "plotly_dark")
+
+
+def default_template():
+    """The template a graph object figure without a template gets."""
+    return _template(pio.templates.default)
+
+
+@lru_cache(maxsize=64)
+def _subplot_layout(rows, cols, kwargs):
+    kwargs = {k: list(v) if isinstance(v, tuple) else v for k, v in kwargs}
+    layout = make_subplots(rows=rows, cols=cols, **kwargs).to_plotly_json()["layout"]
+    layout.pop("template", None)
+    return layout
+
+
+def subplot_layout(rows, cols, **kwargs):
+    """Axes layout of make_subplots, without the template."""
+    kwargs = tuple(
+        sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in kwargs.items())
+    )
+    return copy.deepcopy(_subplot_layout(rows, cols, kwargs))
+
+
+def subplot_axes(row, col, cols=1):
+    """xaxis and yaxis references of a make_subplots cell."""
+    i = (row - 1) * cols + col
+    return ("x", "y") if i == 1 else (f"x{i}", f"y{i}")
+
+
+def axis_key(ref):
+    """Layout key of an axis reference, "x2" -> "xaxis2"."""
+    return f"{ref[0]}axis{ref[1:]}"
+
+
+def update_axes(layout, axis, **props):
+    """update_xaxes / update_yaxes of a layout dict, axis is "x" or "y"."""
+    layout.setdefault(f"{axis}axis", {})
+    for key in layout:
+        if key.startswith(f"{axis}axis"):
+            layout[key].update(props)
+
+
+def interleave(*columns, dtype=object):
+    """Interleaves equally long columns, column items are used as fill values."""
+    n = max(len(c) for c in columns if np.ndim(c) > 0)
+    out = np.empty(n * len(columns), dtype=dtype)
+    for i, column in enumerate(columns):
+        out[i :: len(columns)] = column
+    return out
+
+
+def minutes_to_tod(minutes):
+    """Vectorized minute_to_tod, "HH:MM" labels of minutes of the day."""
+    # a day has at most 1440 distinct minutes, format those only
+    unique, inverse = np.unique(np.asarray(minutes, dtype=int), return_inverse=True)
+    hours, minute = np.divmod(unique, 60)
+    labels = np.char.add(
+        np.char.add(np.char.zfill(hours.astype(str), 2), ":"),
+        np.char.zfill(minute.astype(str), 2),
+    )
+    return labels[inverse]
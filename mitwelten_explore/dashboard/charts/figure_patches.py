@@ -0,0 +1,52 @@
+from dash import Patch, ctx
+from dashboard.charts.figure_dicts import template
+
+# Partial figure updates. Theme, chart type and time range inputs only change
+# how a figure looks, chart callbacks triggered by nothing else return a Patch
+# of the affected properties instead of recomputing and resending the figure.
+
+
+def only_triggered_by(*component_ids):
+    """True if the callback was triggered, and only by the given components.
+
+    The initial call of a callback is not triggered by any component.
+    """
+    triggered = list(ctx.triggered_prop_ids.values())
+    return len(triggered) > 0 and all(t in component_ids for t in triggered)
+
+
+def theme_patch(light_mode, patch=None):
+    patch = patch if patch is not None else Patch()
+    patch["layout"]["template"] = template(light_mode)
+    return patch
+
+
+def range_patch(axes, date_from, date_to, patch=None):
+    """Sets the range of the layout axes, e.g. ["xaxis", "xaxis2"]."""
+    patch = patch if patch is not None else Patch()
+    for axis in axes:
+        patch["layout"][axis]["range"] = [date_from, date_to]
+    return patch
+
+
+def trace_style_patch(n_traces, style, patch=None):
+    """Sets the properties in style on the first n_traces traces."""
+    patch = patch if patch is not None else Patch()
+    for i in range(n_traces):
+        for key, value in style.items():
+            patch["data"][i][key] = value
+    return patch
+
+
+def figure_patch(light_mode, n_traces=0, style=None, axes=None, time_range=None):
+    """All presentation properties of a chart in one patch.
+
+    Patching everything a presentation input controls keeps the callbacks
+    simple, the patch is small whichever of the inputs triggered.
+    """
+    patch = theme_patch(light_mode)
+    if style is not None:
+        trace_style_patch(n_traces, style, patch)
+    if axes is not None and time_range is not None:
+        range_patch(axes, time_range[0], time_range[1], patch)
+    return patch
@@ -1,14 +1,24 @@
 import plotly.graph_objects as go
 import plotly.colors
 from dashboard.utils.geo_utils import (
-    generate_geojson,
+    geojson_tile_urls,
     calculate_zoom_from_points,
     zoom_to_cell_resolution,
-    generate_clusters,
+    location_index,
     validate_coordinates,
+    viewport_bounds,
 )
+from dashboard.utils.ts import content_hash
+from dashboard.charts.figure_dicts import default_template, update_axes, interleave
 import numpy as np
-from configuration import DEFAULT_LAT, DEFAULT_LON, DEFAULT_ZOOM
+from configuration import (
+    DEFAULT_LAT,
+    DEFAULT_LON,
+    DEFAULT_ZOOM,
+    MAP_CLIENTSIDE_MAX_CELLS,
+    MAP_CLUSTER_MIN_POINTS,
+    MAP_CLUSTER_MAX_ZOOM,
+)
 from dashboard.styles import (
     MULTI_VIZ_COLORSCALE,
     SEQUENTIAL_COLORSCALES,
@@ -18,6 +28,18 @@ from dashboard.styles import (
 )
 
 
+# a zoom level of each cell resolution, see zoom_to_cell_resolution
+RESOLUTION_ZOOMS = {
+    7: 10,
+    8: 11.5,
+    9: 13,
+    10: 14.5,
+    11: 15.5,
+    12: 16.5,
+    13: 17.5,
+    14: 19,
+}
+
 colors1, _ = plotly.colors.convert_colors_to_same_type(SEQUENTIAL_COLORSCALES[0])
 colors2, _ = plotly.colors.convert_colors_to_same_type(SEQUENTIAL_COLORSCALES[1])
 colorscale1 = plotly.colors.make_colorscale(colors1)
@@ -72,6 +94,9 @@ class LocationData:
         )
         self.values, self.lon, self.lat, self.ids = zip(*sorted_data)
 
+    def index(self):
+        return location_index(self.lat, self.lon)
+
 
 def agg_fcn_mapper(fcn):
     if fcn == "mean":
@@ -132,10 +157,32 @@ def get_continuous_color(colorscale, intermed):
     )
 
 
+def continuous_colors(colorscale, intermed):
+    """Vectorized get_continuous_color, the colors of an array of values.
+
+    Interpolates like plotly.colors.find_intermediate_color, the colors are
+    the same strings get_continuous_color returns.
+    """
+    intermed = np.asarray(intermed, dtype=float)
+    colors = np.full(len(intermed), colorscale[0][1], dtype=object)
+    if len(colorscale) == 1:
+        return colors
+    cutoffs = np.array([cutoff for cutoff, _ in colorscale], dtype=float)
+    rgb = np.array([plotly.colors.unlabel_rgb(color) for _, color in colorscale])
+    high = np.clip(np.searchsorted(cutoffs, intermed), 1, len(cutoffs) - 1)
+    low = high - 1
+    t = (intermed - cutoffs[low]) / (cutoffs[high] - cutoffs[low])
+    channels = rgb[low] + t[:, None] * (rgb[high] - rgb[low])
+    inside = (intermed > 0) & (intermed < 1)
+    colors[inside] = [f"rgb({r}, {g}, {b})" for r, g, b in channels[inside].tolist()]
+    colors[intermed >= 1] = colorscale[-1][1]
+    return colors
+
+
 # empty map
 def generate_empty_map(zoom=DEFAULT_ZOOM, clat=DEFAULT_LAT, clon=DEFAULT_LON):
-    fig = go.Figure(go.Choroplethmapbox())
-    fig.update_layout(
+    layout = dict(
+        template=default_template(),
         margin=dict(l=0, r=0, t=0, b=0),
         mapbox={
             "style": "white-bg",
@@ -145,12 +192,11 @@ def generate_empty_map(zoom=DEFAULT_ZOOM, clat=DEFAULT_LAT, clon=DEFAULT_LON):
         },
         showlegend=False,
     )
-    return fig
+    return dict(data=[dict(type="choroplethmapbox")], layout=layout)
 
 
 # single points, highlight
 def generate_scatter_map_plot(lats, lons, names, ids, selected=None):
-
     valid_lats = []
     valid_lons = []
     for i in range(len(lats)):
@@ -354,7 +400,6 @@ def generate_multi_scatter_map_plot(data: list):
     lons = []
 
     for i in range(len(data)):
-
         traces.append(
             go.Scattermapbox(
                 lon=data[i].get("longitude"),
@@ -396,44 +441,117 @@ def generate_multi_scatter_map_plot(data: list):
     return fig
 
 
-def generate_choroplethmap(h3ids, values):
-    return go.Choroplethmapbox(
-        geojson=generate_geojson(h3ids),
-        z=values,
-        text=values,
-        locations=h3ids,
-        customdata=[{"n_deployments": d, "type": "cell"} for d in values],
-        featureidkey="properties.h3index",
-        colorscale="Tealgrn",
-        marker_opacity=0.5,
-        marker_line_width=1.5,
-        marker_line_color="rgba(0,0,0,1)",
-        hovertemplate="Count: <b>%{z}</b><extra></extra>",
-        showscale=True,
-        colorbar=go.choroplethmapbox.ColorBar(
-            thicknessmode="pixels",
-            thickness=15,
-            x=0.99,
-            y=0.99,
-            yanchor="top",
-            ypad=8,
-            xpad=8,
-            len=0.5,
-            bgcolor="rgba(245, 245, 245,0.8)",
-            xanchor="right",
-            outlinecolor="rgba(245, 245, 245,0)",
-        ),
+def split_geojson_tiles(h3ids, **columns):
+    """Splits cells and their per-cell columns by geojson tile.
+
+    Yields (geojson url, cells, columns) for one choropleth trace per tile.
+    Columns that are not lists are passed on as they are.
+    """
+    for url, positions in geojson_tile_urls(h3ids).items():
+        yield url, [h3ids[i] for i in positions], {
+            key: [column[i] for i in positions] if isinstance(column, list) else column
+            for key, column in columns.items()
+        }
+
+
+def generate_choroplethmap(h3ids, values, zmin=None, zmax=None):
+    # all tiles share the color range, the first one shows the colorbar
+    zmin = zmin if zmin is not None or len(values) == 0 else min(values)
+    zmax = zmax if zmax is not None or len(values) == 0 else max(values)
+    traces = []
+    for geojson, tile_ids, tile in split_geojson_tiles(h3ids, values=values):
+        traces.append(
+            dict(
+                type="choroplethmapbox",
+                geojson=geojson,
+                z=tile["values"],
+                zmin=zmin,
+                zmax=zmax,
+                text=tile["values"],
+                locations=tile_ids,
+                customdata=[
+                    {"n_deployments": d, "type": "cell"} for d in tile["values"]
+                ],
+                featureidkey="properties.h3index",
+                colorscale="Tealgrn",
+                marker=dict(opacity=0.5, line=dict(width=1.5, color="rgba(0,0,0,1)")),
+                hovertemplate="Count: <b>%{z}</b><extra></extra>",
+                showscale=len(traces) == 0,
+                colorbar=dict(
+                    thicknessmode="pixels",
+                    thickness=15,
+                    x=0.99,
+                    y=0.99,
+                    yanchor="top",
+                    ypad=8,
+                    xpad=8,
+                    len=0.5,
+                    bgcolor="rgba(245, 245, 245,0.8)",
+                    xanchor="right",
+                    outlinecolor="rgba(245, 245, 245,0)",
+                ),
+            )
+        )
+    return traces
+
+
+def cluster_points(ds: LocationData, zoom, clat=None, clon=None):
+    """The point clusters of a dataset at a zoom level.
+
+    Returns a LocationData with one point per cluster, clipped to the viewport
+    if a center is given, and the number of points of each cluster. Clusters
+    of one point keep the id and exact coordinates of the point. Datasets
+    with at most MAP_CLUSTER_MIN_POINTS points are returned as they are,
+    with counts None.
+    """
+    if len(ds.lat) <= MAP_CLUSTER_MIN_POINTS:
+        return ds, None
+    bounds = viewport_bounds(clat, clon, zoom) if clat is not None else None
+    values = ds.values if len(ds.values) == len(ds.lat) else None
+    clusters = ds.index().cluster_points(zoom, values, ds.agg_fcn, bounds)
+    clustered = LocationData(
+        lat=clusters["lat"].tolist(),
+        lon=clusters["lon"].tolist(),
+        values=clusters["value"].tolist(),
+        ids=[ds.ids[p] if p >= 0 else None for p in clusters["point"]],
+        name=ds.name,
+        agg_fcn=ds.agg_fcn,
+        visible=ds.visible,
     )
+    return clustered, clusters["count"].tolist()
+
 
+def point_view_key(datasets, zoom, clat, clon):
+    """Identifies the point clusters a map shows in a viewport.
+
+    None if none of the datasets is clustered.
+    """
+    if all(len(ds.lat) <= MAP_CLUSTER_MIN_POINTS for ds in datasets):
+        return None
+    level = min(int(np.floor(zoom)), MAP_CLUSTER_MAX_ZOOM + 1)
+    return [level, [float(b) for b in viewport_bounds(clat, clon, zoom)]]
 
-def generate_scattermap(lat, lon, ids, color="blue", size=7, opacity=0.7):
-    return go.Scattermapbox(
+
+def generate_scattermap(lat, lon, ids, color="blue", size=7, opacity=0.7, counts=None):
+    if counts is None:
+        sizes = size
+        customdata = [{"id": d, "type": "point"} for d in ids]
+    else:
+        # clusters grow with the number of points they hold
+        n = np.asarray(counts)
+        sizes = np.where(n == 1, size, size + 3 * np.log2(n))
+        customdata = [
+            {"id": d, "type": "point"} if n == 1 else {"n": n, "type": "cluster"}
+            for d, n in zip(ids, counts)
+        ]
+    return dict(
+        type="scattermapbox",
         lon=lon,
         lat=lat,
         text=ids,
         mode="markers",
-        customdata=[{"id": d, "type": "point"} for d in ids],
-        marker={"size": size, "color": color, "opacity": opacity},
+        customdata=customdata,
+        marker={"size": sizes, "color": color, "opacity": opacity},
         showlegend=False,
         hoverinfo="skip"
         # hovertemplate="Deployment %{text}<br>Type: %{customdata}<extra></extra>",
@@ -441,7 +559,7 @@ def generate_scattermap(lat, lon, ids, color="blue", size=7, opacity=0.7):
 
 
 def generate_h3hexbin_map(
-    lat, lon, values, ids, zoom=None, clat=None, clon=None, aggregate_fun=np.sum
+    lat, lon, values, ids, zoom=None, clat=None, clon=None, agg_fcn="sum"
 ):
     if len(lat) == 0:
         return generate_empty_map(
@@ -449,6 +567,7 @@ def generate_h3hexbin_map(
             clat=clat if clat else DEFAULT_LAT,
             clon=clon if clon else DEFAULT_LON,
         )
+    clip = zoom is not None and clat is not None
     lat_min = np.min(lat)
     lat_max = np.max(lat)
     lon_min = np.min(lon)
@@ -457,7 +576,6 @@ def generate_h3hexbin_map(
         zoom = calculate_zoom_from_points(lat_min, lat_max, lon_min, lon_max)
 
     if clat is None:
-
         if len(lat) > 1:
             clat = (lat_max + lat_min) / 2
             clon = (lon_max + lon_min) / 2
@@ -465,12 +583,15 @@ def generate_h3hexbin_map(
             clat = lat_max
             clon = lon_max
     resolution = zoom_to_cell_resolution(zoom)
-    aggregated = generate_clusters(
-        resolution=resolution, lat=lat, lon=lon, values=values, fun=aggregate_fun
-    )
+    index = location_index(lat, lon)
+    aggregated = index.aggregate(resolution, values, agg_fcn)
+    zmin = min(aggregated.values())
+    zmax = max(aggregated.values())
+    if clip:
+        aggregated = clip_to_viewport(aggregated, index, resolution, zoom, clat, clon)
     locations = list(aggregated.keys())
     values = list(aggregated.values())
-    hexbin_map = go.Figure()
+    traces = []
 
     if resolution > 7:
         lat_m = []
@@ -489,14 +610,29 @@ def generate_h3hexbin_map(
                 lon_m.append(lon[i])
                 ids_m.append(ids[i])
 
+        point_center = (clat, clon) if clip else (None, None)
         if len(ids_g) > 0:
-
-            hexbin_map.add_trace(generate_scattermap(lat_g, lon_g, ids_g, "#AE3EC9", 6))
+            points, counts = cluster_points(
+                LocationData(lat=lat_g, lon=lon_g, ids=ids_g), zoom, *point_center
+            )
+            traces.append(
+                generate_scattermap(
+                    points.lat, points.lon, points.ids, "#AE3EC9", 6, counts=counts
+                )
+            )
         if len(ids_m) > 0:
-            hexbin_map.add_trace(generate_scattermap(lat_m, lon_m, ids_m, "#F03E3E", 8))
+            points, counts = cluster_points(
+                LocationData(lat=lat_m, lon=lon_m, ids=ids_m), zoom, *point_center
+            )
+            traces.append(
+                generate_scattermap(
+                    points.lat, points.lon, points.ids, "#F03E3E", 8, counts=counts
+                )
+            )
     if resolution <= 13:
-        hexbin_map.add_trace(generate_choroplethmap(locations, values))
-    hexbin_map.update_layout(
+        traces += generate_choroplethmap(locations, values, zmin, zmax)
+    layout = dict(
+        template=default_template(),
         clickmode="event",
         margin=dict(l=0, r=0, t=0, b=0),
         plot_bgcolor="rgba(0,0,0,0)",
@@ -509,24 +645,73 @@ def generate_h3hexbin_map(
         },
         showlegend=False,
     )
-    return hexbin_map
+    return dict(data=traces, layout=layout)
+
+
+def clip_to_viewport(aggregated, index, resolution, zoom, clat, clon):
+    visible = index.visible_cells(resolution, viewport_bounds(clat, clon, zoom))
+    return {cell: value for cell, value in aggregated.items() if cell in visible}
+
+
+def hexbin_view_key(datasets, zoom, clat, clon):
+    """Identifies the cells a hexbin map shows in a viewport.
+
+    The map only needs a new figure when the key changes, zooming or panning
+    within the same resolution and visible cells does not.
+    """
+    resolution = zoom_to_cell_resolution(zoom)
+    bounds = viewport_bounds(clat, clon, zoom)
+    visible = set()
+    for ds in datasets:
+        if len(ds.lat) > 0:
+            visible |= ds.index().visible_cells(resolution, bounds)
+    return [resolution, content_hash(sorted(visible))]
+
+
+def hexbin_resolution_traces(
+    datasets, build_figure, max_cells=MAP_CLIENTSIDE_MAX_CELLS
+):
+    """Hexbin and colorbar traces of every cell resolution.
+
+    Shipped to the browser once per dataset load, so that zooming only swaps
+    traces in the browser. The point traces are the same for all resolutions
+    and are kept. `build_figure(zoom)` returns the hexbin figure at
+    a zoom level, resolutions with more than `max_cells` cells are left to
+    the server.
+    """
+    resolutions = {}
+    for resolution, zoom in RESOLUTION_ZOOMS.items():
+        n_cells = sum(
+            len(ds.index().cell_codes(resolution)[0])
+            for ds in datasets
+            if len(ds.lat) > 0
+        )
+        if n_cells > max_cells:
+            continue
+        figure = build_figure(zoom)
+        resolutions[resolution] = [
+            trace for trace in figure["data"] if trace["type"] != "scattermapbox"
+        ]
+    return {"resolutions": resolutions}
 
 
 def generate_choroplethmap_label_overlay(h3ids, legends):
-    geojson = generate_geojson(h3ids)
-
-    return go.Choroplethmapbox(
-        geojson=geojson,
-        z=[0 for i in range(len(h3ids))],
-        text=legends,
-        locations=h3ids,
-        featureidkey="properties.h3index",
-        colorscale=TRANSPARENT_COLORSCALE,
-        marker_opacity=0,
-        hovertemplate="%{text}<extra></extra>",
-        showlegend=False,
-        showscale=False,
-    )
+    return [
+        dict(
+            type="choroplethmapbox",
+            geojson=geojson,
+            z=np.zeros(len(tile_ids), dtype=int),
+            text=tile["legends"],
+            locations=tile_ids,
+            featureidkey="properties.h3index",
+            colorscale=TRANSPARENT_COLORSCALE,
+            marker=dict(opacity=0),
+            hovertemplate="%{text}<extra></extra>",
+            showlegend=False,
+            showscale=False,
+        )
+        for geojson, tile_ids, tile in split_geojson_tiles(h3ids, legends=legends)
+    ]
 
 
 def generate_choroplethmap_multi(
@@ -538,43 +723,46 @@ def generate_choroplethmap_multi(
     zmin=None,
     zmax=None,
 ):
-    geojson = generate_geojson(h3ids)
     zmin = zmin if zmin is not None else min(values)
     zmax = zmax if zmax is not None else max(values)
-    marker_line_color = (
-        [
-            get_continuous_color(
-                colorscale,
-                intermed=(v - zmin) / (zmax - zmin) if (zmax - zmin) > 0 else 0,
-            )
-            if v is not None
-            else "rgba(0,0,0,0)"
-            for v in values
-        ]
-        if borderonly
-        else "rgba(0,0,0,1)"
-    )
+    if borderonly:
+        v = np.array([np.nan if v is None else v for v in values], dtype=float)
+        intermed = (v - zmin) / (zmax - zmin) if (zmax - zmin) > 0 else 0 * v
+        marker_line_color = continuous_colors(colorscale, intermed)
+        marker_line_color[np.isnan(v)] = "rgba(0,0,0,0)"
+        marker_line_color = marker_line_color.tolist()
+    else:
+        marker_line_color = "rgba(0,0,0,1)"
     marker_opacity = 1 if borderonly else 0.7
     marker_line_width = 4 if borderonly else 0
     m_colorscale = TRANSPARENT_COLORSCALE if borderonly else colorscale
-    return go.Choroplethmapbox(
-        geojson=geojson,
-        z=values,
-        text=values,
-        locations=h3ids,
-        name=name,
-        customdata=[{"n_deployments": d, "type": "cell"} for d in values],
-        featureidkey="properties.h3index",
-        colorscale=m_colorscale,
-        zmin=zmin,
-        zmax=zmax,
-        marker_opacity=marker_opacity,
-        marker_line_width=marker_line_width,
-        marker_line_color=marker_line_color,
-        hovertemplate=str(name) + ": <b>%{z}</b><extra></extra>",
-        showlegend=False,
-        showscale=False,
-    )
+    traces = []
+    for geojson, tile_ids, tile in split_geojson_tiles(
+        h3ids, values=values, marker_line_color=marker_line_color
+    ):
+        trace = dict(
+            type="choroplethmapbox",
+            geojson=geojson,
+            z=tile["values"],
+            text=tile["values"],
+            locations=tile_ids,
+            customdata=[{"n_deployments": d, "type": "cell"} for d in tile["values"]],
+            featureidkey="properties.h3index",
+            colorscale=m_colorscale,
+            zmin=zmin,
+            zmax=zmax,
+            marker=dict(
+                opacity=marker_opacity,
+                line=dict(width=marker_line_width, color=tile["marker_line_color"]),
+            ),
+            hovertemplate=str(name) + ": <b>%{z}</b><extra></extra>",
+            showlegend=False,
+            showscale=False,
+        )
+        if name is not None:
+            trace["name"] = name
+        traces.append(trace)
+    return traces
 
 
 def colorbar_trace(
@@ -602,9 +790,10 @@ def colorbar_trace(
         len=0.5,
         bgcolor="rgba(245, 245, 245,0.8)",
         outlinecolor="rgba(245, 245, 245,0)",
-        title=f"{title}<br><sup>{subtitle}</sup>",
+        title=dict(text=f"{title}<br><sup>{subtitle}</sup>"),
     )
-    return go.Scatter(
+    return dict(
+        type="scatter",
         x=[None],
         y=[None],
         mode="markers",
@@ -645,6 +834,7 @@ def generate_multi_h3hexbin_map(
     if len(concat_lats) == 0 or len(concat_lons) == 0:
         return generate_empty_map()
 
+    clip = zoom is not None and clat is not None
     lat_min = np.min(concat_lats)
     lat_max = np.max(concat_lats)
     lon_min = np.min(concat_lons)
@@ -655,7 +845,6 @@ def generate_multi_h3hexbin_map(
         else zoom
     )
     if clat is None:
-
         if len(concat_lats) > 1:
             clat = (lat_max + lat_min) / 2
             clon = (lon_max + lon_min) / 2
@@ -665,24 +854,22 @@ def generate_multi_h3hexbin_map(
 
     resolution = zoom_to_cell_resolution(zoom)
 
-    aggregated0 = generate_clusters(
-        resolution=resolution,
-        lat=ds0.lat,
-        lon=ds0.lon,
-        values=ds0.values,
-        fun=agg_fcn_mapper(ds0.agg_fcn),
-    )
+    aggregated0 = ds0.index().aggregate(resolution, ds0.values, ds0.agg_fcn)
+    aggregated1 = ds1.index().aggregate(resolution, ds1.values, ds1.agg_fcn)
+    # color ranges of all cells, so that they do not change when panning
+    range_values0 = list(aggregated0.values()) or [0]
+    range_values1 = list(aggregated1.values()) or [0]
+    if clip:
+        aggregated0 = clip_to_viewport(
+            aggregated0, ds0.index(), resolution, zoom, clat, clon
+        )
+        aggregated1 = clip_to_viewport(
+            aggregated1, ds1.index(), resolution, zoom, clat, clon
+        )
 
     locations0 = list(aggregated0.keys())
     values0 = list(aggregated0.values())
 
-    aggregated1 = generate_clusters(
-        resolution=resolution,
-        lat=ds1.lat,
-        lon=ds1.lon,
-        values=ds1.values,
-        fun=agg_fcn_mapper(ds1.agg_fcn),
-    )
     aggregated1 = dict(sorted(aggregated1.items(), key=lambda item: item[1]))
     locations1 = list(aggregated1.keys())
     values1 = list(aggregated1.values())
@@ -698,27 +885,25 @@ def generate_multi_h3hexbin_map(
     hover_locations = list(label_dict.keys())
     hover_labels = list(label_dict.values())
 
-    hexbin_map = go.Figure()
+    traces = []
 
     if ds0_visible and len(ds0.values) > 0:
-        zmin = min(values0)
-        zmax = max(values0)
+        zmin = min(range_values0)
+        zmax = max(range_values0)
         zspan = zmax - zmin
         if isinstance(range0, list) and len(range0) == 2:
             zmax = int(zmin + (range0[1] / 100) * zspan)
             zmin += int((range0[0] / 100) * zspan)
 
-        hexbin_map.add_trace(
-            generate_choroplethmap_multi(
-                locations0,
-                values0,
-                name=ds0.name,
-                colorscale=colorscale1,
-                zmin=zmin,
-                zmax=zmax,
-            )
+        traces += generate_choroplethmap_multi(
+            locations0,
+            values0,
+            name=ds0.name,
+            colorscale=colorscale1,
+            zmin=zmin,
+            zmax=zmax,
         )
-        hexbin_map.add_trace(
+        traces.append(
             colorbar_trace(
                 zmin,
                 zmax,
@@ -728,25 +913,23 @@ def generate_multi_h3hexbin_map(
             )
         )
     if ds1_visible and len(ds1.values) > 0:
-        zmin = min(values1)
-        zmax = max(values1)
+        zmin = min(range_values1)
+        zmax = max(range_values1)
         zspan = zmax - zmin
         if isinstance(range1, list) and len(range1) == 2:
             zmax = int(zmin + (range1[1] / 100) * zspan)
             zmin += int((range1[0] / 100) * zspan)
 
-        hexbin_map.add_trace(
-            generate_choroplethmap_multi(
-                locations1,
-                values1,
-                name=ds1.name,
-                borderonly=True,
-                colorscale=colorscale2,
-                zmin=zmin,
-                zmax=zmax,
-            )
+        traces += generate_choroplethmap_multi(
+            locations1,
+            values1,
+            name=ds1.name,
+            borderonly=True,
+            colorscale=colorscale2,
+            zmin=zmin,
+            zmax=zmax,
         )
-        hexbin_map.add_trace(
+        traces.append(
             colorbar_trace(
                 zmin,
                 zmax,
@@ -757,34 +940,63 @@ def generate_multi_h3hexbin_map(
             )
         )
     if ds0_visible and ds1_visible:
-        hexbin_map.add_trace(
-            generate_choroplethmap_label_overlay(hover_locations, legends=hover_labels)
+        traces += generate_choroplethmap_label_overlay(
+            hover_locations, legends=hover_labels
         )
     if scatter:
+        point_center = (clat, clon) if clip else (None, None)
         if ds0_visible and len(ds0.values) > 0:
-            hexbin_map.add_trace(
-                generate_scattermap(ds0.lat, ds0.lon, ds0.ids, "black", 10, opacity=0.5)
+            points0, counts0 = cluster_points(ds0, zoom, *point_center)
+            traces.append(
+                generate_scattermap(
+                    points0.lat,
+                    points0.lon,
+                    points0.ids,
+                    "black",
+                    10,
+                    opacity=0.5,
+                    counts=counts0,
+                )
             )
-            hexbin_map.add_trace(
+            traces.append(
                 generate_scattermap(
-                    ds0.lat, ds0.lon, ds0.ids, MULTI_VIZ_COLORSCALE[0], 8
+                    points0.lat,
+                    points0.lon,
+                    points0.ids,
+                    MULTI_VIZ_COLORSCALE[0],
+                    8,
+                    counts=counts0,
                 )
             )
         if ds1_visible and len(ds1.values) > 0:
-            hexbin_map.add_trace(
-                generate_scattermap(ds1.lat, ds1.lon, ds1.ids, "black", 10, opacity=0.5)
+            points1, counts1 = cluster_points(ds1, zoom, *point_center)
+            traces.append(
+                generate_scattermap(
+                    points1.lat,
+                    points1.lon,
+                    points1.ids,
+                    "black",
+                    10,
+                    opacity=0.5,
+                    counts=counts1,
+                )
             )
-            hexbin_map.add_trace(
+            traces.append(
                 generate_scattermap(
-                    ds1.lat, ds1.lon, ds1.ids, MULTI_VIZ_COLORSCALE[1], 7, opacity=1
+                    points1.lat,
+                    points1.lon,
+                    points1.ids,
+                    MULTI_VIZ_COLORSCALE[1],
+                    7,
+                    opacity=1,
+                    counts=counts1,
                 )
             )
 
-    hexbin_map.update_xaxes(visible=False)
-    hexbin_map.update_yaxes(visible=False)
     layers = get_mapbox_layers(base_layer, overlay_layer)
 
-    hexbin_map.update_layout(
+    layout = dict(
+        template=default_template(),
         clickmode="event",
         margin=dict(l=0, r=0, t=0, b=0),
         plot_bgcolor="rgba(0,0,0,0)",
@@ -806,29 +1018,34 @@ def generate_multi_h3hexbin_map(
             yanchor="bottom",
             bgcolor="rgba(245, 245, 245,0.8)",
         ),
+        meta=dict(resolution=resolution),
     )
-    return hexbin_map
+    update_axes(layout, "x", visible=False)
+    update_axes(layout, "y", visible=False)
+    return dict(data=traces, layout=layout)
 
 
 def generate_bubblemap_trace(
     lat, lon, ids, values, color="blue", sizeref=9, opacity=0.7
 ):
-    colorlist = []
-    scaled_values = [np.sqrt(v) for v in values]
-    for i in range(len(values)):
-        colorlist.append("rgba(0,0,0,0.65)")
-        colorlist.append(color)
-    lat = [val for val in lat for _ in (0, 1)]
-    lon = [val for val in lon for _ in (0, 1)]
-    ids = [val for val in ids for _ in (0, 1)]
-    sizeref = 2.0 * max(scaled_values) / (60**2)
-
-    vals = []
-    for v in scaled_values:
-        vals.append(max(v * 1.3, 21 * sizeref))
-        vals.append(max(v, 14 * sizeref))
-
-    return go.Scattermapbox(
+    # each location is drawn twice, a dark outline below the colored bubble
+    colorlist = np.tile(
+        np.array(["rgba(0,0,0,0.65)", color], dtype=object), len(values)
+    )
+    scaled_values = np.sqrt(np.asarray(values, dtype=float))
+    lat = np.repeat(np.asarray(lat, dtype=float), 2)
+    lon = np.repeat(np.asarray(lon, dtype=float), 2)
+    ids = np.repeat(np.asarray(ids, dtype=object), 2).tolist()
+    sizeref = 2.0 * np.max(scaled_values) / (60**2)
+
+    vals = interleave(
+        np.maximum(scaled_values * 1.3, 21 * sizeref),
+        np.maximum(scaled_values, 14 * sizeref),
+        dtype=float,
+    )
+
+    return dict(
+        type="scattermapbox",
         lon=lon,
         lat=lat,
         text=ids,
@@ -848,16 +1065,19 @@ def generate_bubblemap_trace(
 
 
 def generate_bubblemap_hovertrace(lat, lon, ids, values, name=None, color="gray"):
-    return go.Scattermapbox(
+    trace = dict(
+        type="scattermapbox",
         lon=lon,
         lat=lat,
         text=values,
-        name=name,
         mode="markers",
         marker=dict(opacity=0, color=color),
         hovertemplate="<b>%{text}</b>",
         showlegend=False,
     )
+    if name is not None:
+        trace["name"] = name
+    return trace
 
 
 def generate_multi_bubble_map(
@@ -882,6 +1102,7 @@ def generate_multi_bubble_map(
     if len(concat_lats) == 0 or len(concat_lons) == 0:
         return generate_empty_map()
 
+    clip = zoom is not None and clat is not None
     lat_min = np.min(concat_lats)
     lat_max = np.max(concat_lats)
     lon_min = np.min(concat_lons)
@@ -892,7 +1113,6 @@ def generate_multi_bubble_map(
         else zoom
     )
     if clat is None:
-
         if len(concat_lats) > 1:
             clat = (lat_max + lat_min) / 2
             clon = (lon_max + lon_min) / 2
@@ -901,11 +1121,14 @@ def generate_multi_bubble_map(
             clon = lon_max
 
     resolution = zoom_to_cell_resolution(zoom)
-    bubble_map = go.Figure()
+    traces = []
+    point_center = (clat, clon) if clip else (None, None)
 
+    if ds0_visible:
+        ds0, _ = cluster_points(ds0, zoom, *point_center)
     if ds0_visible and len(ds0.values) > 0:
         ds0.sort(descending=True)
-        bubble_map.add_trace(
+        traces.append(
             generate_bubblemap_trace(
                 lat=ds0.lat,
                 lon=ds0.lon,
@@ -914,7 +1137,7 @@ def generate_multi_bubble_map(
                 color=MULTI_VIZ_COLORSCALE[0],
             )
         )
-        bubble_map.add_trace(
+        traces.append(
             generate_bubblemap_hovertrace(
                 ds0.lat,
                 ds0.lon,
@@ -925,9 +1148,11 @@ def generate_multi_bubble_map(
             )
         )
 
+    if ds1_visible:
+        ds1, _ = cluster_points(ds1, zoom, *point_center)
     if ds1_visible and len(ds1.values) > 0:
         ds1.sort(descending=True)
-        bubble_map.add_trace(
+        traces.append(
             generate_bubblemap_trace(
                 lat=ds1.lat,
                 lon=ds1.lon,
@@ -936,7 +1161,7 @@ def generate_multi_bubble_map(
                 color=MULTI_VIZ_COLORSCALE[1],
             )
         )
-        bubble_map.add_trace(
+        traces.append(
             generate_bubblemap_hovertrace(
                 ds1.lat,
                 ds1.lon,
@@ -947,7 +1172,8 @@ def generate_multi_bubble_map(
             )
         )
     layers = get_mapbox_layers(base_layer, overlay_layer)
-    bubble_map.update_layout(
+    layout = dict(
+        template=default_template(),
         margin=dict(l=0, r=0, t=0, b=0),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
@@ -960,4 +1186,4 @@ def generate_multi_bubble_map(
         },
         showlegend=False,
     )
-    return bubble_map
+    return dict(data=traces, layout=layout)
@@ -1,6 +1,16 @@
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from dashboard.styles import MULTI_VIZ_COLORSCALE
+from dashboard.utils.ts import decode_ts, ts_time_strings
+from dashboard.charts.figure_dicts import (
+    template,
+    subplot_layout,
+    subplot_axes,
+    axis_key,
+    update_axes,
+    interleave,
+    minutes_to_tod,
+)
+import numpy as np
 import pandas as pd
 
 
@@ -66,6 +76,62 @@ def data_collection_bar_chart(
     return fig
 
 
+# Trace properties of each chart type. Line, scatter, area and short bar
+# charts draw the same x and y, switching between them only patches these.
+TS_TRACE_STYLES = {
+    "line": dict(type="scatter", mode="lines", fill="none"),
+    "scatter": dict(type="scattergl", mode="markers", fill="none"),
+    "area": dict(type="scatter", mode="lines", fill="tozeroy"),
+    "bar": dict(type="bar"),
+}
+MULTI_TS_TRACE_STYLES = {
+    "line": dict(type="scatter", mode="lines", fill="none"),
+    "scatter": dict(type="scattergl", mode="markers", fill="none"),
+    "area": dict(type="scattergl", mode="lines", fill="tozeroy"),
+    "bar": dict(type="bar"),
+}
+TOD_TRACE_STYLES = {
+    "line": dict(
+        type="scatter", mode="lines", line=dict(shape="hv", width=1.5), fill="none"
+    ),
+    "scatter": dict(type="scatter", mode="markers", fill="none"),
+    "area": dict(
+        type="scatter",
+        mode="lines",
+        line=dict(shape="hv", width=1.5),
+        fill="tozeroy",
+    ),
+    "bar": dict(type="bar"),
+}
+
+
+def marker(color):
+    return {"color": color} if color is not None else {}
+
+
+def uses_bar_lines(chart_type, n_points):
+    """Bar charts with many bars are drawn as vertical scattergl lines."""
+    return chart_type == "bar" and n_points >= 250
+
+
+def ts_chart_view(chart_type, n_points):
+    """What a time series chart draws, stored next to it to decide on patches."""
+    return {"chart_type": chart_type, "n_points": n_points}
+
+
+def ts_chart_patchable(view, chart_type):
+    """True if a chart drawn as view switches to chart_type without new data."""
+    if view is None:
+        return False
+    n_points = view["n_points"]
+    drawn_as_lines = uses_bar_lines(view["chart_type"], n_points)
+    return not drawn_as_lines and not uses_bar_lines(chart_type, n_points)
+
+
+def bar_lines(times, values):
+    return interleave(times, times, None), interleave(0, values, None)
+
+
 def generate_ts_figure(
     times,
     values,
@@ -75,170 +141,139 @@ def generate_ts_figure(
     marker_color=None,
     chart_type="line",
 ):
-    fig = go.Figure()
-    if chart_type == "line":
-        fig.add_trace(
-            go.Scatter(x=times, y=values, marker_color=marker_color, mode="lines")
-        )
-    elif chart_type == "scatter":
-        fig.add_trace(
-            go.Scattergl(x=times, y=values, marker_color=marker_color, mode="markers")
+    data = []
+    if uses_bar_lines(chart_type, len(times) if times is not None else 0):
+        times_scatter, values_scatter = bar_lines(times, values)
+        data.append(
+            dict(
+                type="scattergl",
+                x=times_scatter,
+                y=values_scatter,
+                marker=marker(marker_color),
+                mode="lines",
+            )
         )
-    elif chart_type == "area":
-        fig.add_trace(
-            go.Scatter(
+    elif chart_type in TS_TRACE_STYLES:
+        data.append(
+            dict(
                 x=times,
                 y=values,
-                marker_color=marker_color,
-                mode="lines",
-                fill="tozeroy",
+                marker=marker(marker_color),
+                **TS_TRACE_STYLES[chart_type],
             )
         )
-    elif chart_type == "bar":
-        if len(times) < 250:
-            fig.add_trace(go.Bar(x=times, y=values, marker_color=marker_color))
-        else:
-            # create scattergl lines
-            times_scatter = []
-            values_scatter = []
-            for i in range(len(times)):
-                times_scatter.append(times[i])
-                times_scatter.append(times[i])
-                times_scatter.append(None)
-                values_scatter.append(0)
-                values_scatter.append(values[i])
-                values_scatter.append(None)
-            fig.add_trace(
-                go.Scattergl(
-                    x=times_scatter,
-                    y=values_scatter,
-                    marker_color=marker_color,
-                    mode="lines",
-                )
-            )
 
-    fig.update_layout(
+    layout = dict(
+        template=template(light_mode),
         clickmode="event",
         margin=dict(t=20, b=20, l=20, r=20),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        template="plotly_white" if light_mode else "plotly_dark",
+        xaxis=dict(range=[date_from, date_to]),
     )
+    return dict(data=data, layout=layout)
 
-    fig.update_layout(xaxis_range=[date_from, date_to])
 
-    return fig
+def multi_ts_traces_count(data, layout_type="single"):
+    """Number of traces generate_multi_ts_figure draws, subplots skip empty series."""
+    if layout_type == "subplots":
+        return sum(len(decode_ts(d)[0]) > 0 for d in data)
+    return len(data)
+
+
+def multi_ts_xaxes(data, layout_type="single"):
+    """Layout keys of the x axes of generate_multi_ts_figure."""
+    if layout_type == "subplots":
+        return [
+            axis_key(subplot_axes(i + 1, 1)[0])
+            for i in range(multi_ts_traces_count(data, layout_type))
+        ]
+    return ["xaxis"]
 
 
 def generate_multi_ts_figure(
     data, date_from, date_to, light_mode=True, chart_type="line", layout_type="single"
 ):
+    # entries are encoded with encode_ts
+    data = [[ts_time_strings(d), decode_ts(d)[1]] for d in data]
     traces = []
-    if chart_type == "line":
+    if uses_bar_lines(chart_type, len(data[0][0]) if len(data) > 0 else 0):
         for i in range(len(data)):
+            # create scattergl lines
+            times_scatter, values_scatter = bar_lines(data[i][0], data[i][1])
             traces.append(
-                go.Scatter(
-                    x=data[i][0],
-                    y=data[i][1],
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
-                    showlegend=False,
+                dict(
+                    type="scattergl",
+                    x=times_scatter,
+                    y=values_scatter,
+                    marker=marker(MULTI_VIZ_COLORSCALE[i]),
+                    customdata=interleave(data[i][1], data[i][1], ""),
                     mode="lines",
-                    hovertemplate="%{x}<br><b>%{y}</b><extra></extra>",
-                )
-            )
-    elif chart_type == "scatter":
-        for i in range(len(data)):
-            traces.append(
-                go.Scattergl(
-                    x=data[i][0],
-                    y=data[i][1],
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
+                    hovertemplate="%{x}<br><b>%{customdata}</b><extra></extra>",
                     showlegend=False,
-                    mode="markers",
-                    hovertemplate="%{x}<br><b>%{y}</b><extra></extra>",
                 )
             )
-    elif chart_type == "area":
+    elif chart_type in MULTI_TS_TRACE_STYLES:
         for i in range(len(data)):
             traces.append(
-                go.Scattergl(
+                dict(
                     x=data[i][0],
                     y=data[i][1],
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
+                    marker=marker(MULTI_VIZ_COLORSCALE[i]),
                     showlegend=False,
-                    mode="lines",
-                    fill="tozeroy",
                     hovertemplate="%{x}<br><b>%{y}</b><extra></extra>",
+                    **MULTI_TS_TRACE_STYLES[chart_type],
                 )
             )
-    elif chart_type == "bar":
-        if len(data[0][0]) < 250:
-            for i in range(len(data)):
-                traces.append(
-                    go.Bar(
-                        x=data[i][0],
-                        y=data[i][1],
-                        marker_color=MULTI_VIZ_COLORSCALE[i],
-                        showlegend=False,
-                        hovertemplate="%{x}<br><b>%{y}</b><extra></extra>",
-                    )
-                )
-        else:
-            for i in range(len(data)):
-
-                # create scattergl lines
-                times_scatter = []
-                values_scatter = []
-                customdata = []
-                for j in range(len(data[i][0])):
-                    times_scatter.append(data[i][0][j])
-                    times_scatter.append(data[i][0][j])
-                    times_scatter.append(None)
-                    values_scatter.append(0)
-                    values_scatter.append(data[i][1][j])
-                    values_scatter.append(None)
-                    customdata.append(data[i][1][j])
-                    customdata.append(data[i][1][j])
-                    customdata.append("")
-                traces.append(
-                    go.Scattergl(
-                        x=times_scatter,
-                        y=values_scatter,
-                        marker_color=MULTI_VIZ_COLORSCALE[i],
-                        customdata=customdata,
-                        mode="lines",
-                        hovertemplate="%{x}<br><b>%{customdata}</b><extra></extra>",
-                        showlegend=False
-                    )
-                )
 
     if layout_type == "single":
-        fig = go.Figure()
-
-        for t in traces:
-            fig.add_trace(t)
-        fig.update_layout(xaxis_range=[date_from, date_to])
+        layout = dict(xaxis=dict(range=[date_from, date_to]))
 
     elif layout_type == "subplots":
-        traces_with_data = [t for t in traces if len(t.x) > 0]
-        fig = make_subplots(
-            rows=len(traces_with_data), cols=1, shared_xaxes=True, vertical_spacing=0.05
+        traces = [t for t in traces if len(t["x"]) > 0]
+        layout = subplot_layout(
+            rows=len(traces), cols=1, shared_xaxes=True, vertical_spacing=0.05
         )
-        for i in range(len(traces_with_data)):
-
-            fig.add_trace(trace=traces_with_data[i], row=i + 1, col=1)
-            fig.update_xaxes(range=[date_from, date_to], row=i + 1, col=1)
+        for i in range(len(traces)):
+            traces[i]["xaxis"], traces[i]["yaxis"] = subplot_axes(i + 1, 1)
+            layout[axis_key(traces[i]["xaxis"])]["range"] = [date_from, date_to]
 
-    fig.update_layout(
+    layout.update(
+        template=template(light_mode),
         clickmode="event",
         margin=dict(t=20, b=20, l=20, r=20),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        template="plotly_white" if light_mode else "plotly_dark",
-        legend_orientation="h",
+        legend=dict(orientation="h"),
     )
 
-    return fig
+    return dict(data=traces, layout=layout)
+
+
+def tod_layout(layout, light_mode):
+    """Layout shared by the time of day charts, the x axes show the time."""
+    layout.update(
+        margin=dict(l=30, r=30, t=20, b=30),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        hoverlabel=dict(bgcolor="rgba(245, 245, 245,0.8)", font=dict(color="black")),
+        template=template(light_mode),
+    )
+    update_axes(layout, "x", ticktext=tod_ticklabels, tickvals=tod_tickvalues)
+    layout["xaxis"]["range"] = [0, 60 * 24]
+    return layout
+
+
+def tod_trace(minutes_of_day, values, chart_type, color):
+    return dict(
+        x=minutes_of_day,
+        y=values,
+        marker=marker(color),
+        customdata=minutes_to_tod(minutes_of_day),
+        hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
+        showlegend=False,
+        **TOD_TRACE_STYLES[chart_type],
+    )
 
 
 def generate_time_of_day_scatter(
@@ -249,170 +284,50 @@ def generate_time_of_day_scatter(
     spike=False,
     chart_type="line",
 ):
+    data = []
+    if chart_type in TOD_TRACE_STYLES:
+        data.append(tod_trace(minutes_of_day, values, chart_type, marker_color))
 
-    fig = go.Figure()
-    fig.update_layout(
-        margin=dict(l=30, r=30, t=20, b=30),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        hoverlabel_bgcolor="rgba(245, 245, 245,0.8)",
-        hoverlabel_font_color="black",
-        template="plotly_white" if light_mode else "plotly_dark",
-    )
-    if chart_type == "line":
-        fig.add_trace(
-            go.Scatter(
-                x=minutes_of_day,
-                y=values,
-                mode="lines",
-                line_shape="hv",
-                line_width=1.5,
-                marker_color=marker_color,
-                customdata=[minute_to_tod(v) for v in minutes_of_day],
-                hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                showlegend=False,
-            )
-        )
-    elif chart_type == "scatter":
-        fig.add_trace(
-            go.Scatter(
-                x=minutes_of_day,
-                y=values,
-                mode="markers",
-                marker_color=marker_color,
-                customdata=[minute_to_tod(v) for v in minutes_of_day],
-                hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                showlegend=False,
-            )
-        )
-    elif chart_type == "area":
-        fig.add_trace(
-            go.Scatter(
-                x=minutes_of_day,
-                y=values,
-                mode="lines",
-                line_shape="hv",
-                fill="tozeroy",
-                line_width=1.5,
-                marker_color=marker_color,
-                customdata=[minute_to_tod(v) for v in minutes_of_day],
-                hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                showlegend=False,
-            )
-        )
-    elif chart_type == "bar":
-        fig.add_trace(
-            go.Bar(
-                x=minutes_of_day,
-                y=values,
-                marker_color=marker_color,
-                customdata=[minute_to_tod(v) for v in minutes_of_day],
-                hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                showlegend=False,
-            )
-        )
-
+    layout = {}
     if spike:
-        fig.update_xaxes(
+        layout["xaxis"] = dict(
             showspikes=True,
             spikedash="solid",
             spikecolor="#96F2D7",
             spikemode="across",
             spikethickness=-2,
         )
-        fig.update_layout(hovermode="x unified")
-    fig.update_xaxes(ticktext=tod_ticklabels, tickvals=tod_tickvalues)
-    fig.update_layout(xaxis_range=[0, 60 * 24])
+        layout["hovermode"] = "x unified"
+    return dict(data=data, layout=tod_layout(layout, light_mode))
 
-    return fig
+
+def multi_tod_traces_count(data, layout_type="subplots"):
+    """Number of traces generate_multi_time_of_day_scatter draws."""
+    if layout_type == "single":
+        return len(data)
+    return sum(len(d[0]) > 0 for d in data)
 
 
 def generate_multi_time_of_day_scatter(
     data, light_mode=True, chart_type="line", layout_type="subplots"
 ):
-
     traces = []
-    if chart_type == "line":
-        for i in range(len(data)):
-            traces.append(
-                go.Scatter(
-                    x=data[i][0],
-                    y=data[i][1],
-                    mode="lines",
-                    line_shape="hv",
-                    line_width=1.5,
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
-                    customdata=[minute_to_tod(v) for v in data[i][0]],
-                    hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                    showlegend=False,
-                )
-            )
-    elif chart_type == "scatter":
-        for i in range(len(data)):
-            traces.append(
-                go.Scatter(
-                    x=data[i][0],
-                    y=data[i][1],
-                    mode="markers",
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
-                    customdata=[minute_to_tod(v) for v in data[i][0]],
-                    hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                    showlegend=False,
-                )
-            )
-    elif chart_type == "area":
+    if chart_type in TOD_TRACE_STYLES:
         for i in range(len(data)):
             traces.append(
-                go.Scatter(
-                    x=data[i][0],
-                    y=data[i][1],
-                    mode="lines",
-                    line_shape="hv",
-                    line_width=1.5,
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
-                    customdata=[minute_to_tod(v) for v in data[i][0]],
-                    hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                    showlegend=False,
-                    fill="tozeroy",
-                )
-            )
-    elif chart_type == "bar":
-        for i in range(len(data)):
-            traces.append(
-                go.Bar(
-                    x=data[i][0],
-                    y=data[i][1],
-                    marker_color=MULTI_VIZ_COLORSCALE[i],
-                    customdata=[minute_to_tod(v) for v in data[i][0]],
-                    hovertemplate="<b>%{customdata}</b>: %{y}<extra></extra>",
-                    showlegend=False,
-                )
+                tod_trace(data[i][0], data[i][1], chart_type, MULTI_VIZ_COLORSCALE[i])
             )
     if layout_type == "single":
-        fig = go.Figure()
-        for trace in traces:
-            fig.add_trace(trace)
+        layout = {}
     else:
-        traces_with_data = [t for t in traces if len(t.x) > 0]
-        fig = make_subplots(
-            rows=len(traces_with_data), cols=1, shared_xaxes=True, vertical_spacing=0.05
+        traces = [t for t in traces if len(t["x"]) > 0]
+        layout = subplot_layout(
+            rows=len(traces), cols=1, shared_xaxes=True, vertical_spacing=0.05
         )
-        for i in range(len(traces_with_data)):
-            fig.add_trace(traces_with_data[i], row=i + 1, col=1)
-    fig.update_layout(
-        margin=dict(l=30, r=30, t=20, b=30),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        hoverlabel_bgcolor="rgba(245, 245, 245,0.8)",
-        hoverlabel_font_color="black",
-        template="plotly_white" if light_mode else "plotly_dark",
-        modebar_orientation="v",
-    )
-
-    fig.update_xaxes(ticktext=tod_ticklabels, tickvals=tod_tickvalues)
-    fig.update_layout(xaxis_range=[0, 60 * 24])
-
-    return fig
+        for i in range(len(traces)):
+            traces[i]["xaxis"], traces[i]["yaxis"] = subplot_axes(i + 1, 1)
+    layout["modebar"] = dict(orientation="v")
+    return dict(data=traces, layout=tod_layout(layout, light_mode))
 
 
 def no_data_figure(light_mode=True, annotation="No Data"):
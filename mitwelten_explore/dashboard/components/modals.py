@@ -708,7 +708,9 @@ def dataset_config_modal(
         )
     if normalize_id:
         children.append(
-            dmc.Checkbox(label="Normalize", checked=cfg.normalize, id=normalize_id),
+            dmc.Checkbox(
+                label="Normalize", checked=bool(cfg.normalize), id=normalize_id
+            ),
         )
     children.append(
         dmc.Group(
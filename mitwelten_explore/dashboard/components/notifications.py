@@ -1,4 +1,5 @@
 import dash_mantine_components as dmc
+from dash import html
 from dashboard.styles import get_icon
 import uuid
 
@@ -12,4 +13,18 @@ def generate_notification(title, message=None, id=None, action="show", autoClose
             autoClose=autoClose,
             icon=get_icon(icon=icon) if icon else None,
             **kwargs
-        )
\ No newline at end of file
+        )
+
+
+def load_errors_notification(failed):
+    """Notification of datasets that failed to load, failed is a list of
+    (dataset title, error message) tuples. None if nothing failed."""
+    if not failed:
+        return None
+    return generate_notification(
+        title=f"{len(failed)} dataset{'s' if len(failed) > 1 else ''} could not be loaded",
+        message=[html.Div(f"{title}: {error}") for title, error in failed],
+        color="red",
+        icon="mdi:alert-circle-outline",
+        autoClose=10000,
+    )
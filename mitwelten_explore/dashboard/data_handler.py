@@ -1,5 +1,8 @@
 import requests
 import datetime
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from urllib.parse import urlencode
 from dashboard.models import (
     RankEnum,
@@ -15,8 +18,9 @@ from dashboard.models import (
     BirdDataset,
 )
 from dashboard.utils.communication import CachedRequest, construct_url
-from dashboard.utils.ts import merge_detections_dicts
+from dashboard.utils.ts import merge_detections, normalize_series
 from dashboard.utils.geo_utils import validate_coordinates
+from dashboard.series_cache import fetch_tiled
 
 from dashboard.api_clients.meteodata_client import (
     get_meteo_datasets,
@@ -25,12 +29,14 @@ from dashboard.api_clients.meteodata_client import (
     get_meteo_stations,
     get_meteo_statsagg,
     get_meteo_time_of_day,
+    cr as meteodata_cache,
 )
 from dashboard.api_clients.sensordata_client import (
     get_pax_timeseries,
     get_pax_tod,
     get_env_timeseries,
     get_env_tod,
+    cr as sensordata_cache,
 )
 from dashboard.api_clients.deployments_client import get_deployment_location
 
@@ -40,6 +46,7 @@ from dashboard.api_clients.bird_results_client import (
     get_detection_count,
     get_detection_time_of_day,
     get_detection_list_by_deployment,
+    cr as bird_results_cache,
 )
 from dashboard.api_clients.gbif_cache_client import (
     get_gbif_detection_dates,
@@ -47,6 +54,7 @@ from dashboard.api_clients.gbif_cache_client import (
     get_gbif_detection_time_of_day,
     get_gbif_detection_count,
     get_gbif_datasets,
+    cr as gbif_cache,
 )
 from dashboard.api_clients.pollinator_results_client import (
     get_polli_detection_dates,
@@ -57,8 +65,18 @@ from dashboard.api_clients.pollinator_results_client import (
     get_polli_detection_tod_by_id,
     get_polli_detection_count_by_id,
     POLLINATOR_IDS,
+    cr as pollinator_cache,
+)
+from configuration import (
+    DEFAULT_TOD_BUCKET_WIDTH,
+    DATA_LOADER_MAX_WORKERS,
+    DATA_LOADER_TIMEOUT_S,
+)
+
+# shared by all sessions, bounds the number of concurrent requests to the data api
+loader_pool = ThreadPoolExecutor(
+    max_workers=DATA_LOADER_MAX_WORKERS, thread_name_prefix="data_loader"
 )
-from configuration import DEFAULT_TOD_BUCKET_WIDTH
 
 
 def get_time_series_from_query_args(qargs_dict, auth_cookie=None):
@@ -93,175 +111,159 @@ def get_statsagg_from_qargs(qargs_dict, auth_cookie=None):
     return load_statsagg_data(ds, vc, vc, auth_cookie=auth_cookie)
 
 
-def load_ts_data(dataset, cfg, vc: ViewConfiguration, auth_cookie=None):
+def postprocess_series(keys, values, cfg: ViewConfiguration):
+    """Shared last step of all ts and tod loaders."""
+    if cfg.normalize:
+        method = cfg.normalize if isinstance(cfg.normalize, str) else "minmax"
+        values = normalize_series(values, method=method)
+    return keys, values
+
+
+EMPTY_LOCATIONS = {"latitude": [], "longitude": [], "name": [], "id": []}
+
+
+def deployment_locations(locations):
+    """Location dict of a list of `{deployment_id, location}` api records."""
+    loc_dict = {"latitude": [], "longitude": [], "name": [], "id": []}
+    for l in locations or []:
+        latitude = l.get("location").get("lat")
+        longitude = l.get("location").get("lon")
+        if validate_coordinates(latitude, longitude):
+            loc_dict["latitude"].append(latitude)
+            loc_dict["longitude"].append(longitude)
+            loc_dict["name"].append(f'deplpoyment {l.get("deployment_id")}')
+            loc_dict["id"].append(l.get("deployment_id"))
+    return loc_dict
+
+
+class DatasetLoader:
+    """Declares how the data of one dataset type is loaded.
+
+    The fetchers `ts`, `tod`, `locations` and `stats` are called as
+    `fetcher(ds, cfg, vc, auth_cookie)`, `tod` additionally gets `bucket_width_m`.
+    `ts` and `tod` return the raw api response, `ts_keys` and `tod_keys` are its
+    (time key, value key). `locations` returns a location dict and `stats` a
+    statsagg dict. The responses of the `partners` that apply to a dataset are
+    merged into the loader's own ones.
+
+    `cfg_fields` are the view configuration fields the responses depend on,
+    `stats_from_ts` marks types whose statsagg is the sum of their time series
+    and `private` types whose responses depend on the user and are not cached.
+    `rollup(cfg)` names the aggregation ("sum", "min" or "max") that derives a
+    coarser time series exactly from a finer one, None if there is none.
+    `cache` is the CachedRequest the fetchers go through and `cost` the relative
+    weight of a load, 1 for a single deployment or station.
+    """
+
+    def __init__(
+        self,
+        ts=None,
+        tod=None,
+        locations=None,
+        stats=None,
+        ts_keys=("bucket", "detections"),
+        tod_keys=("minuteOfDay", "detections"),
+        partners=None,
+        applies_to=None,
+        cfg_fields=(),
+        stats_from_ts=False,
+        private=False,
+        rollup=None,
+        cache=None,
+        cost=1,
+    ) -> None:
+        self.ts = ts
+        self.tod = tod
+        self.locations = locations
+        self.stats = stats
+        self.ts_keys = ts_keys
+        self.tod_keys = tod_keys
+        self.partners = partners if partners is not None else []
+        self.applies_to = applies_to if applies_to is not None else lambda ds: True
+        self.cfg_fields = cfg_fields
+        self.stats_from_ts = stats_from_ts
+        self.private = private
+        self.rollup = rollup
+        self.cache = cache
+        self.cost = cost
+
+    def partners_for(self, ds):
+        return [p for p in self.partners if p.applies_to(ds)]
+
+    def total_cost(self, ds):
+        return self.cost + sum(p.total_cost(ds) for p in self.partners_for(ds))
+
+    def cache_key(self, kind, ds, cfg: ViewConfiguration, vc: ViewConfiguration):
+        """Identifies the response of a `kind` ("ts", "tod", "locations" or
+        "stats") fetch, normalization is applied on top and not part of it."""
+        return (
+            kind,
+            json.dumps(ds.to_dataset(), sort_keys=True, default=str),
+            tuple(getattr(cfg, f) for f in self.cfg_fields),
+            vc.bucket if kind == "ts" else None,
+            vc.time_from,
+            vc.time_to,
+        )
+
+    def fetch(self, kind, ds, cfg, vc, auth_cookie=None, **kwargs):
+        fetcher = getattr(self, kind)
+        if fetcher is None:
+            return None
+        results = [fetcher(ds, cfg, vc, auth_cookie, **kwargs)]
+        for partner in self.partners_for(ds):
+            results.append(partner.fetch(kind, ds, cfg, vc, auth_cookie, **kwargs))
+        return self.merge(kind, results)
+
+    def merge(self, kind, results):
+        if len(results) == 1:
+            # nothing to merge, e.g. mean env values whose gaps are not zeros
+            return results[0]
+        if kind == "ts":
+            return merge_detections(results, *self.ts_keys)
+        if kind == "tod":
+            return merge_detections(results, *self.tod_keys)
+        res = results[0]
+        for other in results[1:]:
+            if not other:
+                continue
+            if not res:
+                res = other
+            elif kind == "locations":
+                res = {k: res[k] + other[k] for k in EMPTY_LOCATIONS}
+            else:
+                res = {k: res.get(k, 0) + other.get(k, 0) for k in {**res, **other}}
+        return res
+
+
+dataset_loaders = {}
+
+
+def register_loader(dataset_type: DatasetType, loader: DatasetLoader):
+    dataset_loaders[dataset_type] = loader
+    return loader
+
+
+def get_loader(ds):
+    return dataset_loaders.get(ds.type) if ds is not None else None
+
+
+def typed_args(dataset, cfg):
     if not isinstance(cfg, ViewConfiguration):
         cfg = ViewConfiguration(**cfg)
-    if isinstance(dataset, dict):
-        ds = to_typed_dataset(dataset)
-    else:
-        ds = dataset
-    if ds.type == DatasetType.pax:
-        res = get_pax_timeseries(
-            ds.deployment_id,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            dates = res.get("buckets")
-            values = res.get("pax")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-    elif ds.type == DatasetType.birds:
-        # include pollinators
-        res = get_detection_dates(
-            ds.datum_id,
-            confidence=cfg.confidence,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if int(ds.datum_id) in POLLINATOR_IDS:
-            res_polli = get_polli_detection_dates_by_id(
-                ds.datum_id,
-                deployment_ids=None,
-                confidence=cfg.confidence,
-                bucket_width=vc.bucket,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            res = merge_detections_dicts(res, res_polli)
-        if res is not None:
-            dates = res.get("bucket")
-            values = res.get("detections")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-
-    elif ds.type == DatasetType.distinct_species:
-        res = get_detection_dates(
-            212,
-            confidence=cfg.confidence,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            deployment_ids=ds.deployment_id,
-            distinctspecies=True,
-        )
-        if res is not None:
-            dates = res.get("bucket")
-            values = res.get("detections")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-    elif ds.type == DatasetType.gbif_observations:
-        res = get_gbif_detection_dates(
-            ds.datum_id,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            dates = res.get("bucket")
-            values = res.get("detections")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-    elif ds.type == DatasetType.meteodata:
-        res = get_meteo_measurements(
-            station_id=ds.station_id,
-            param_id=ds.param_id,
-            bucket_width=vc.bucket,
-            aggregation=cfg.agg,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            auth_cookie=auth_cookie,
-        )
-        dates = res.get("time")
-        values = res.get("value")
-
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return dates, values
-    elif ds.type == DatasetType.pollinators:
-        res = get_polli_detection_dates(
-            pollinator_class=ds.pollinator_class.value
-            if ds.pollinator_class is not None
-            else None,
-            deployment_ids=ds.deployment_id,
-            confidence=cfg.confidence,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        dates = res.get("bucket")
-        values = res.get("detections")
-
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return dates, values
-    elif ds.type == DatasetType.env_temp:
-        res = get_env_timeseries(
-            ds.deployment_id,
-            measurement_type="temperature",
-            aggregation=cfg.agg,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            dates = res.get("time")
-            values = res.get("value")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-    elif ds.type == DatasetType.env_humi:
-        res = get_env_timeseries(
-            ds.deployment_id,
-            measurement_type="humidity",
-            aggregation=cfg.agg,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            dates = res.get("time")
-            values = res.get("value")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
-    elif ds.type == DatasetType.env_moist:
-        res = get_env_timeseries(
-            ds.deployment_id,
-            measurement_type="moisture",
-            aggregation=cfg.agg,
-            bucket_width=vc.bucket,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            dates = res.get("time")
-            values = res.get("value")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return dates, values
+    ds = dataset if not isinstance(dataset, dict) else to_typed_dataset(dataset)
+    return ds, cfg
+
 
-    return
+def load_ts_data(dataset, cfg, vc: ViewConfiguration, auth_cookie=None):
+    ds, cfg = typed_args(dataset, cfg)
+    loader = get_loader(ds)
+    if loader is None:
+        return
+    res = fetch_tiled(loader, ds, cfg, vc, auth_cookie)
+    if not isinstance(res, dict):
+        return
+    time_key, value_key = loader.ts_keys
+    return postprocess_series(res.get(time_key), res.get(value_key), cfg)
 
 
 def load_tod_data(
@@ -271,395 +273,586 @@ def load_tod_data(
     auth_cookie=None,
     bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
 ):
-    if not isinstance(cfg, ViewConfiguration):
-        cfg = ViewConfiguration(**cfg)
-    if isinstance(dataset, dict):
-        ds = to_typed_dataset(dataset)
-    else:
-        ds = dataset
-    if ds.type == DatasetType.pax:
-        res = get_pax_tod(
-            ds.deployment_id,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        if res is not None:
-            minutes_of_day = res.get("minuteOfDay")
-            values = res.get("pax")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return minutes_of_day, values
-    elif ds.type == DatasetType.birds:
-        res = get_detection_time_of_day(
-            taxon_id=ds.datum_id,
-            confidence=cfg.confidence,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
+    ds, cfg = typed_args(dataset, cfg)
+    loader = get_loader(ds)
+    if loader is None:
+        return [], []
+    res = loader.fetch("tod", ds, cfg, vc, auth_cookie, bucket_width_m=bucket_width_m)
+    time_key, value_key = loader.tod_keys
+    if not isinstance(res, dict) or res.get(value_key) is None:
+        return [], []
+    return postprocess_series(res.get(time_key), res.get(value_key), cfg)
 
-        if int(ds.datum_id) in POLLINATOR_IDS:
-            res_polli = get_polli_detection_tod_by_id(
-                ds.datum_id,
-                deployment_ids=None,
-                confidence=cfg.confidence,
-                bucket_width_m=bucket_width_m,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            res = merge_detections_dicts(
-                res, res_polli, time_key="minuteOfDay", value_key="detections"
-            )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("detections")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.distinct_species:
-        res = get_detection_time_of_day(
-            taxon_id=212,
-            confidence=cfg.confidence,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            distinctspecies=True,
-            deployment_ids=ds.deployment_id,
-        )
-        if res is not None:
-            minutes_of_day = res.get("minuteOfDay")
-            values = res.get("detections")
-            if cfg.normalize:
-                values = [
-                    (v - min(values)) / (max(values) - min(values)) for v in values
-                ]
-            return minutes_of_day, values
-    elif ds.type == DatasetType.gbif_observations:
-        res = get_gbif_detection_time_of_day(
-            taxon_id=ds.datum_id,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("detections")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.meteodata:
-        res = get_meteo_time_of_day(
-            station_id=ds.station_id,
-            param_id=ds.param_id,
-            aggregation=cfg.agg,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            auth_cookie=auth_cookie,
-        )
-        if isinstance(res, list):
-            return [], []
-        minutes_of_day = res.get("minute_of_day")
-        values = res.get("value")
-        if values is None:
-            return [], []
-
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.pollinators:
-        res = get_polli_detection_tod(
-            pollinator_class=ds.pollinator_class.value
-            if ds.pollinator_class is not None
-            else None,
-            deployment_ids=ds.deployment_id,
-            confidence=vc.confidence,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("detections")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.env_temp:
-        res = get_env_tod(
-            deployment_id=ds.deployment_id,
-            measurement_type="temperature",
-            aggregation=cfg.agg,
-            bucket_width_m=bucket_width_m,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-        )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("value")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.env_humi:
-        res = get_env_tod(
-            deployment_id=ds.deployment_id,
-            measurement_type="humidity",
+
+def load_map_data(dataset, cfg, vc: ViewConfiguration, auth_cookie=None):
+    ds, cfg = typed_args(dataset, cfg)
+    loader = get_loader(ds)
+    if loader is None:
+        return dict(EMPTY_LOCATIONS)
+    res = loader.fetch("locations", ds, cfg, vc, auth_cookie)
+    return res if res else dict(EMPTY_LOCATIONS)
+
+
+def load_statsagg_data(dataset, cfg, vc: ViewConfiguration = None, auth_cookie=None):
+    ds, cfg = typed_args(dataset, cfg)
+    loader = get_loader(ds)
+    if loader is None:
+        return {"no data": True}
+    if loader.stats_from_ts:
+        res = fetch_tiled(loader, ds, cfg, vc, auth_cookie)
+        values = res.get(loader.ts_keys[1]) if isinstance(res, dict) else None
+        return derive_statsagg_data([None, values])
+    return loader.fetch("stats", ds, cfg, vc, auth_cookie)
+
+
+def statsagg_derivable(dataset, cfg):
+    """True if the statsagg of the dataset is a plain sum of its time series."""
+    ds, cfg = typed_args(dataset, cfg)
+    loader = get_loader(ds)
+    return loader is not None and loader.stats_from_ts and not cfg.normalize
+
+
+def derive_statsagg_data(ts):
+    """Compute the statsagg from an already loaded (times, values) series,
+    see `statsagg_derivable`."""
+    if ts is None or ts[1] is None:
+        return {"total_detections": 0}
+    return {"total_detections": sum([v for v in ts[1] if v is not None])}
+
+
+def dataset_cost(dataset):
+    """Relative weight of loading a dataset, see `DatasetLoader.cost`."""
+    ds = dataset if not isinstance(dataset, dict) else to_typed_dataset(dataset)
+    loader = get_loader(ds)
+    return loader.total_cost(ds) if loader is not None else 1
+
+
+def sum_rollup(cfg):
+    return "sum"
+
+
+def agg_rollup(cfg):
+    # means and medians of finer buckets can not be combined without their counts
+    return cfg.agg if cfg.agg in ["sum", "min", "max"] else None
+
+
+# pax
+
+
+def pax_ts(ds, cfg, vc, auth_cookie=None):
+    return get_pax_timeseries(
+        ds.deployment_id,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def pax_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+    return get_pax_tod(
+        ds.deployment_id,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def single_deployment_location(ds, cfg, vc, auth_cookie=None):
+    location = get_deployment_location(ds.deployment_id)
+    if not location:
+        return None
+    return {
+        "latitude": [location.get("latitude")],
+        "longitude": [location.get("longitude")],
+        "name": [f"deplpoyment {ds.deployment_id}"],
+        "id": [ds.deployment_id],
+    }
+
+
+register_loader(
+    DatasetType.pax,
+    DatasetLoader(
+        ts=pax_ts,
+        tod=pax_tod,
+        locations=single_deployment_location,
+        ts_keys=("buckets", "pax"),
+        tod_keys=("minuteOfDay", "pax"),
+        stats_from_ts=True,
+        rollup=sum_rollup,
+        cache=sensordata_cache,
+    ),
+)
+
+
+# env sensors
+
+
+def env_loader(measurement_type):
+    def env_ts(ds, cfg, vc, auth_cookie=None):
+        return get_env_timeseries(
+            ds.deployment_id,
+            measurement_type=measurement_type,
             aggregation=cfg.agg,
-            bucket_width_m=bucket_width_m,
+            bucket_width=vc.bucket,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("value")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-
-    elif ds.type == DatasetType.env_moist:
-        res = get_env_tod(
+
+    def env_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+        return get_env_tod(
             deployment_id=ds.deployment_id,
-            measurement_type="moisture",
+            measurement_type=measurement_type,
             aggregation=cfg.agg,
             bucket_width_m=bucket_width_m,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        minutes_of_day = res.get("minuteOfDay")
-        values = res.get("value")
-        if cfg.normalize:
-            values = [(v - min(values)) / (max(values) - min(values)) for v in values]
-        return minutes_of_day, values
-    else:
-        return [], []
 
+    return DatasetLoader(
+        ts=env_ts,
+        tod=env_tod,
+        locations=single_deployment_location,
+        ts_keys=("time", "value"),
+        tod_keys=("minuteOfDay", "value"),
+        cfg_fields=("agg",),
+        rollup=agg_rollup,
+        cache=sensordata_cache,
+    )
+
+
+register_loader(DatasetType.env_temp, env_loader("temperature"))
+register_loader(DatasetType.env_humi, env_loader("humidity"))
+register_loader(DatasetType.env_moist, env_loader("moisture"))
+
+
+# meteoswiss
+
+
+def meteo_ts(ds, cfg, vc, auth_cookie=None):
+    return get_meteo_measurements(
+        station_id=ds.station_id,
+        param_id=ds.param_id,
+        bucket_width=vc.bucket,
+        aggregation=cfg.agg,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        auth_cookie=auth_cookie,
+    )
+
+
+def meteo_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+    return get_meteo_time_of_day(
+        station_id=ds.station_id,
+        param_id=ds.param_id,
+        aggregation=cfg.agg,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        auth_cookie=auth_cookie,
+    )
+
+
+def meteo_location(ds, cfg, vc, auth_cookie=None):
+    station_info = get_meteo_stations(ds.station_id)
+    if isinstance(station_info, list):
+        station_info = station_info[0]
+    return {
+        "latitude": [station_info.get("location").get("lat")],
+        "longitude": [station_info.get("location").get("lon")],
+        "name": [station_info.get("station_name")],
+        "id": [ds.station_id],
+    }
+
+
+def meteo_stats(ds, cfg, vc, auth_cookie=None):
+    return get_meteo_statsagg(
+        station_id=ds.station_id,
+        param_id=ds.param_id,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        auth_cookie=auth_cookie,
+    )
+
+
+register_loader(
+    DatasetType.meteodata,
+    DatasetLoader(
+        ts=meteo_ts,
+        tod=meteo_tod,
+        locations=meteo_location,
+        stats=meteo_stats,
+        ts_keys=("time", "value"),
+        tod_keys=("minute_of_day", "value"),
+        cfg_fields=("agg",),
+        private=True,
+        rollup=agg_rollup,
+        cache=meteodata_cache,
+    ),
+)
 
-def load_map_data(dataset, cfg, vc: ViewConfiguration, auth_cookie=None):
-    if not isinstance(cfg, ViewConfiguration):
-        cfg = ViewConfiguration(**cfg)
-    if isinstance(dataset, dict):
-        ds = to_typed_dataset(dataset)
-    else:
-        ds = dataset
-    if ds.type == DatasetType.meteodata:
-        station_info = get_meteo_stations(ds.station_id)
-        if isinstance(station_info, list):
-            station_info = station_info[0]
-        response = {
-            "latitude": [station_info.get("location").get("lat")],
-            "longitude": [station_info.get("location").get("lon")],
-            "name": [station_info.get("station_name")],
-            "id": [ds.station_id],
-        }
-        return response
-    elif ds.type == DatasetType.pollinators:
-        locations = get_polli_detection_locations(
-            pollinator_class=ds.pollinator_class.value
-            if ds.pollinator_class is not None
-            else None,
+
+# pollinators
+
+
+def polli_class(ds):
+    return ds.pollinator_class.value if ds.pollinator_class is not None else None
+
+
+def polli_ts(ds, cfg, vc, auth_cookie=None):
+    return get_polli_detection_dates(
+        pollinator_class=polli_class(ds),
+        deployment_ids=ds.deployment_id,
+        confidence=cfg.confidence,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def polli_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+    return get_polli_detection_tod(
+        pollinator_class=polli_class(ds),
+        deployment_ids=ds.deployment_id,
+        confidence=cfg.confidence,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def polli_locations(ds, cfg, vc, auth_cookie=None):
+    return deployment_locations(
+        get_polli_detection_locations(
+            pollinator_class=polli_class(ds),
             deployment_ids=ds.deployment_id,
             confidence=cfg.confidence,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        if locations:
-            response = {
-                "latitude": [l.get("location").get("lat") for l in locations],
-                "longitude": [l.get("location").get("lon") for l in locations],
-                "name": [f'deplpoyment {l.get("deployment_id")}' for l in locations],
-                "id": [l.get("deployment_id") for l in locations],
-            }
-            return response
-
-    elif ds.type == DatasetType.birds:
-        loc_dict = {"latitude": [], "longitude": [], "name": [], "id": []}
-        locations = get_detection_locations(
+    )
+
+
+register_loader(
+    DatasetType.pollinators,
+    DatasetLoader(
+        ts=polli_ts,
+        tod=polli_tod,
+        locations=polli_locations,
+        cfg_fields=("confidence",),
+        stats_from_ts=True,
+        rollup=sum_rollup,
+        cache=pollinator_cache,
+        cost=2,
+    ),
+)
+
+
+# pollinator detections of a taxon, merged into the bird detections of that taxon
+
+
+def polli_taxon_ts(ds, cfg, vc, auth_cookie=None):
+    return get_polli_detection_dates_by_id(
+        ds.datum_id,
+        deployment_ids=None,
+        confidence=cfg.confidence,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def polli_taxon_tod(
+    ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH
+):
+    return get_polli_detection_tod_by_id(
+        ds.datum_id,
+        deployment_ids=None,
+        confidence=cfg.confidence,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def polli_taxon_locations(ds, cfg, vc, auth_cookie=None):
+    return deployment_locations(
+        get_polli_detection_locations_by_id(
             ds.datum_id,
+            deployment_ids=None,
             confidence=cfg.confidence,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        locations_polli = None
-        if int(ds.datum_id) in POLLINATOR_IDS:
-            locations_polli = get_polli_detection_locations_by_id(
-                ds.datum_id,
-                deployment_ids=None,
-                confidence=cfg.confidence,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-
-        if locations is not None:
-            for l in locations:
-                latitude = l.get("location").get("lat")
-                longitude = l.get("location").get("lon")
-                if validate_coordinates(latitude, longitude):
-                    loc_dict["latitude"].append(latitude)
-                    loc_dict["longitude"].append(longitude)
-                    loc_dict["name"].append(f'deplpoyment {l.get("deployment_id")}')
-                    loc_dict["id"].append(l.get("deployment_id"))
-        if locations_polli is not None:
-            for l in locations_polli:
-                latitude = l.get("location").get("lat")
-                longitude = l.get("location").get("lon")
-                if validate_coordinates(latitude, longitude):
-                    loc_dict["latitude"].append(latitude)
-                    loc_dict["longitude"].append(longitude)
-                    loc_dict["name"].append(f'deplpoyment {l.get("deployment_id")}')
-                    loc_dict["id"].append(l.get("deployment_id"))
-        return loc_dict
-
-    elif ds.type == DatasetType.distinct_species:
-        loc_dict = {"latitude": [], "longitude": [], "name": [], "id": []}
-        locations = get_detection_locations(
-            212,
-            confidence=cfg.confidence,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            distinctspecies=True,
-            deployment_ids=ds.deployment_id,
-        )
-        if locations is not None:
-            for l in locations:
-                latitude = l.get("location").get("lat")
-                longitude = l.get("location").get("lon")
-                if validate_coordinates(latitude, longitude):
-                    loc_dict["latitude"].append(latitude)
-                    loc_dict["longitude"].append(longitude)
-                    loc_dict["name"].append(f'deplpoyment {l.get("deployment_id")}')
-                    loc_dict["id"].append(l.get("deployment_id"))
-
-        return loc_dict
-    elif ds.type == DatasetType.gbif_observations:
-        locations = get_gbif_detection_locations(
+    )
+
+
+def polli_taxon_stats(ds, cfg, vc, auth_cookie=None):
+    count = get_polli_detection_count_by_id(
+        taxon_id=ds.datum_id,
+        confidence=cfg.confidence,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+    return {"total_detections": count if count is not None else 0}
+
+
+pollinator_taxon_loader = DatasetLoader(
+    ts=polli_taxon_ts,
+    tod=polli_taxon_tod,
+    locations=polli_taxon_locations,
+    stats=polli_taxon_stats,
+    applies_to=lambda ds: int(ds.datum_id) in POLLINATOR_IDS,
+    cfg_fields=("confidence",),
+    rollup=sum_rollup,
+    cache=pollinator_cache,
+)
+
+
+# birds
+
+
+def bird_ts(ds, cfg, vc, auth_cookie=None):
+    return get_detection_dates(
+        ds.datum_id,
+        confidence=cfg.confidence,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def bird_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+    return get_detection_time_of_day(
+        taxon_id=ds.datum_id,
+        confidence=cfg.confidence,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def bird_locations(ds, cfg, vc, auth_cookie=None):
+    return deployment_locations(
+        get_detection_locations(
             ds.datum_id,
+            confidence=cfg.confidence,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        if locations:
-            response = {
-                "latitude": [l.get("location").get("lat") for l in locations],
-                "longitude": [l.get("location").get("lon") for l in locations],
-                "name": [f"observation" for l in locations],
-                "id": [i for i in range(len(locations))],
-            }
-            return response
-    elif ds.type in [
-        DatasetType.pax,
-        DatasetType.env_humi,
-        DatasetType.env_moist,
-        DatasetType.env_temp,
-    ]:
-
-        locations = get_deployment_location(ds.deployment_id)
-        if locations:
-            response = {
-                "latitude": [locations.get("latitude")],
-                "longitude": [locations.get("longitude")],
-                "name": [f"deplpoyment {ds.deployment_id}"],
-                "id": [ds.deployment_id],
-            }
-            return response
-    return {"latitude": [], "longitude": [], "name": [], "id": []}
+    )
+
+
+def bird_stats(ds, cfg, vc, auth_cookie=None):
+    count = get_detection_count(
+        taxon_id=ds.datum_id,
+        confidence=cfg.confidence,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+    return {"total_detections": count if count is not None else 0}
+
+
+register_loader(
+    DatasetType.birds,
+    DatasetLoader(
+        ts=bird_ts,
+        tod=bird_tod,
+        locations=bird_locations,
+        stats=bird_stats,
+        partners=[pollinator_taxon_loader],
+        cfg_fields=("confidence",),
+        rollup=sum_rollup,
+        cache=bird_results_cache,
+        cost=2,
+    ),
+)
 
 
-def load_statsagg_data(dataset, cfg, vc: ViewConfiguration = None, auth_cookie=None):
-    if not isinstance(cfg, ViewConfiguration):
-        cfg = ViewConfiguration(**cfg)
-    ds = dataset if not isinstance(dataset, dict) else to_typed_dataset(dataset)
+# distinct bird species per deployment
 
-    if ds.type == DatasetType.meteodata:
-        return get_meteo_statsagg(
-            station_id=ds.station_id,
-            param_id=ds.param_id,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            auth_cookie=auth_cookie,
-        )
 
-    elif ds.type == DatasetType.birds:
-        total_detections = 0
-        bird_detections = get_detection_count(
-            taxon_id=ds.datum_id,
+def distinct_species_ts(ds, cfg, vc, auth_cookie=None):
+    return get_detection_dates(
+        212,
+        confidence=cfg.confidence,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        deployment_ids=ds.deployment_id,
+        distinctspecies=True,
+    )
+
+
+def distinct_species_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=None):
+    # uses the api's default bucket width
+    return get_detection_time_of_day(
+        taxon_id=212,
+        confidence=cfg.confidence,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        distinctspecies=True,
+        deployment_ids=ds.deployment_id,
+    )
+
+
+def distinct_species_locations(ds, cfg, vc, auth_cookie=None):
+    return deployment_locations(
+        get_detection_locations(
+            212,
             confidence=cfg.confidence,
             time_from=vc.time_from,
             time_to=vc.time_to,
-        )
-        total_detections = 0 if bird_detections is None else bird_detections
-        if int(ds.datum_id) in POLLINATOR_IDS:
-            polli_detection_count = get_polli_detection_count_by_id(
-                taxon_id=ds.datum_id,
-                confidence=cfg.confidence,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            total_detections = (
-                total_detections
-                if polli_detection_count is None
-                else total_detections + polli_detection_count
-            )
-
-        return {"total_detections": total_detections}
-
-    elif ds.type == DatasetType.distinct_species:
-        detected_species = get_detection_list_by_deployment(
+            distinctspecies=True,
             deployment_ids=ds.deployment_id,
-            confidence=cfg.confidence,
-            time_from=vc.time_from,
-            time_to=vc.time_to,
-            limit=1000,
         )
-        if isinstance(detected_species, list) and len(detected_species) > 0:
-            stats = {"distinct species": len(detected_species)}
-            stats.update(
-                {d.get("label_sci"): d.get("count") for d in detected_species[:10]}
-            )
-            return stats
-
-        return {}
-
-    elif ds.type == DatasetType.gbif_observations:
-        return {
-            "total_detections": get_gbif_detection_count(
-                taxon_id=ds.datum_id,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-        }
-    elif ds.type == DatasetType.pax:
-        pax_values = get_pax_timeseries(
-            ds.deployment_id,
-            bucket_width=vc.bucket,
-            time_from=cfg.time_from,
-            time_to=cfg.time_to,
+    )
+
+
+def distinct_species_stats(ds, cfg, vc, auth_cookie=None):
+    detected_species = get_detection_list_by_deployment(
+        deployment_ids=ds.deployment_id,
+        confidence=cfg.confidence,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+        limit=1000,
+    )
+    if isinstance(detected_species, list) and len(detected_species) > 0:
+        stats = {"distinct species": len(detected_species)}
+        stats.update(
+            {d.get("label_sci"): d.get("count") for d in detected_species[:10]}
         )
-        if pax_values is not None:
-            total_count = sum(pax_values.get("pax"))
-        else:
-            total_count = 0
-        return {"total_detections": total_count}
+        return stats
+    return {}
+
+
+register_loader(
+    DatasetType.distinct_species,
+    DatasetLoader(
+        ts=distinct_species_ts,
+        tod=distinct_species_tod,
+        locations=distinct_species_locations,
+        stats=distinct_species_stats,
+        cfg_fields=("confidence",),
+        cache=bird_results_cache,
+        cost=3,
+    ),
+)
 
-    elif ds.type == DatasetType.pollinators:
 
-        polli_detections = get_polli_detection_dates(
-            pollinator_class=ds.pollinator_class.value
-            if ds.pollinator_class is not None
-            else None,
-            deployment_ids=ds.deployment_id,
-            confidence=cfg.confidence,
-            bucket_width=vc.bucket,
+# gbif observations
+
+
+def gbif_ts(ds, cfg, vc, auth_cookie=None):
+    return get_gbif_detection_dates(
+        ds.datum_id,
+        bucket_width=vc.bucket,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def gbif_tod(ds, cfg, vc, auth_cookie=None, bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH):
+    return get_gbif_detection_time_of_day(
+        taxon_id=ds.datum_id,
+        bucket_width_m=bucket_width_m,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+
+
+def gbif_locations(ds, cfg, vc, auth_cookie=None):
+    locations = get_gbif_detection_locations(
+        ds.datum_id,
+        time_from=vc.time_from,
+        time_to=vc.time_to,
+    )
+    if not locations:
+        return None
+    return {
+        "latitude": [l.get("location").get("lat") for l in locations],
+        "longitude": [l.get("location").get("lon") for l in locations],
+        "name": ["observation" for l in locations],
+        "id": [i for i in range(len(locations))],
+    }
+
+
+def gbif_stats(ds, cfg, vc, auth_cookie=None):
+    return {
+        "total_detections": get_gbif_detection_count(
+            taxon_id=ds.datum_id,
             time_from=vc.time_from,
             time_to=vc.time_to,
         )
-        if polli_detections is not None:
-            total_count = sum(polli_detections.get("detections"))
-        else:
-            total_count = 0
-        return {"total_detections": total_count}
+    }
+
+
+register_loader(
+    DatasetType.gbif_observations,
+    DatasetLoader(
+        ts=gbif_ts,
+        tod=gbif_tod,
+        locations=gbif_locations,
+        stats=gbif_stats,
+        rollup=sum_rollup,
+        cache=gbif_cache,
+        cost=2,
+    ),
+)
 
-    else:
-        return {"no data": True}
+
+def run_batch(tasks, default=None, timeout=DATA_LOADER_TIMEOUT_S, costs=None):
+    """Run (fcn, kwargs) tasks on the shared loader pool.
+
+    Returns the results in task order and a list of (task index, error message)
+    tuples. Failed or timed out tasks are reported in the errors and their result
+    is replaced by `default`. If `costs` are given, the most expensive tasks are
+    submitted first.
+
+    Callers show the errors, e.g. with `load_errors_notification`. A timed out
+    task is only dropped if it is still queued, a running one keeps its pool
+    worker until its http request times out.
+    """
+    order = range(len(tasks))
+    if costs is not None:
+        order = sorted(order, key=lambda i: -costs[i])
+    futures = [None] * len(tasks)
+    for i in order:
+        fcn, kwargs = tasks[i]
+        futures[i] = loader_pool.submit(fcn, **kwargs)
+    deadline = time.monotonic() + timeout
+    results = []
+    errors = []
+    for i, future in enumerate(futures):
+        try:
+            results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+        except FutureTimeoutError:
+            # drops the task if it has not started, running tasks can't be stopped
+            future.cancel()
+            errors.append((i, f"timed out after {timeout}s"))
+            results.append(default)
+        except Exception as e:
+            errors.append((i, repr(e)))
+            results.append(default)
+    for i, error in errors:
+        print(f"{tasks[i][0].__name__} failed for task {i}: {error}")
+    return results, errors
+
+
+def load_batch(
+    load_fcn, jobs, auth_cookie=None, default=None, timeout=DATA_LOADER_TIMEOUT_S
+):
+    """Run `load_fcn(dataset, cfg, vc, auth_cookie)` for each (dataset, cfg, vc)
+    job on the shared loader pool, see `run_batch`.
+    """
+    return run_batch(
+        [
+            (load_fcn, dict(dataset=ds, cfg=cfg, vc=vc, auth_cookie=auth_cookie))
+            for ds, cfg, vc in jobs
+        ],
+        default=default,
+        timeout=timeout,
+        costs=[dataset_cost(ds) for ds, cfg, vc in jobs],
+    )
 
 
 def get_data_sources(args: UrlSearchArgs):
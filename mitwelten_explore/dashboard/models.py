@@ -654,7 +654,8 @@ class ViewConfiguration:
         if self.agg:
             cfg_dict["agg"] = self.agg
         if self.normalize:
-            cfg_dict["normalize"] = True
+            # True (min-max) or the name of the scaling method
+            cfg_dict["normalize"] = self.normalize
         else:
             cfg_dict["normalize"] = False
         return cfg_dict
@@ -700,32 +701,26 @@ class UrlSearchArgs:
         )
 
 
+DATASET_CLASSES = {
+    DatasetType.meteodata: MeteoDataset,
+    DatasetType.birds: Taxon,
+    DatasetType.pax: PaxDataset,
+    DatasetType.env_humi: EnvHumiDataset,
+    DatasetType.env_moist: EnvMoistDataset,
+    DatasetType.env_temp: EnvTempDataset,
+    DatasetType.pollinators: PollinatorDataset,
+    DatasetType.gbif_observations: GBIFTaxon,
+    DatasetType.multi_pax: MultiPaxDataset,
+    DatasetType.distinct_species: BirdDataset,
+    DatasetType.location: LocationEnvironmentDataset,
+}
+
+
 def to_typed_dataset(dataset: dict):
-    dataset_type = dataset.get("type")
-    if dataset_type == DatasetType.meteodata:
-        return MeteoDataset(**dataset)
-    elif dataset_type == DatasetType.birds:
-        return Taxon(**dataset)
-    elif dataset_type == DatasetType.pax:
-        return PaxDataset(**dataset)
-    elif dataset_type == DatasetType.env_humi:
-        return EnvHumiDataset(**dataset)
-    elif dataset_type == DatasetType.env_moist:
-        return EnvMoistDataset(**dataset)
-    elif dataset_type == DatasetType.env_temp:
-        return EnvTempDataset(**dataset)
-    elif dataset_type == DatasetType.pollinators:
-        return PollinatorDataset(**dataset)
-    elif dataset_type == DatasetType.gbif_observations:
-        return GBIFTaxon(**dataset)
-    elif dataset_type == DatasetType.multi_pax:
-        return MultiPaxDataset(**dataset)
-    elif dataset_type == DatasetType.distinct_species:
-        return BirdDataset(**dataset)
-    elif dataset_type == DatasetType.location:
-        return LocationEnvironmentDataset(**dataset)
-    else:
+    dataset_class = DATASET_CLASSES.get(dataset.get("type"))
+    if dataset_class is None:
         return None
+    return dataset_class(**dataset)
 
 
 def default_view_config(dataset: dict, map_dashboard=False):
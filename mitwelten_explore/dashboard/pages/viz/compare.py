@@ -33,24 +33,32 @@ from dashboard.models import (
     Annotation,
 )
 
-from dashboard.data_handler import (
-    load_ts_data,
-    load_tod_data,
-    load_map_data,
-    load_statsagg_data,
-    get_data_sources,
-)
+from dashboard.data_handler import get_data_sources
+from dashboard.view_bundle import get_view_bundle
 from dashboard.components.cards import dataset_info_cards
+from dashboard.components.notifications import load_errors_notification
 from dashboard.charts.time_series_charts import (
     generate_multi_ts_figure,
     generate_multi_time_of_day_scatter,
     empty_figure,
+    ts_chart_view,
+    ts_chart_patchable,
+    multi_ts_traces_count,
+    multi_ts_xaxes,
+    multi_tod_traces_count,
+    MULTI_TS_TRACE_STYLES,
+    TOD_TRACE_STYLES,
 )
+from dashboard.charts.figure_patches import only_triggered_by, figure_patch
 from dashboard.charts.map_charts import (
     generate_empty_map,
     generate_multi_scatter_map_plot,
 )
-from dashboard.charts.analytic_charts import correlation_matrix_heatmap, fft_multi
+from dashboard.charts.analytic_charts import (
+    correlation_matrix_heatmap,
+    lagged_correlation_heatmap,
+    fft_multi,
+)
 from dashboard.components.chart_configuration import (
     timeseries_chart_config_menu,
     reload_control,
@@ -58,7 +66,14 @@ from dashboard.components.chart_configuration import (
 from dashboard.components.affix import affix_menu, affix_button, datasource_affix
 from dashboard.components.tables import statsagg_table
 from dashboard.components.overlays import chart_loading_overlay, datasource_indicator
-from dashboard.utils.ts import correlation_matrix, compute_fft, create_fft_bins
+from dashboard.utils.ts import (
+    correlation_matrix,
+    correlation_stats,
+    lagged_correlation_stats,
+    fft_spectrum,
+    encode_ts,
+    decode_ts,
+)
 from dashboard.styles import MULTI_VIZ_COLORSCALE, icons
 
 
@@ -89,6 +104,7 @@ class PageIds(object):
     main_chart_type = str(uuid4())
     main_chart_sync = str(uuid4())
     main_chart_layout_type = str(uuid4())
+    main_chart_view = str(uuid4())
     stats_card = str(uuid4())
     tod_chart = str(uuid4())
     tod_chart_type = str(uuid4())
@@ -98,7 +114,12 @@ class PageIds(object):
     affix_annotate = str(uuid4())
     share_modal_div = str(uuid4())
     corr_matrix_card = str(uuid4())
+    corr_matrix_chart = str(uuid4())
+    lagged_corr_card = str(uuid4())
+    lagged_corr_chart = str(uuid4())
     fft_card = str(uuid4())
+    fft_chart = str(uuid4())
+    fft_method = str(uuid4())
     tabs = str(uuid4())
     datasource_indicator = str(uuid4())
 
@@ -196,6 +217,7 @@ def layout(**qargs):
                             chart_loading_overlay(
                                 [
                                     dcc.Store(id=ids.ts_store),
+                                    dcc.Store(id=ids.main_chart_view),
                                     dcc.Graph(
                                         figure=empty_figure(),
                                         id=ids.main_chart,
@@ -331,12 +353,57 @@ def layout(**qargs):
                                         dmc.Group(
                                             [
                                                 dmc.Card(
+                                                    dcc.Graph(
+                                                        id=ids.corr_matrix_chart,
+                                                        figure=empty_figure(),
+                                                        config=dict(
+                                                            displayModeBar=False,
+                                                        ),
+                                                    ),
                                                     id=ids.corr_matrix_card,
                                                     withBorder=False,
                                                     pl=0,
                                                     py=0,
                                                 ),
                                                 dmc.Card(
+                                                    dcc.Graph(
+                                                        id=ids.lagged_corr_chart,
+                                                        figure=empty_figure(),
+                                                        config=dict(
+                                                            displayModeBar=False,
+                                                        ),
+                                                    ),
+                                                    id=ids.lagged_corr_card,
+                                                    withBorder=False,
+                                                    pl=0,
+                                                    py=0,
+                                                ),
+                                                dmc.Card(
+                                                    [
+                                                        dmc.SegmentedControl(
+                                                            id=ids.fft_method,
+                                                            value="fft",
+                                                            data=[
+                                                                {
+                                                                    "value": "fft",
+                                                                    "label": "FFT",
+                                                                },
+                                                                {
+                                                                    "value": "lombscargle",
+                                                                    "label": "Lomb-Scargle",
+                                                                },
+                                                            ],
+                                                            size="xs",
+                                                            persistence=True,
+                                                        ),
+                                                        dcc.Graph(
+                                                            id=ids.fft_chart,
+                                                            figure=empty_figure(),
+                                                            config=dict(
+                                                                displayModeBar=False,
+                                                            ),
+                                                        ),
+                                                    ],
                                                     id=ids.fft_card,
                                                     withBorder=False,
                                                     py=0,
@@ -541,60 +608,72 @@ def update_url_location(tb, dr_trg, dr, search_args):
     return no_update
 
 
+def compare_view_bundle(search, pn):
+    # the ts, tod, stats and map stores share one view bundle per search
+    if not "viz/compare" in pn:
+        raise PreventUpdate
+    if qargs_to_dict(search).get("cfg") is None:
+        raise PreventUpdate
+    cookies = flask.request.cookies
+    return get_view_bundle(search, auth_cookie=cookies.get("auth"))
+
+
 # update ts_store
 @callback(
     Output(ids.ts_store, "data"),
+    Output("noti_container", "children", allow_duplicate=True),
     Input(ids.url, "search"),
     Input(ids.url, "pathname"),
-    State(ids.ts_store, "data"),
     prevent_initial_call=True,
 )
-def update_ts_store(search, pn, ts_data):
-    if not "viz/compare" in pn:
-        raise PreventUpdate
-    args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
-    datasets = args.datasets
-    if args.cfg is None:
-        raise PreventUpdate
-    configurations = [c.to_dict() for c in args.cfg]
-    if ts_data is None:
-        ts_data = [None for i in range(len(configurations))]
-
-    cookies = flask.request.cookies
-    auth_cookie = cookies.get("auth")
-
-    for i in range(len(datasets)):
-
-        times, values = load_ts_data(
-            dataset=datasets[i],
-            cfg=configurations[i],
-            vc=args.view_config,
-            auth_cookie=auth_cookie,
-        )
-        ts_data[i] = [times, values]
-    correlation_matrix(ts_data)
-    return ts_data
+def update_ts_store(search, pn):
+    bundle = compare_view_bundle(search, pn)
+    notification = load_errors_notification(bundle.errors)
+    return [encode_ts(times, values) for times, values in bundle.ts], (
+        notification if notification is not None else no_update
+    )
 
 
 # update main chart
 @callback(
     Output(ids.main_chart, "figure"),
+    Output(ids.main_chart_view, "data"),
     Input(ids.ts_store, "data"),
     Input(traio.ids.store(traio.aio_id), "data"),
     Input(ids.main_chart_type, "value"),
     Input(ids.main_chart_layout_type, "value"),
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
+    State(ids.main_chart_view, "data"),
 )
-def update_ts_chart(data, tr, chart_type, chart_layout, theme):
+def update_ts_chart(data, tr, chart_type, chart_layout, theme, view):
     if tr is None or data is None:
         raise PreventUpdate
-    return generate_multi_ts_figure(
-        data=data,
-        date_from=tr[0],
-        date_to=tr[1],
-        light_mode=theme,
-        chart_type=chart_type,
-        layout_type=chart_layout,
+    n_points = len(decode_ts(data[0])[0]) if len(data) > 0 else 0
+    if ts_chart_patchable(view, chart_type) and only_triggered_by(
+        traio.ids.store(traio.aio_id),
+        ids.main_chart_type,
+        ThemeSwitchAIO.ids.switch("theme"),
+    ):
+        return (
+            figure_patch(
+                theme,
+                n_traces=multi_ts_traces_count(data, chart_layout),
+                style=MULTI_TS_TRACE_STYLES.get(chart_type),
+                axes=multi_ts_xaxes(data, chart_layout),
+                time_range=tr,
+            ),
+            ts_chart_view(chart_type, n_points),
+        )
+    return (
+        generate_multi_ts_figure(
+            data=data,
+            date_from=tr[0],
+            date_to=tr[1],
+            light_mode=theme,
+            chart_type=chart_type,
+            layout_type=chart_layout,
+        ),
+        ts_chart_view(chart_type, n_points),
     )
 
 
@@ -603,32 +682,10 @@ def update_ts_chart(data, tr, chart_type, chart_layout, theme):
     Output(ids.tod_store, "data"),
     Input(ids.url, "search"),
     Input(ids.url, "pathname"),
-    State(ids.tod_store, "data"),
     prevent_initial_call=True,
 )
-def update_tod_store(search, pn, tod_data):
-    if not "viz/compare" in pn:
-        raise PreventUpdate
-    args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
-    datasets = args.datasets
-    if args.cfg is None:
-        raise PreventUpdate
-    configurations = [c.to_dict() for c in args.cfg]
-    if tod_data is None:
-        tod_data = [None for i in range(len(configurations))]
-
-    cookies = flask.request.cookies
-    auth_cookie = cookies.get("auth")
-    for i in range(len(datasets)):
-
-        times, values = load_tod_data(
-            dataset=datasets[i],
-            cfg=configurations[i],
-            vc=args.view_config,
-            auth_cookie=auth_cookie,
-        )
-        tod_data[i] = [times, values]
-    return tod_data
+def update_tod_store(search, pn):
+    return compare_view_bundle(search, pn).tod
 
 
 # update tod chart
@@ -642,6 +699,12 @@ def update_tod_store(search, pn, tod_data):
 def update_ts_chart(data, chart_layout, chart_type, theme):
     if data is None:
         raise PreventUpdate
+    if only_triggered_by(ids.tod_chart_type, ThemeSwitchAIO.ids.switch("theme")):
+        return figure_patch(
+            theme,
+            n_traces=multi_tod_traces_count(data, chart_layout),
+            style=TOD_TRACE_STYLES.get(chart_type),
+        )
     return generate_multi_time_of_day_scatter(
         data=data, light_mode=theme, layout_type=chart_layout, chart_type=chart_type
     )
@@ -655,26 +718,7 @@ def update_ts_chart(data, chart_layout, chart_type, theme):
     prevent_initial_call=True,
 )
 def update_stats_store(search, pn):
-    if not "viz/compare" in pn:
-        raise PreventUpdate
-    args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
-    datasets = args.datasets
-    if args.cfg is None:
-        raise PreventUpdate
-    configurations = [c.to_dict() for c in args.cfg]
-    stats_data = []
-    cookies = flask.request.cookies
-    auth_cookie = cookies.get("auth")
-    for i in range(len(datasets)):
-
-        stats_dict = load_statsagg_data(
-            dataset=datasets[i],
-            cfg=configurations[i],
-            vc=args.view_config,
-            auth_cookie=auth_cookie,
-        )
-        stats_data.append(stats_dict)
-    return stats_data
+    return compare_view_bundle(search, pn).stats
 
 
 # update map_store
@@ -682,33 +726,10 @@ def update_stats_store(search, pn):
     Output(ids.map_store, "data"),
     Input(ids.url, "search"),
     Input(ids.url, "pathname"),
-    State(ids.map_store, "data"),
     prevent_initial_call=True,
 )
-def update_map_store(search, pn, map_data):
-    if not "viz/compare" in pn:
-        raise PreventUpdate
-    args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
-    datasets = args.datasets
-    if args.cfg is None:
-        raise PreventUpdate
-    configurations = [c.to_dict() for c in args.cfg]
-    if map_data is None:
-        map_data = []
-    map_data = []
-
-    cookies = flask.request.cookies
-    auth_cookie = cookies.get("auth")
-    for i in range(len(datasets)):
-
-        location_data = load_map_data(
-            dataset=datasets[i],
-            cfg=configurations[i],
-            vc=args.view_config,
-            auth_cookie=auth_cookie,
-        )
-        map_data.append(location_data)
-    return map_data
+def update_map_store(search, pn):
+    return compare_view_bundle(search, pn).locations
 
 
 # update map chart
@@ -726,48 +747,64 @@ def update_ts_chart(data):
 
 # update analysis
 @callback(
-    Output(ids.corr_matrix_card, "children"),
-    Output(ids.fft_card, "children"),
+    Output(ids.corr_matrix_chart, "figure"),
+    Output(ids.lagged_corr_chart, "figure"),
+    Output(ids.fft_chart, "figure"),
     Input(ids.ts_store, "data"),
     Input(ids.url, "search"),
     Input(ids.url, "pathname"),
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
+    Input(ids.fft_method, "value"),
 )
-def update_analysis(data, search, pn, theme):
+def update_analysis(data, search, pn, theme, fft_method):
     if data is None:
         raise PreventUpdate
     if not "viz/compare" in pn or len(search) < 2:
         raise PreventUpdate
+    # the matrix and spectra only depend on the ts store, which follows the url
+    if only_triggered_by(ids.url):
+        raise PreventUpdate
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme")):
+        return figure_patch(theme), figure_patch(theme), figure_patch(theme)
     args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
 
     datasets = [to_typed_dataset(ds) for ds in args.datasets]
     labels = [d.get_title() for d in datasets]
-    matrix = correlation_matrix(data)
+    # one hash and alignment of the store for the matrix and its p-values
+    corr = correlation_stats(data)
+    matrix = correlation_matrix(data, stats=corr)
     ffts = []
     t0 = time.time()
     values = []
     seconds = []
     for d in data:
-        if len(d[1]) > 24 and len(d[0]) > 24:
+        times, amplitude = decode_ts(d)
+        if len(amplitude) > 24 and len(times) > 24:
             try:
-                fft, periods = compute_fft(amplitude=d[1], times=d[0])
-                values, seconds = create_fft_bins(fft, periods)
+                values, seconds = fft_spectrum(times, amplitude, method=fft_method)
                 ffts.append([seconds, values])
             except:
                 ffts.append([[0], [None]])
 
         else:
             ffts.append([[0], [None]])
-    return dcc.Graph(
-        figure=correlation_matrix_heatmap(matrix, labels, light_mode=theme),
-        config=dict(
-            displayModeBar=False,
-        ),
-    ), dcc.Graph(
-        figure=fft_multi(ffts, dataset_names=labels, light_mode=theme),
-        config=dict(
-            displayModeBar=False,
+    fft_figure = fft_multi(ffts, dataset_names=labels, light_mode=theme)
+    # switching the spectrum method leaves the correlation matrices as they are
+    if only_triggered_by(ids.fft_method):
+        return no_update, no_update, fft_figure
+    lagged_corr = lagged_correlation_stats(data)
+    return (
+        correlation_matrix_heatmap(
+            matrix,
+            labels,
+            light_mode=theme,
+            pvalues=corr["p"] if corr is not None else None,
+            overlap=corr["n"] if corr is not None else None,
         ),
+        lagged_correlation_heatmap(lagged_corr, labels, light_mode=theme)
+        if lagged_corr is not None
+        else empty_figure(),
+        fft_figure,
     )
 
 
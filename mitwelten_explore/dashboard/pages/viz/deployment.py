@@ -43,6 +43,7 @@ from dashboard.charts.map_charts import (
     deployment_location_map,
 )
 from dashboard.charts.time_series_charts import data_collection_bar_chart
+from dashboard.charts.figure_patches import only_triggered_by, theme_patch
 from dashboard.data_handler import get_locations_from_qargs, get_data_sources
 from dashboard.utils.communication import (
     parse_nested_qargs,
@@ -501,6 +502,8 @@ def update_select_modal(is_open, data):
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
 )
 def update_list(href, search, theme):
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme")):
+        return no_update, theme_patch(theme), no_update
 
     query_args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
     if (
@@ -548,6 +551,9 @@ def update_list(href, search, theme):
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
 )
 def update_map_plot(search_args, theme):
+    # the location map does not follow the theme
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme")):
+        return no_update, theme_patch(theme)
     if search_args is not None:
         query_args = parse_nested_qargs(qargs_to_dict(search_args))
         if query_args.get("dataset") is None:
@@ -605,6 +611,8 @@ def update_map_plot(search_args, theme):
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
 )
 def update_bar_chart(search, href, theme):
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme")):
+        return theme_patch(theme), no_update
     if search is not None:
         query_args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
         if query_args.dataset is None:
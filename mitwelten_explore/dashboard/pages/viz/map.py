@@ -20,7 +20,8 @@ from dashboard.common_callbacks import share_modal_callback, publish_annotation_
 from dashboard.components.affix import affix_menu, affix_button, datasource_affix
 from dashboard.components.overlays import datasource_indicator
 from dashboard.components.cards import dataset_info_card
-from dashboard.data_handler import load_map_data, get_data_sources
+from dashboard.components.notifications import load_errors_notification
+from dashboard.data_handler import load_map_data, load_batch, get_data_sources
 from dashboard.models import (
     UrlSearchArgs,
     to_typed_dataset,
@@ -55,7 +56,7 @@ from dashboard.styles import (
 from uuid import uuid4
 import json
 import datetime
-from configuration import PATH_PREFIX, DEFAULT_TR_START
+from configuration import PATH_PREFIX, DEFAULT_TR_START, MAP_CLIENTSIDE_HEXBINS
 
 
 class PageIds(object):
@@ -152,6 +153,7 @@ multihexmap = H3HexBinMapMultiAIO(
         responsive=True,
         style=dict(height="85vh"),
     ),
+    clientside=MAP_CLIENTSIDE_HEXBINS,
 )
 affix = affix_menu(
     [
@@ -545,9 +547,65 @@ def set_scatter_config(checked, range0, range1, type, base_layer, overlay_layer)
         }
 
 
+def load_locationdata(dataset, cfg, vc, auth_cookie=None):
+    ds = to_typed_dataset(dataset)
+    if ds.type == DatasetType.birds:
+        locations = get_detection_locations(
+            taxon_id=ds.datum_id,
+            confidence=cfg.confidence,
+            time_from=vc.time_from,
+            time_to=vc.time_to,
+        )
+        ds_location = resp_to_locationdata(locations, name=ds.get_title())
+        if int(ds.datum_id) in POLLINATOR_IDS:
+            locations_polli = get_polli_detection_locations_by_id(
+                taxon_id=ds.datum_id,
+                deployment_ids=None,
+                confidence=cfg.confidence,
+                time_from=vc.time_from,
+                time_to=vc.time_to,
+            )
+            if locations_polli is not None:
+                add_datapoints_to_locationdata(ds_location, locations_polli)
+        return ds_location
+    elif ds.type == DatasetType.multi_pax:
+        pax_locations = get_pax_locations(
+            deployment_id=ds.deployment_id,
+            time_from=vc.time_from,
+            time_to=vc.time_to,
+        )
+        if pax_locations is not None:
+            return resp_to_locationdata(pax_locations, ds.get_title())
+    elif ds.type == DatasetType.location:
+        env_locations = get_environment_attribute(attribute_id=ds.attribute)
+        env_locations = [e for e in env_locations if e.get("value") > 0]
+        if env_locations is not None:
+            return resp_to_locationdata(env_locations, ds.get_title(), agg_fcn=cfg.agg)
+    elif ds.type == DatasetType.gbif_observations:
+        gbif_locations = get_gbif_detection_locations(
+            taxon_id=ds.datum_id,
+            time_from=vc.time_from,
+            time_to=vc.time_to,
+        )
+        if gbif_locations is not None:
+            return resp_to_locationdata(gbif_locations, ds.get_title())
+    elif ds.type == DatasetType.distinct_species:
+        locations = get_detection_locations(
+            taxon_id=212,
+            confidence=cfg.confidence,
+            time_from=vc.time_from,
+            time_to=vc.time_to,
+            distinctspecies=True,
+            deployment_ids=ds.deployment_id,
+        )
+        return resp_to_locationdata(locations, name=ds.get_title(), agg_fcn=cfg.agg)
+    return LocationData()
+
+
 # load map data
 @callback(
     Output(multihexmap.ids.store(multihexmap.aio_id), "data", allow_duplicate=True),
+    Output("noti_container", "children", allow_duplicate=True),
     Input(ids.url, "search"),
     Input(ids.url, "pathname"),
     prevent_initial_call=True,
@@ -559,74 +617,20 @@ def update_map_store(search, pn):
     datasets = args.datasets
     if args.cfg is None:
         raise PreventUpdate
-    # load dataset0
-    locationdata = []
-    for i in range(len(datasets)):
+    locationdata, errors = load_batch(
+        load_locationdata,
+        [(ds, cfg, args.view_config) for ds, cfg in zip(datasets, args.cfg)],
+        default=LocationData(),
+    )
+    failed = []
+    for i, e in errors:
         ds = to_typed_dataset(datasets[i])
-        if ds.type == DatasetType.birds:
-            locations = get_detection_locations(
-                taxon_id=ds.datum_id,
-                confidence=args.cfg[i].confidence,
-                time_from=args.view_config.time_from,
-                time_to=args.view_config.time_to,
-            )
-            ds_location = resp_to_locationdata(locations, name=ds.get_title())
-            if int(ds.datum_id) in POLLINATOR_IDS:
-                locations_polli = get_polli_detection_locations_by_id(
-                    taxon_id=ds.datum_id,
-                    deployment_ids=None,
-                    confidence=args.cfg[i].confidence,
-                    time_from=args.view_config.time_from,
-                    time_to=args.view_config.time_to,
-                )
-                if locations_polli is not None:
-                    add_datapoints_to_locationdata(ds_location, locations_polli)
-            locationdata.append(ds_location)
-        elif ds.type == DatasetType.multi_pax:
-            pax_locations = get_pax_locations(
-                deployment_id=ds.deployment_id,
-                time_from=args.view_config.time_from,
-                time_to=args.view_config.time_to,
-            )
-            if pax_locations is not None:
-
-                locationdata.append(resp_to_locationdata(pax_locations, ds.get_title()))
-        elif ds.type == DatasetType.location:
-            env_locations = get_environment_attribute(attribute_id=ds.attribute)
-            env_locations = [e for e in env_locations if e.get("value") > 0]
-            if env_locations is not None:
-                locationdata.append(
-                    resp_to_locationdata(
-                        env_locations, ds.get_title(), agg_fcn=args.cfg[i].agg
-                    )
-                )
-        elif ds.type == DatasetType.gbif_observations:
-            gbif_locations = get_gbif_detection_locations(
-                taxon_id=ds.datum_id,
-                time_from=args.view_config.time_from,
-                time_to=args.view_config.time_to,
-            )
-            if gbif_locations is not None:
-
-                locationdata.append(
-                    resp_to_locationdata(gbif_locations, ds.get_title())
-                )
-        elif ds.type == DatasetType.distinct_species:
-            locations = get_detection_locations(
-                taxon_id=212,
-                confidence=args.cfg[i].confidence,
-                time_from=args.view_config.time_from,
-                time_to=args.view_config.time_to,
-                distinctspecies=True,
-                deployment_ids=ds.deployment_id,
-            )
-            ds_location = resp_to_locationdata(
-                locations, name=ds.get_title(), agg_fcn=args.cfg[i].agg
-            )
-            locationdata.append(ds_location)
-        else:
-            locationdata.append(LocationData())
-    return [l.to_dict() for l in locationdata]
+        title = ds.get_title() if ds is not None else datasets[i].get("type")
+        failed.append((title, e))
+    notification = load_errors_notification(failed)
+    return [l.to_dict() for l in locationdata], (
+        notification if notification is not None else no_update
+    )
 
 
 # update dataset cards
@@ -43,14 +43,19 @@ from dashboard.utils.communication import (
     urlencode_dict,
     get_user_from_cookies,
 )
-from dashboard.utils.ts import merge_detections_dicts
+from dashboard.utils.ts import merge_detections
 from dashboard.utils.geo_utils import validate_coordinates
 from dashboard.charts.time_series_charts import (
     generate_ts_figure,
     no_data_figure,
     generate_time_of_day_scatter,
     empty_figure,
+    ts_chart_view,
+    ts_chart_patchable,
+    TS_TRACE_STYLES,
+    TOD_TRACE_STYLES,
 )
+from dashboard.charts.figure_patches import only_triggered_by, figure_patch
 from dashboard.components.chart_configuration import (
     timeseries_chart_config_menu,
     reload_control,
@@ -78,6 +83,7 @@ class PageIds(object):
     time_bucket_indicator = str(uuid4())
     time_series_chart = str(uuid4())
     time_series_chart_type = str(uuid4())
+    time_series_chart_view = str(uuid4())
     time_series_chart_reload = str(uuid4())
     time_of_day_chart = str(uuid4())
     tod_bucket_indicator = str(uuid4())
@@ -224,12 +230,17 @@ def layout(taxon_id=None, **qargs):
                                     ),
                                     dmc.CardSection(
                                         chart_loading_overlay(
-                                            dcc.Graph(
-                                                figure=no_data_figure(annotation=None),
-                                                id=ids.time_series_chart,
-                                                style={"height": "30vh"},
-                                                config=dict(displayModeBar=False),
-                                            ),
+                                            [
+                                                dcc.Store(ids.time_series_chart_view),
+                                                dcc.Graph(
+                                                    figure=no_data_figure(
+                                                        annotation=None
+                                                    ),
+                                                    id=ids.time_series_chart,
+                                                    style={"height": "30vh"},
+                                                    config=dict(displayModeBar=False),
+                                                ),
+                                            ],
                                             position="right",
                                         ),
                                     ),
@@ -440,50 +451,66 @@ def update_title(pn):
 @callback(
     Output(ids.time_series_chart, "figure"),
     Output(ids.time_bucket_indicator, "children"),
+    Output(ids.time_series_chart_view, "data"),
     Input(ids.url, "pathname"),
     Input(ids.url, "search"),
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
     Input(ids.time_series_chart_type, "value"),
+    State(ids.time_series_chart_view, "data"),
     prevent_initial_call=True,
 )
-def update_ts_chart(pn, search, theme, chart_type):
+def update_ts_chart(pn, search, theme, chart_type, view):
     if pn is not None and "viz/taxon" in pn:
+        if ts_chart_patchable(view, chart_type) and only_triggered_by(
+            ThemeSwitchAIO.ids.switch("theme"), ids.time_series_chart_type
+        ):
+            return (
+                figure_patch(theme, n_traces=1, style=TS_TRACE_STYLES.get(chart_type)),
+                no_update,
+                ts_chart_view(chart_type, view["n_points"]),
+            )
         query_args = parse_nested_qargs(qargs_to_dict(search))
         args = UrlSearchArgs(**query_args)
         vc = args.view_config
         taxon_id = pn.split("/")[-1]
-        det_dates = None
+        sources = []
         if args.mw_data:
-            det_dates = get_detection_dates(
-                taxon_id=taxon_id,
-                confidence=vc.confidence,
-                bucket_width=vc.bucket,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            if int(taxon_id) in POLLINATOR_IDS:
-                det_dates_polli = get_polli_detection_dates_by_id(
+            sources.append(
+                get_detection_dates(
                     taxon_id=taxon_id,
-                    deployment_ids=None,
                     confidence=vc.confidence,
                     bucket_width=vc.bucket,
                     time_from=vc.time_from,
                     time_to=vc.time_to,
                 )
-                det_dates = merge_detections_dicts(det_dates, det_dates_polli)
+            )
+            if int(taxon_id) in POLLINATOR_IDS:
+                sources.append(
+                    get_polli_detection_dates_by_id(
+                        taxon_id=taxon_id,
+                        deployment_ids=None,
+                        confidence=vc.confidence,
+                        bucket_width=vc.bucket,
+                        time_from=vc.time_from,
+                        time_to=vc.time_to,
+                    )
+                )
         if args.gbif_data:
-            gbif_det_dates = get_gbif_detection_dates(
-                taxon_id=taxon_id,
-                bucket_width=vc.bucket,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
+            sources.append(
+                get_gbif_detection_dates(
+                    taxon_id=taxon_id,
+                    bucket_width=vc.bucket,
+                    time_from=vc.time_from,
+                    time_to=vc.time_to,
+                )
             )
-            det_dates = merge_detections_dicts(det_dates, gbif_det_dates)
+        det_dates = merge_detections(sources)
 
         if det_dates is not None:
+            times = det_dates.get("bucket")
             return (
                 generate_ts_figure(
-                    times=det_dates.get("bucket"),
+                    times=times,
                     values=det_dates.get("detections"),
                     date_from=vc.time_from,
                     date_to=vc.time_to,
@@ -492,6 +519,7 @@ def update_ts_chart(pn, search, theme, chart_type):
                     light_mode=theme,
                 ),
                 f"bucket: {vc.bucket}",
+                ts_chart_view(chart_type, len(times) if times is not None else 0),
             )
         return (
             generate_ts_figure(
@@ -504,6 +532,7 @@ def update_ts_chart(pn, search, theme, chart_type):
                 light_mode=theme,
             ),
             f"bucket: {vc.bucket}",
+            ts_chart_view(chart_type, 0),
         )
     raise PreventUpdate
 
@@ -597,47 +626,49 @@ def update_map_stats(conf, time_range, pn, search):
 )
 def update_time_of_day_chart(pn, search, chart_type, theme):
     if pn is not None and "viz/taxon" in pn:
+        if only_triggered_by(ids.tod_chart_type, ThemeSwitchAIO.ids.switch("theme")):
+            return (
+                figure_patch(theme, n_traces=1, style=TOD_TRACE_STYLES.get(chart_type)),
+                no_update,
+            )
         taxon_id = pn.split("/")[-1]
         query_args = parse_nested_qargs(qargs_to_dict(search))
         args = UrlSearchArgs(**query_args)
         vc = args.view_config
-        tod_res = None
+        sources = []
         if args.mw_data:
-            tod_res = get_detection_time_of_day(
-                taxon_id=taxon_id,
-                confidence=vc.confidence,
-                bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            if int(taxon_id) in POLLINATOR_IDS:
-                tod_res_polli = get_polli_detection_tod_by_id(
+            sources.append(
+                get_detection_time_of_day(
                     taxon_id=taxon_id,
-                    deployment_ids=None,
                     confidence=vc.confidence,
                     bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
                     time_from=vc.time_from,
                     time_to=vc.time_to,
                 )
-                tod_res = merge_detections_dicts(
-                    tod_res,
-                    tod_res_polli,
-                    time_key="minuteOfDay",
-                    value_key="detections",
+            )
+            if int(taxon_id) in POLLINATOR_IDS:
+                sources.append(
+                    get_polli_detection_tod_by_id(
+                        taxon_id=taxon_id,
+                        deployment_ids=None,
+                        confidence=vc.confidence,
+                        bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
+                        time_from=vc.time_from,
+                        time_to=vc.time_to,
+                    )
                 )
         if args.gbif_data:
-            gbif_tod_res = get_gbif_detection_time_of_day(
-                taxon_id=taxon_id,
-                bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
-                time_from=vc.time_from,
-                time_to=vc.time_to,
-            )
-            tod_res = merge_detections_dicts(
-                tod_res,
-                gbif_tod_res,
-                time_key="minuteOfDay",
-                value_key="detections",
+            sources.append(
+                get_gbif_detection_time_of_day(
+                    taxon_id=taxon_id,
+                    bucket_width_m=DEFAULT_TOD_BUCKET_WIDTH,
+                    time_from=vc.time_from,
+                    time_to=vc.time_to,
+                )
             )
+        tod_res = merge_detections(
+            sources, time_key="minuteOfDay", value_key="detections"
+        )
         if tod_res is not None:
             return (
                 generate_time_of_day_scatter(
@@ -27,13 +27,8 @@ from dashboard.components.selects import (
     time_bucket_select,
 )
 from dashboard.components.tables import statsagg_table
-from dashboard.data_handler import (
-    get_time_series_from_query_args,
-    get_time_of_day_from_qargs,
-    get_locations_from_qargs,
-    get_statsagg_from_qargs,
-    get_data_sources,
-)
+from dashboard.data_handler import get_data_sources
+from dashboard.view_bundle import get_view_bundle
 from dashboard.components.chart_configuration import (
     timeseries_chart_config_menu,
     reload_control,
@@ -41,7 +36,10 @@ from dashboard.components.chart_configuration import (
 from dashboard.components.affix import affix_menu, affix_button, datasource_affix
 from dashboard.components.dataset_presentation import dataset_title
 from dashboard.components.navbar import ThemeSwitchAIO
-from dashboard.components.notifications import generate_notification
+from dashboard.components.notifications import (
+    generate_notification,
+    load_errors_notification,
+)
 from dashboard.components.overlays import chart_loading_overlay, datasource_indicator
 from dashboard.styles import icons
 from configuration import PATH_PREFIX, DEFAULT_CONFIDENCE, DEFAULT_TR_START
@@ -49,11 +47,20 @@ from dashboard.charts.time_series_charts import (
     generate_ts_figure,
     generate_time_of_day_scatter,
     empty_figure,
+    ts_chart_view,
+    ts_chart_patchable,
+    TS_TRACE_STYLES,
+    TOD_TRACE_STYLES,
+)
+from dashboard.charts.figure_patches import (
+    only_triggered_by,
+    figure_patch,
+    theme_patch,
 )
 from dashboard.charts.map_charts import generate_scatter_map_plot
 from dashboard.charts.analytic_charts import fft_single
 from dashboard.models import UrlSearchArgs, DatasetType, Annotation, to_typed_dataset
-from dashboard.utils.ts import compute_fft, create_fft_bins
+from dashboard.utils.ts import fft_spectrum
 
 from uuid import uuid4
 
@@ -74,6 +81,7 @@ class PageIds(object):
     share_modal_div = str(uuid4())
     main_chart = str(uuid4())
     main_chart_type = str(uuid4())
+    main_chart_view = str(uuid4())
     main_chart_sync = str(uuid4())
     statsagg_card = str(uuid4())
     tod_chart = str(uuid4())
@@ -204,6 +212,7 @@ def layout(**qargs):
                     chart_loading_overlay(
                         [
                             dcc.Store(ids.store_ts_data),
+                            dcc.Store(ids.main_chart_view),
                             dcc.Graph(
                                 id=ids.main_chart,
                                 figure=empty_figure(),
@@ -497,7 +506,9 @@ def update_title(search_args):
 # update local trace store
 @callback(
     Output(ids.store_ts_data, "data"),
+    Output("noti_container", "children", allow_duplicate=True),
     Input(ids.url, "search"),
+    prevent_initial_call="initial_duplicate",
 )
 def update_time_series_store(search_args):
     query_args = parse_nested_qargs(qargs_to_dict(search_args))
@@ -509,8 +520,12 @@ def update_time_series_store(search_args):
     auth_cookie = cookies.get("auth")
     if auth_cookie is None:
         raise PreventUpdate
-    times, values = get_time_series_from_query_args(query_args, auth_cookie)
-    return {"times": times, "values": values}
+    bundle = get_view_bundle(search_args, auth_cookie)
+    times, values = bundle.ts[0]
+    notification = load_errors_notification(bundle.errors)
+    return {"times": times, "values": values}, (
+        notification if notification is not None else no_update
+    )
 
 
 # update time of day store
@@ -529,7 +544,7 @@ def update_tod_store(search_args):
     auth_cookie = cookies.get("auth")
     if auth_cookie is None:
         raise PreventUpdate
-    minutes_of_day, values = get_time_of_day_from_qargs(query_args, auth_cookie)
+    minutes_of_day, values = get_view_bundle(search_args, auth_cookie).tod[0]
     return {"minutes_of_day": minutes_of_day, "values": values}
 
 
@@ -549,20 +564,22 @@ def update_statsagg_store(search_args):
     auth_cookie = cookies.get("auth")
     if auth_cookie is None:
         raise PreventUpdate
-    statsagg = get_statsagg_from_qargs(query_args, auth_cookie)
+    statsagg = get_view_bundle(search_args, auth_cookie).stats[0]
     return statsagg
 
 
 # update main chart
 @callback(
     Output(ids.main_chart, "figure"),
+    Output(ids.main_chart_view, "data"),
     Input(ids.url, "search"),  # state --> duplicated execution?
     Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
     Input(ids.main_chart_type, "value"),
     # Input(ids.store_ts_data, "modified_timestamp"),
     Input(ids.store_ts_data, "data"),
+    State(ids.main_chart_view, "data"),
 )
-def update_time_series_chart(search_args, theme, chart_type, data):
+def update_time_series_chart(search_args, theme, chart_type, data, view):
     query_args = parse_nested_qargs(qargs_to_dict(search_args))
     if query_args.get("trace") is None or data is None:
         raise PreventUpdate
@@ -573,14 +590,31 @@ def update_time_series_chart(search_args, theme, chart_type, data):
     values = data.get("values", [])
     time_from = query_args.get("from")
     time_to = query_args.get("to")
-    return generate_ts_figure(
-        times,
-        values,
-        time_from,
-        time_to,
-        theme,
-        marker_color="#15AABF",
-        chart_type=chart_type,
+    # the search holds the time range, the data store updates after it
+    if ts_chart_patchable(view, chart_type) and only_triggered_by(
+        ids.url, ThemeSwitchAIO.ids.switch("theme"), ids.main_chart_type
+    ):
+        return (
+            figure_patch(
+                theme,
+                n_traces=1,
+                style=TS_TRACE_STYLES.get(chart_type),
+                axes=["xaxis"],
+                time_range=[time_from, time_to],
+            ),
+            ts_chart_view(chart_type, len(times)),
+        )
+    return (
+        generate_ts_figure(
+            times,
+            values,
+            time_from,
+            time_to,
+            theme,
+            marker_color="#15AABF",
+            chart_type=chart_type,
+        ),
+        ts_chart_view(chart_type, len(times)),
     )
 
 
@@ -595,6 +629,8 @@ def update_time_series_chart(search_args, theme, chart_type, data):
 def update_time_series_chart(theme, ts, data, chart_type):
     if data is None:
         raise PreventUpdate
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme"), ids.tod_chart_type):
+        return figure_patch(theme, n_traces=1, style=TOD_TRACE_STYLES.get(chart_type))
 
     minutes_of_day = data.get("minutes_of_day", [])
     values = data.get("values", [])
@@ -634,7 +670,8 @@ def update_map_plot(search_args, tab):
         query_args = parse_nested_qargs(qargs_to_dict(search_args))
         if query_args.get("trace") is None:
             raise PreventUpdate
-        location_info = get_locations_from_qargs(query_args)
+        cookies = flask.request.cookies
+        location_info = get_view_bundle(search_args, cookies.get("auth")).locations[0]
         return generate_scatter_map_plot(
             location_info.get("latitude"),
             location_info.get("longitude"),
@@ -656,12 +693,16 @@ def update_map_plot(search_args, tab):
 def update_fft(search, theme, data, tab):
     if data is None or "fft" not in tab:
         raise PreventUpdate
+    # the spectrum only depends on the data store, which follows the search
+    if only_triggered_by(ids.url):
+        raise PreventUpdate
+    if only_triggered_by(ThemeSwitchAIO.ids.switch("theme")):
+        return theme_patch(theme)
     times = data.get("times")
     values = data.get("values")
     if isinstance(times, list) and isinstance(values, list):
         try:
-            amplitude, periods = compute_fft(amplitude=values, times=times)
-            binned_amplitude, seconds = create_fft_bins(amplitude, periods)
+            binned_amplitude, seconds = fft_spectrum(times, values)
             return fft_single(
                 amplitude=binned_amplitude, periods_s=seconds, light_mode=theme
             )
@@ -0,0 +1,251 @@
+import copy
+import datetime
+import numpy as np
+
+from dashboard.models import ViewConfiguration
+from dashboard.utils.cache import MemoryCache
+from dashboard.utils.communication import (
+    BUCKET_ORIGIN,
+    parse_bucket_width,
+    snap_time,
+    to_utc_naive,
+    trim_buckets,
+)
+from dashboard.utils.ts import parse_times, to_json_list
+from configuration import (
+    SERIES_TILE_CACHE_SIZE,
+    SERIES_TILE_TTL_S,
+    SERIES_OPEN_TILE_TTL_S,
+)
+
+tile_cache = MemoryCache(maxsize=SERIES_TILE_CACHE_SIZE)
+
+# widths of the bucket select, finest first
+BUCKET_WIDTHS = [
+    "10min",
+    "30min",
+    "1h",
+    "2h",
+    "3h",
+    "6h",
+    "12h",
+    "1d",
+    "2d",
+    "1w",
+    "4w",
+]
+
+
+def tile_start(t: datetime.datetime, yearly: bool):
+    if yearly:
+        return datetime.datetime(t.year, 1, 1)
+    return datetime.datetime(t.year, t.month, 1)
+
+
+def next_tile(start: datetime.datetime, yearly: bool):
+    if yearly:
+        return datetime.datetime(start.year + 1, 1, 1)
+    if start.month == 12:
+        return datetime.datetime(start.year + 1, 1, 1)
+    return datetime.datetime(start.year, start.month + 1, 1)
+
+
+def tile_starts(time_from, time_to, yearly: bool):
+    starts = [tile_start(time_from, yearly)]
+    while next_tile(starts[-1], yearly) < time_to:
+        starts.append(next_tile(starts[-1], yearly))
+    return starts
+
+
+def window_config(vc: ViewConfiguration, time_from, time_to, bucket=None):
+    window = copy.copy(vc)
+    window.time_from = time_from
+    window.time_to = time_to
+    if bucket is not None:
+        window.bucket = bucket
+    return window
+
+
+def is_yearly(width: datetime.timedelta):
+    return width >= datetime.timedelta(days=1)
+
+
+def split_tiles(res, time_key, value_key, starts, yearly, width):
+    """Split a ts response covering consecutive tiles into one response per tile.
+
+    Buckets overlapping two tiles are kept in both, see `assemble_tiles`.
+    """
+    times = res.get(time_key) or []
+    values = res.get(value_key) or []
+    bucket_starts = parse_times(times)
+    bucket_ends = bucket_starts + np.timedelta64(int(width.total_seconds()), "s")
+    tiles = []
+    for start in starts:
+        mask = (bucket_ends > np.datetime64(start)) & (
+            bucket_starts < np.datetime64(next_tile(start, yearly))
+        )
+        indices = np.flatnonzero(mask)
+        tiles.append(
+            {
+                time_key: [times[i] for i in indices],
+                value_key: [values[i] for i in indices],
+            }
+        )
+    return tiles
+
+
+def assemble_tiles(tiles, time_key, value_key):
+    times = []
+    values = []
+    for tile in tiles:
+        times += tile[time_key]
+        values += tile[value_key]
+    # drop the second copy of buckets overlapping two tiles
+    _, first = np.unique(parse_times(times), return_index=True)
+    if len(first) < len(times):
+        times = [times[i] for i in first]
+        values = [values[i] for i in first]
+    return {time_key: times, value_key: values}
+
+
+def cached_series(loader, ds, cfg, vc: ViewConfiguration, time_from, time_to):
+    """The ts response for a window if all its tiles are cached, else None."""
+    width = parse_bucket_width(vc.bucket)
+    yearly = is_yearly(width)
+    tiles = []
+    for start in tile_starts(time_from, time_to, yearly):
+        window = window_config(vc, start, next_tile(start, yearly))
+        found, tile = tile_cache.get(loader.cache_key("ts", ds, cfg, window))
+        if not found:
+            return None
+        tiles.append(tile)
+    time_key, value_key = loader.ts_keys
+    res = assemble_tiles(tiles, time_key, value_key)
+    return trim_buckets(res, time_key, time_from, time_to, vc.bucket)
+
+
+def rollup_series(res, time_key, value_key, width: datetime.timedelta, how):
+    """Aggregate a series into the coarser buckets of `width` with "sum", "min"
+    or "max". The buckets of the series have to nest in the coarser ones."""
+    times = res.get(time_key) or []
+    if len(times) == 0:
+        return {time_key: [], value_key: []}
+    raw_values = res.get(value_key) or []
+    values = np.array([v if v is not None else np.nan for v in raw_values], dtype=float)
+    starts = parse_times(times)
+    order = np.argsort(starts, kind="stable")
+    starts, values = starts[order], values[order]
+
+    step = np.timedelta64(int(width.total_seconds()), "s")
+    origin = np.datetime64(BUCKET_ORIGIN, "s")
+    buckets = (starts - origin) // step
+    first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if how == "sum":
+        aggregated = np.add.reduceat(np.nan_to_num(values), first)
+    elif how == "min":
+        aggregated = np.fmin.reduceat(values, first)
+    else:
+        aggregated = np.fmax.reduceat(values, first)
+
+    bucket_times = np.datetime_as_string(origin + buckets[first] * step, unit="s")
+    if datetime.datetime.fromisoformat(times[0]).tzinfo is not None:
+        bucket_times = np.char.add(bucket_times, "+00:00")
+    if all(isinstance(v, int) for v in raw_values):
+        aggregated_values = aggregated.astype(np.int64).tolist()
+    else:
+        aggregated_values = to_json_list(aggregated)
+    return {time_key: bucket_times.tolist(), value_key: aggregated_values}
+
+
+def rollup_from_cache(loader, ds, cfg, vc: ViewConfiguration, time_from, time_to):
+    """The ts response for a window aggregated from a cached finer bucket width,
+    None if the loader can not be rolled up exactly or nothing finer is cached."""
+    how = loader.rollup(cfg) if loader.rollup is not None else None
+    if how is None:
+        return None
+    width = parse_bucket_width(vc.bucket)
+    # whole coarse buckets, the response is trimmed again by the caller
+    window_from = snap_time(time_from, width)
+    window_to = snap_time(time_to, width, up=True)
+    for bucket in reversed(BUCKET_WIDTHS):
+        fine_width = parse_bucket_width(bucket)
+        if fine_width >= width or width % fine_width:
+            continue
+        fine_vc = window_config(vc, window_from, window_to, bucket=bucket)
+        res = cached_series(loader, ds, cfg, fine_vc, window_from, window_to)
+        if res is not None:
+            time_key, value_key = loader.ts_keys
+            return rollup_series(res, time_key, value_key, width, how)
+    return None
+
+
+def fetch_tiled(
+    loader, ds, cfg: ViewConfiguration, vc: ViewConfiguration, auth_cookie=None
+):
+    """The ts response of a loader for the window of `vc`, assembled from month
+    (sub daily buckets) or year tiles.
+
+    Tiles are cached per dataset, configuration and bucket width. Missing tiles
+    are rolled up from cached finer buckets if possible (`rollup_from_cache`),
+    else fetched with one request per run of consecutive tiles. A window covered
+    by cached tiles does not hit the network. Open windows and private loaders
+    are fetched as they are. The first and last bucket are whole buckets, see
+    `canonical_time_window`.
+    """
+    width = parse_bucket_width(vc.bucket)
+    if width is None or vc.time_from is None or vc.time_to is None or loader.private:
+        return loader.fetch("ts", ds, cfg, vc, auth_cookie)
+    time_from = to_utc_naive(vc.time_from)
+    time_to = to_utc_naive(vc.time_to)
+    if time_from >= time_to:
+        return loader.fetch("ts", ds, cfg, vc, auth_cookie)
+    yearly = is_yearly(width)
+    time_key, value_key = loader.ts_keys
+
+    tiles = {}
+    missing = []
+    for start in tile_starts(time_from, time_to, yearly):
+        key = loader.cache_key(
+            "ts", ds, cfg, window_config(vc, start, next_tile(start, yearly))
+        )
+        found, tile = tile_cache.get(key)
+        if found:
+            tiles[start] = tile
+        else:
+            missing.append((start, key))
+
+    if missing:
+        # a finer series covering just the window is enough, but not whole tiles
+        res = rollup_from_cache(loader, ds, cfg, vc, time_from, time_to)
+        if res is not None:
+            return trim_buckets(res, time_key, time_from, time_to, vc.bucket)
+
+    runs = []
+    for start, key in missing:
+        if runs and next_tile(runs[-1][-1][0], yearly) == start:
+            runs[-1].append((start, key))
+        else:
+            runs.append([(start, key)])
+    now = datetime.datetime.utcnow()
+    for run in runs:
+        starts = [start for start, _ in run]
+        run_to = next_tile(starts[-1], yearly)
+        res = rollup_from_cache(loader, ds, cfg, vc, starts[0], run_to)
+        if res is None:
+            res = loader.fetch(
+                "ts", ds, cfg, window_config(vc, starts[0], run_to), auth_cookie
+            )
+        if not isinstance(res, dict):
+            # nothing is cached for failed requests
+            return res
+        for (start, key), tile in zip(
+            run, split_tiles(res, time_key, value_key, starts, yearly, width)
+        ):
+            closed = next_tile(start, yearly) < now
+            tile_cache.set(
+                key, tile, ttl=SERIES_TILE_TTL_S if closed else SERIES_OPEN_TILE_TTL_S
+            )
+            tiles[start] = tile
+
+    res = assemble_tiles([tiles[s] for s in sorted(tiles)], time_key, value_key)
+    return trim_buckets(res, time_key, time_from, time_to, vc.bucket)
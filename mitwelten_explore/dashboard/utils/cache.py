@@ -0,0 +1,103 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class MemoryCache:
+    """Thread safe, size bounded LRU cache with a time to live per entry.
+
+    Expired entries are kept for another `stale_ttl` seconds and can still be
+    read with `get_or_stale`. Values are stored as they are, callers must not
+    mutate them.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, stale_ttl=0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns a (found, value) tuple, stale entries are not found."""
+        found, value, stale = self.get_or_stale(key)
+        if stale:
+            return False, None
+        return found, value
+
+    def get_or_stale(self, key):
+        """Returns a (found, value, stale) tuple."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                now = time.monotonic()
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value, False
+                if expires_at + self.stale_ttl > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value, True
+                del self._entries[key]
+            self.misses += 1
+            return False, None, False
+
+    def expires_in(self, key):
+        """Seconds until the entry expires, None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is None:
+            return float("inf")
+        return entry[0] - time.monotonic()
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one call.
+
+    The first caller of a key runs the function, callers arriving while it is
+    running wait for and share its result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fcn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if leader:
+            try:
+                future.set_result(fcn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return future.result()
@@ -1,47 +1,358 @@
 import requests
+import threading
+import numpy as np
+import pandas as pd
+from collections import Counter
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlencode
 import jwt
 from dashboard.models import AppUser
 import datetime
 import urllib
 import json
-from configuration import REDIS_HOST, REDIS_PORT, DATA_API_URL
+from configuration import (
+    REDIS_HOST,
+    REDIS_PORT,
+    DATA_API_URL,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_CONNECT_TIMEOUT_S,
+    HTTP_READ_TIMEOUT_S,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    MEMORY_CACHE_MAXSIZE,
+    CACHE_TIME_RESOLUTION_S,
+    CACHE_OPEN_END_S,
+)
+from dashboard.utils.cache import MemoryCache, SingleFlight
+from dashboard.utils.ts import parse_times
 
 if REDIS_HOST is not None and REDIS_PORT is not None:
     from redis import Redis
     from requests_cache import CachedSession, RedisCache
 
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT_S, HTTP_READ_TIMEOUT_S)
+
+# one keep-alive connection pool per host, shared by all sessions of the process
+http_adapter = HTTPAdapter(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    max_retries=Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+
+
+# the shared sessions serve requests of all users, a cookie set by a response
+# would be sent with the requests of the next user
+REJECT_ALL_COOKIES = DefaultCookiePolicy(allowed_domains=[])
+
+
+def mount_http_adapter(session: requests.Session):
+    """Mounts the shared connection pool, the session never stores cookies."""
+    session.mount("https://", http_adapter)
+    session.mount("http://", http_adapter)
+    session.cookies.set_policy(REJECT_ALL_COOKIES)
+    return session
+
+
+class PooledSession(requests.Session):
+    """requests session on the shared connection pool with default timeouts"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        mount_http_adapter(self)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+http_session = PooledSession()
+
+# background refreshes of stale cache entries
+revalidation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidate")
+
+
+redis_connection = None
+if REDIS_HOST is not None and REDIS_PORT is not None:
+    redis_connection = Redis(host=REDIS_HOST, port=REDIS_PORT)
+
+
+class JsonResponse:
+    """Response of a request answered from the in-process cache"""
+
+    status_code = 200
+    ok = True
+
+    def __init__(self, url, payload) -> None:
+        self.url = url
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
 
 class CachedRequest:
-    def __init__(self, cache_name, expire_after=15 * 60) -> None:
-        self.connection = None
+    """Two tier cache for GET requests.
+
+    Parsed json payloads of successful requests are kept in a size bounded
+    in-process cache (L1) for `expire_after` seconds. Misses go to the shared
+    requests_cache redis backend (L2) if configured, then to the api.
+    Requests with an Authorization header are never cached in-process.
+    Concurrent identical requests are coalesced into one upstream call.
+
+    With `stale_while_revalidate` seconds, expired L1 entries are still served
+    for that long while they are refreshed in the background.
+    """
+
+    instances = {}
+
+    def __init__(
+        self, cache_name, expire_after=15 * 60, stale_while_revalidate=0
+    ) -> None:
+        self.cache_name = cache_name
+        self.expire_after = expire_after
+        self.connection = redis_connection
         self.backend = None
         self.session = None
+        self.memory = MemoryCache(
+            maxsize=MEMORY_CACHE_MAXSIZE,
+            ttl=expire_after,
+            stale_ttl=stale_while_revalidate,
+        )
+        self.in_flight = SingleFlight()
+        # request counts of cacheable urls, used by the cache warmer
+        self.request_counts = Counter()
+        self.requests = {}
+        self.revalidating = set()
+        self._lock = threading.Lock()
+        CachedRequest.instances[cache_name] = self
 
-        if REDIS_HOST is not None and REDIS_PORT is not None:
-            self.connection = Redis(host=REDIS_HOST, port=REDIS_PORT)
+        if self.connection is not None:
             self.backend = RedisCache(connection=self.connection)
-            self.session = CachedSession(
-                cache_name, backend=self.backend, expire_after=expire_after
+            self.session = mount_http_adapter(
+                CachedSession(
+                    cache_name, backend=self.backend, expire_after=expire_after
+                )
             )
 
+    @staticmethod
+    def cache_key(url: str, params=None, headers=None):
+        if headers and "Authorization" in headers:
+            return None
+        if params:
+            return f"{url}|{urlencode(sorted(dict(params).items()), doseq=True)}"
+        return url
+
     def get(self, url: str, params=None, **kwargs):
+        headers = kwargs.get("headers")
+        key = self.cache_key(url, params, headers)
+        if key is not None:
+            self.count_request(key, url, params)
+            found, payload, stale = self.memory.get_or_stale(key)
+            if found:
+                if stale:
+                    self.revalidate(key)
+                return JsonResponse(url, payload)
+            flight_key = key
+        else:
+            flight_key = (url, repr(params), repr(headers))
+        # concurrent identical requests share one upstream call
+        return self.in_flight.do(flight_key, self.fetch, url, key, params, **kwargs)
+
+    def count_request(self, key, url, params):
+        with self._lock:
+            self.request_counts[key] += 1
+            self.requests[key] = (url, params)
+            if len(self.request_counts) > 2 * MEMORY_CACHE_MAXSIZE:
+                self.request_counts = Counter(
+                    dict(self.request_counts.most_common(MEMORY_CACHE_MAXSIZE))
+                )
+                self.requests = {k: self.requests[k] for k in self.request_counts}
+
+    def revalidate(self, key, force_refresh=False):
+        """Refresh a cached url in the background."""
+        with self._lock:
+            if key in self.revalidating or key not in self.requests:
+                return
+            self.revalidating.add(key)
+            url, params = self.requests[key]
+
+        def refresh():
+            try:
+                self.in_flight.do(
+                    key, self.fetch, url, key, params, force_refresh=force_refresh
+                )
+            except Exception as e:
+                print(f"{self.cache_name}: refreshing {url} failed: {e}")
+            finally:
+                with self._lock:
+                    self.revalidating.discard(key)
+
+        revalidation_pool.submit(refresh)
+
+    def most_requested(self, n):
+        with self._lock:
+            return [key for key, count in self.request_counts.most_common(n)]
+
+    def fetch(self, url: str, key, params=None, **kwargs):
+        res = self.request(url, params=params, **kwargs)
+        if key is not None and res.status_code == 200:
+            try:
+                payload = res.json()
+            except ValueError:
+                return res
+            self.memory.set(key, payload)
+            return JsonResponse(url, payload)
+        return res
+
+    def request(self, url: str, params=None, force_refresh=False, **kwargs):
         if self.session:
-            return self.session.get(url, params=params, **kwargs)
+            kwargs.setdefault("timeout", HTTP_TIMEOUT)
+            return self.session.get(
+                url, params=params, force_refresh=force_refresh, **kwargs
+            )
+        else:
+            return http_session.get(url, params=params, **kwargs)
+
+
+def get_cache_stats():
+    """hits, misses and size of the in-process cache of each CachedRequest"""
+    return {name: cr.memory.stats() for name, cr in CachedRequest.instances.items()}
+
+
+# origin of the data api time buckets (timescale's default, a monday)
+BUCKET_ORIGIN = datetime.datetime(2000, 1, 3)
+
+
+def parse_bucket_width(bucket_width):
+    """Bucket width like "10min", "1h", "1d" or "4w" as timedelta, None if unknown"""
+    if not isinstance(bucket_width, str):
+        return None
+    try:
+        return pd.Timedelta(bucket_width).to_pytimedelta()
+    except ValueError:
+        return None
+
+
+def to_utc_naive(t):
+    if isinstance(t, str):
+        t = datetime.datetime.fromisoformat(t)
+    if t.tzinfo is not None:
+        t = t.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return t
+
+
+def snap_time(t: datetime.datetime, width: datetime.timedelta, up=False):
+    steps, rest = divmod(t - BUCKET_ORIGIN, width)
+    if up and rest:
+        steps += 1
+    return BUCKET_ORIGIN + steps * width
+
+
+def canonical_time_window(time_from=None, time_to=None, bucket_width=None):
+    """Snap a requested time window outward, so that requests for almost the same
+    window share one url and one cache entry.
+
+    With a known bucket width the window is aligned to the buckets, the response
+    is trimmed back with `trim_buckets`. This widens the window: the first and
+    last bucket are whole buckets, their values include detections up to one
+    bucket width before `time_from` and after `time_to`, where the api used to
+    count only the part inside the window. Otherwise it is rounded outward to
+    CACHE_TIME_RESOLUTION_S, an end within the last CACHE_OPEN_END_S seconds
+    (usually "until now") is rounded up to the next CACHE_OPEN_END_S.
+    """
+    width = parse_bucket_width(bucket_width)
+    resolution = width or datetime.timedelta(seconds=CACHE_TIME_RESOLUTION_S)
+    if time_from is not None:
+        time_from = snap_time(to_utc_naive(time_from), resolution)
+    if time_to is not None:
+        time_to = to_utc_naive(time_to)
+        open_end = datetime.timedelta(seconds=CACHE_OPEN_END_S)
+        if width is None and time_to > datetime.datetime.utcnow() - open_end:
+            time_to = snap_time(time_to, open_end, up=True)
         else:
-            return requests.get(url, params=params, **kwargs)
+            time_to = snap_time(time_to, resolution, up=True)
+    return time_from, time_to
 
 
-def construct_url(path: str, args: dict = None):
+def canonical_args(args: dict, align_buckets=True):
+    """Query args in a canonical order: None values and empty lists dropped,
+    list values sorted and deduplicated and the from/to window snapped with
+    `canonical_time_window`. Set `align_buckets` to False if the response of a
+    bucketed request is not trimmed with `trim_buckets`.
+    """
+    args = {k: v for k, v in args.items() if v is not None and v != []}
+    if "from" in args or "to" in args:
+        bucket_width = args.get("bucket_width") if align_buckets else None
+        args["from"], args["to"] = canonical_time_window(
+            args.get("from"), args.get("to"), bucket_width
+        )
+    canonical = []
+    for key in sorted(args):
+        value = args[key]
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(set(str(v) for v in value))
+        elif isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        canonical.append((key, value))
+    return canonical
+
+
+def list_or_none(value):
+    # for params that are only sent when given as a list
+    return value if isinstance(value, list) else None
+
+
+def construct_url(path: str, args: dict = None, align_buckets=True):
     url = f"{DATA_API_URL}{path}"
     if args:
-        filtered_args = {k: v for k, v in args.items() if v is not None}
-        if bool(filtered_args):
-            encoded_args = urlencode(filtered_args)
+        canonical = canonical_args(args, align_buckets=align_buckets)
+        encoded_args = urlencode(canonical, doseq=True)
+        if encoded_args:
             url += f"?{encoded_args}"
     return url
 
 
+def trim_buckets(data, time_key, time_from=None, time_to=None, bucket_width=None):
+    """Drop the buckets of a response that do not overlap the requested window.
+
+    Counterpart of `canonical_time_window`: all lists of `data` with one entry
+    per bucket are trimmed, `data` itself is not modified. Buckets partly inside
+    the window are kept whole, with their values over the full bucket, so a
+    window shorter than a bucket still shows that bucket.
+    """
+    width = parse_bucket_width(bucket_width)
+    if not isinstance(data, dict) or width is None:
+        return data
+    times = data.get(time_key)
+    if not times or (time_from is None and time_to is None):
+        return data
+    starts = parse_times(times)
+    keep = np.ones(len(starts), dtype=bool)
+    if time_from is not None:
+        width = np.timedelta64(int(width.total_seconds()), "s")
+        keep &= starts + width > np.datetime64(to_utc_naive(time_from))
+    if time_to is not None:
+        keep &= starts < np.datetime64(to_utc_naive(time_to))
+    if keep.all():
+        return data
+    trimmed = dict(data)
+    for key, values in data.items():
+        if isinstance(values, list) and len(values) == len(times):
+            trimmed[key] = [v for v, k in zip(values, keep) if k]
+    return trimmed
+
+
 def get_user_from_cookies(cookies):
     try:
         decoded_cookie = jwt.decode(
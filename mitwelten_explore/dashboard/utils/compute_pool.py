@@ -0,0 +1,193 @@
+import atexit
+import importlib
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from configuration import (
+    COMPUTE_POOL_WORKERS,
+    COMPUTE_POOL_MIN_SIZE,
+    COMPUTE_POOL_SHM_MIN_BYTES,
+    COMPUTE_POOL_TIMEOUT_S,
+)
+
+# Dash runs in one web process, numpy and h3 work in a callback holds the GIL
+# and stalls the data loading of all other sessions. Large computations run in
+# a pool of worker processes instead, small ones stay inline where they are
+# cheaper than sending the inputs to a worker.
+
+# imported by the workers before they take work
+WARM_MODULES = [
+    "numpy",
+    "scipy.stats",
+    "scipy.signal",
+    "h3",
+    "dashboard.utils.ts",
+    "dashboard.utils.geo_utils",
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_worker = False
+
+
+class SharedArray:
+    """A numpy array copied to shared memory, pickles to its name and layout.
+
+    The process that creates it unlinks the memory with `release`, workers
+    attach to it with `attach` and `close` it when done.
+    """
+
+    def __init__(self, a: np.ndarray):
+        a = np.ascontiguousarray(a)
+        self.shape = a.shape
+        self.dtype = a.dtype.str
+        self.shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+        np.ndarray(a.shape, dtype=a.dtype, buffer=self.shm.buf)[...] = a
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "shape": self.shape, "dtype": self.dtype}
+
+    def __setstate__(self, state):
+        self.shape = state["shape"]
+        self.dtype = state["dtype"]
+        self.shm = _attach_untracked(state["name"])
+
+    def attach(self):
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # the result still references the array, the mapping is closed with it
+            pass
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach_untracked(name):
+    """Attach to the shared memory `name` without registering it with the
+    resource tracker.
+
+    The workers share the resource tracker of the web process, which registers
+    the memory on creation and unregisters it with `release`. A second
+    registration by a worker would be unregistered by neither, an unregister by
+    the worker would make the one of `release` fail.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _init_worker(modules):
+    global _in_worker
+    _in_worker = True
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _noop():
+    return None
+
+
+def _call(fcn, args):
+    shared = [a for a in args if isinstance(a, SharedArray)]
+    args = [a.attach() if isinstance(a, SharedArray) else a for a in args]
+    try:
+        return fcn(*args)
+    finally:
+        del args
+        for a in shared:
+            a.close()
+
+
+def start_compute_pool(workers=COMPUTE_POOL_WORKERS):
+    """Starts the worker processes, returns the pool or None if disabled."""
+    global _pool
+    if workers <= 0 or _in_worker:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            if "forkserver" in methods:
+                context = multiprocessing.get_context("forkserver")
+                # forked from a server that imported them once
+                context.set_forkserver_preload(WARM_MODULES)
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(WARM_MODULES,),
+            )
+            # workers start on demand, one task each starts them all
+            for _ in range(workers):
+                _pool.submit(_noop)
+        return _pool
+
+
+def shutdown_compute_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_compute_pool)
+
+
+def run(fcn, *args, size=None, min_size=COMPUTE_POOL_MIN_SIZE):
+    """Returns fcn(*args), computed in the compute pool for large inputs.
+
+    fcn must be a module level function. size measures the input, by default
+    the number of values of the numpy array arguments, inputs smaller than
+    min_size are computed inline. Arrays of at least COMPUTE_POOL_SHM_MIN_BYTES
+    are passed in shared memory. Runs inline if the pool is disabled or broken,
+    or if the result is not ready after COMPUTE_POOL_TIMEOUT_S seconds.
+    """
+    if size is None:
+        size = sum(a.size for a in args if isinstance(a, np.ndarray))
+    if size < min_size:
+        return fcn(*args)
+    pool = start_compute_pool()
+    if pool is None:
+        return fcn(*args)
+    shared = []
+    try:
+        pool_args = []
+        for a in args:
+            if isinstance(a, np.ndarray) and a.nbytes >= COMPUTE_POOL_SHM_MIN_BYTES:
+                shared.append(SharedArray(a))
+                pool_args.append(shared[-1])
+            else:
+                pool_args.append(a)
+        future = pool.submit(_call, fcn, pool_args)
+        try:
+            return future.result(timeout=COMPUTE_POOL_TIMEOUT_S)
+        except FutureTimeoutError:
+            # a queued task is dropped, a running one keeps its worker busy
+            future.cancel()
+            print(f"compute pool: {fcn.__name__} timed out, computing it inline")
+            return fcn(*args)
+    except BrokenProcessPool as e:
+        print(f"compute pool: {fcn.__name__} failed ({e}), restarting the pool")
+        shutdown_compute_pool()
+        return fcn(*args)
+    finally:
+        for a in shared:
+            a.release()
@@ -1,11 +1,32 @@
+import os
+import json
+import hashlib
+import threading
 from h3 import h3
 import numpy as np
+from dashboard.utils.cache import MemoryCache
+from dashboard.utils.compute_pool import run
+from configuration import (
+    MAP_VIEWPORT_PX,
+    MAP_VIEWPORT_MARGIN,
+    CELL_BOUNDARY_CACHE_SIZE,
+    H3_GEOJSON_DIR,
+    H3_GEOJSON_URL,
+    H3_GEOJSON_TILE_LEVELS,
+    MAP_CLUSTER_GRID_PX,
+    MAP_CLUSTER_MAX_ZOOM,
+    COMPUTE_POOL_MIN_POINTS,
+)
+
+
+# area of all map data, see validate_coordinates
+MAP_BOUNDS = dict(lat_min=46.5, lat_max=49, lon_min=5.5, lon_max=9)
 
 
 def validate_coordinates(lat, lon):
-    if lon < 5.5 or lon > 9:
+    if lon < MAP_BOUNDS["lon_min"] or lon > MAP_BOUNDS["lon_max"]:
         return False
-    if lat < 46.5 or lat > 49:
+    if lat < MAP_BOUNDS["lat_min"] or lat > MAP_BOUNDS["lat_max"]:
         return False
     return True
 
@@ -40,40 +61,344 @@ def calculate_zoom_from_points(latmin, latmax, lonmin, lonmax):
         return 18
 
 
-def generate_clusters(resolution, lat, lon, values, fun, *args):
-    assert len(lat) == len(values) == len(lon)
-    values_dict = {}
-    for i in range(len(lat)):
-        parent_cluster_id = h3.geo_to_h3(lat[i], lon[i], resolution)
-        if not parent_cluster_id in values_dict:
-            values_dict[parent_cluster_id] = []
-        values_dict[parent_cluster_id].append(values[i])
+class LocationIndex:
+    """H3 cells of a set of points for all hexbin map resolutions.
+
+    The cells of a resolution are computed once per unique coordinate, the
+    first time the resolution is used. Each resolution keeps the sorted unique
+    cell ids and the cell position of every point, zooming the map only
+    re-aggregates the values of the points per cell.
+    """
+
+    def __init__(self, lat, lon):
+        coords = np.column_stack(
+            (np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        ).reshape(-1, 2)
+        unique_coords, point_coords = np.unique(coords, axis=0, return_inverse=True)
+        self.size = len(coords)
+        self.lat = coords[:, 0]
+        self.lon = coords[:, 1]
+        self.unique_coords = unique_coords
+        self.point_coords = point_coords.reshape(-1)
+        self.cells = {}
+        self.codes = {}
+        self.clusters = {}
+        self.mercator = None
+
+    def cell_codes(self, resolution):
+        """Sorted unique cell ids and the cell position of every point."""
+        if resolution not in self.codes:
+            coord_cells = run(
+                h3_cells,
+                self.unique_coords,
+                resolution,
+                size=len(self.unique_coords),
+                min_size=COMPUTE_POOL_MIN_POINTS,
+            )
+            cells, coord_codes = np.unique(coord_cells, return_inverse=True)
+            self.cells[resolution] = cells
+            self.codes[resolution] = coord_codes.astype(np.int32)[self.point_coords]
+        return self.cells[resolution], self.codes[resolution]
+
+    def aggregate(self, resolution, values, agg_fcn="mean"):
+        """Aggregate the values of the points per cell.
+
+        `agg_fcn` is one of sum, mean, min, max and median (unknown names fall
+        back to mean, as in the map charts) or a function applied to the
+        values of each cell. Returns a {cell id: value} dict.
+        """
+        assert len(values) == self.size
+        if self.size == 0:
+            return {}
+        cells, codes = self.cell_codes(resolution)
+        values = np.asarray(values)
+        if callable(agg_fcn):
+            group_codes, sorted_values, starts = sorted_groups(codes, values)
+            groups = np.split(sorted_values, starts[1:])
+            return {
+                cell: agg_fcn(group) for cell, group in zip(cells[group_codes], groups)
+            }
+        group_codes, aggregated = group_reduce(codes, values, agg_fcn)
+        return dict(zip(cells[group_codes].tolist(), aggregated.tolist()))
+
+    def cluster_codes(self, zoom):
+        """Point clusters of a zoom level and the cluster of every point.
+
+        Points are clustered on a grid of MAP_CLUSTER_GRID_PX pixels in web
+        mercator, the grid of a zoom level splits each cell of the zoom level
+        below in four, so clusters break up as the map is zoomed in. Above
+        MAP_CLUSTER_MAX_ZOOM every point is its own cluster.
+        """
+        level = min(int(np.floor(zoom)), MAP_CLUSTER_MAX_ZOOM + 1)
+        if level not in self.clusters:
+            if level > MAP_CLUSTER_MAX_ZOOM:
+                codes = np.arange(self.size)
+            else:
+                if self.mercator is None:
+                    x = (self.lon + 180) / 360
+                    y = (1 - np.arcsinh(np.tan(np.radians(self.lat))) / np.pi) / 2
+                    self.mercator = (x, y)
+                x, y = self.mercator
+                n = 512 // MAP_CLUSTER_GRID_PX * 2**level
+                grid_x = np.clip(np.floor(x * n), 0, n - 1).astype(np.int64)
+                grid_y = np.clip(np.floor(y * n), 0, n - 1).astype(np.int64)
+                _, codes = np.unique(grid_x * n + grid_y, return_inverse=True)
+                codes = codes.reshape(-1)
+            counts = np.bincount(codes)
+            self.clusters[level] = (
+                codes,
+                counts,
+                np.bincount(codes, weights=self.lat) / counts,
+                np.bincount(codes, weights=self.lon) / counts,
+            )
+        return self.clusters[level]
+
+    def cluster_points(self, zoom, values=None, agg_fcn="sum", bounds=None):
+        """Point clusters of a zoom level, optionally within bounds.
+
+        Returns a dict of arrays with the centroid (lat, lon), the number of
+        points (count), the aggregated values (value) and the position of
+        the point of single point clusters, -1 for the others (point).
+        Single point clusters are at the exact coordinates of the point.
+        """
+        codes, counts, lat, lon = self.cluster_codes(zoom)
+        point = np.full(len(counts), -1)
+        single = counts == 1
+        point[codes[single[codes]]] = np.flatnonzero(single[codes])
+        if values is not None and self.size > 0:
+            _, value = group_reduce(codes, np.asarray(values), agg_fcn)
+        else:
+            value = counts
+        if bounds is not None:
+            lat_min, lat_max, lon_min, lon_max = bounds
+            inside = (
+                (lat >= lat_min)
+                & (lat <= lat_max)
+                & (lon >= lon_min)
+                & (lon <= lon_max)
+            )
+        else:
+            inside = slice(None)
+        return dict(
+            lat=lat[inside],
+            lon=lon[inside],
+            count=counts[inside],
+            value=value[inside],
+            point=point[inside],
+        )
+
+    def visible_cells(self, resolution, bounds):
+        """Set of the cells with at least one point within the bounds."""
+        cells, codes = self.cell_codes(resolution)
+        lat_min, lat_max, lon_min, lon_max = bounds
+        lat, lon = self.lat, self.lon
+        inside = (
+            (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        )
+        return set(cells[np.unique(codes[inside])].tolist())
+
+
+def h3_cells(coords, resolution):
+    """H3 cell ids of (n, 2) lat, lon coordinates as an object array."""
+    return np.array(
+        [h3.geo_to_h3(lat, lon, resolution) for lat, lon in coords.tolist()],
+        dtype=object,
+    )
+
+
+def sorted_groups(codes, values, sort_values=False):
+    """Values sorted by group code, the codes of the groups and their starts."""
+    order = (
+        np.lexsort((values, codes)) if sort_values else np.argsort(codes, kind="stable")
+    )
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1))
+    return sorted_codes[starts], values[order], starts
+
+
+def group_reduce(codes, values, agg_fcn="mean"):
+    """Aggregates values by group code with sum, mean, min, max or median.
+
+    Unknown names fall back to mean. Returns the sorted group codes and the
+    aggregated value of each group.
+    """
+    median = agg_fcn == "median"
+    group_codes, sorted_values, starts = sorted_groups(codes, values, median)
+    if agg_fcn == "sum":
+        aggregated = np.add.reduceat(sorted_values, starts)
+    elif agg_fcn == "min":
+        aggregated = np.minimum.reduceat(sorted_values, starts)
+    elif agg_fcn == "max":
+        aggregated = np.maximum.reduceat(sorted_values, starts)
+    else:
+        counts = np.diff(np.append(starts, len(sorted_values)))
+        if median:
+            lower = sorted_values[starts + (counts - 1) // 2]
+            upper = sorted_values[starts + counts // 2]
+            aggregated = (lower + upper) / 2
+        else:
+            aggregated = np.add.reduceat(sorted_values, starts) / counts
+    return group_codes, aggregated
 
-    for h3_parent_id in values_dict:
-        values_dict[h3_parent_id] = fun(values_dict[h3_parent_id], *args)
-    return values_dict
 
+location_index_cache = MemoryCache(maxsize=16)
 
-def get_points_in_cluster(cluster_id, lat, lon, point_ids):
-    assert len(lat) == len(point_ids) == len(lon)
-    resolution = h3.h3_get_resolution(cluster_id)
-    points_in_cell = []
-    for i in range(len(lat)):
-        if h3.geo_to_h3(lat[i], lon[i], resolution) == cluster_id:
-            points_in_cell.append(point_ids[i])
-    return points_in_cell
+
+def location_index(lat, lon):
+    """The LocationIndex of a set of points, built once per set of points.
+
+    The map data lives in a browser store and comes back with every zoom or
+    pan event, the index is looked up by the coordinates.
+    """
+    coords = np.asarray([lat, lon], dtype=float)
+    key = hashlib.sha1(coords.tobytes()).hexdigest()
+    found, index = location_index_cache.get(key)
+    if not found:
+        index = LocationIndex(lat, lon)
+        location_index_cache.set(key, index)
+    return index
+
+
+def viewport_bounds(clat, clon, zoom, margin=MAP_VIEWPORT_MARGIN):
+    """(lat_min, lat_max, lon_min, lon_max) of a mapbox viewport.
+
+    The size of the viewport is not known on the server, MAP_VIEWPORT_PX is
+    used and extended by `margin` times its size on each side. The bounds
+    are snapped outwards to a grid of `margin` viewports, so that small pans
+    return the same bounds.
+    """
+    # web mercator pixels at the integer zoom level
+    world = 512 * 2 ** np.floor(zoom)
+    scale = 2 ** (np.floor(zoom) - zoom)
+    x = (clon + 180) / 360 * world
+    y = (1 - np.arcsinh(np.tan(np.radians(clat))) / np.pi) / 2 * world
+    half_width = MAP_VIEWPORT_PX[0] * (0.5 + margin) * scale
+    half_height = MAP_VIEWPORT_PX[1] * (0.5 + margin) * scale
+    x_min, x_max, y_min, y_max = (
+        x - half_width,
+        x + half_width,
+        y - half_height,
+        y + half_height,
+    )
+    if margin > 0:
+        step_x = MAP_VIEWPORT_PX[0] * margin
+        step_y = MAP_VIEWPORT_PX[1] * margin
+        x_min = np.floor(x_min / step_x) * step_x
+        x_max = np.ceil(x_max / step_x) * step_x
+        y_min = np.floor(y_min / step_y) * step_y
+        y_max = np.ceil(y_max / step_y) * step_y
+    lon_min = max(x_min / world * 360 - 180, -180)
+    lon_max = min(x_max / world * 360 - 180, 180)
+    y_min = max(y_min, 0)
+    y_max = min(y_max, world)
+    lat_max = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y_min / world))))
+    lat_min = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y_max / world))))
+    return lat_min, lat_max, lon_min, lon_max
+
+
+cell_boundary_cache = MemoryCache(maxsize=CELL_BOUNDARY_CACHE_SIZE)
+
+
+def cell_boundary(h3id):
+    found, poly = cell_boundary_cache.get(h3id)
+    if not found:
+        poly = [[list(tup) for tup in h3.h3_to_geo_boundary(h3id, geo_json=True)]]
+        cell_boundary_cache.set(h3id, poly)
+    return poly
 
 
 def generate_geojson(unique_ids):
     geojson_features = []
     for h3id in unique_ids:
-        poly = [[list(tup) for tup in h3.h3_to_geo_boundary(h3id, geo_json=True)]]
         geojson_features.append(
             {
                 "type": "Feature",
                 "properties": {"h3index": h3id},
-                "geometry": {"coordinates": poly, "type": "Polygon"},
+                "geometry": {"coordinates": cell_boundary(h3id), "type": "Polygon"},
             }
         )
 
     return {"type": "FeatureCollection", "features": geojson_features}
+
+
+def geojson_tile(h3id):
+    """The parent cell whose geojson file contains the cell."""
+    resolution = h3.h3_get_resolution(h3id)
+    return h3.h3_to_parent(h3id, max(resolution - H3_GEOJSON_TILE_LEVELS, 0))
+
+
+_tile_lock = threading.Lock()
+
+
+def write_geojson_tile(resolution, tile):
+    """Writes the geojson of all cells of a resolution within a parent cell.
+
+    The files are served as static files and referenced by url from the
+    choropleth traces, the browser loads the geometry of a tile once.
+    """
+    path = os.path.join(H3_GEOJSON_DIR, str(resolution), f"{tile}.geojson")
+    if os.path.exists(path):
+        return path
+    with _tile_lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "properties": {"h3index": h3id},
+                    "geometry": {
+                        "coordinates": [
+                            [
+                                list(tup)
+                                for tup in h3.h3_to_geo_boundary(h3id, geo_json=True)
+                            ]
+                        ],
+                        "type": "Polygon",
+                    },
+                }
+                for h3id in sorted(h3.h3_to_children(tile, resolution))
+            ],
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(geojson, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    return path
+
+
+def geojson_tile_urls(unique_ids):
+    """Groups cells by geojson tile, returns a {url: [positions]} dict."""
+    tiles = {}
+    for i, h3id in enumerate(unique_ids):
+        tiles.setdefault(geojson_tile(h3id), []).append(i)
+    urls = {}
+    for tile, positions in tiles.items():
+        resolution = h3.h3_get_resolution(unique_ids[positions[0]])
+        write_geojson_tile(resolution, tile)
+        urls[f"{H3_GEOJSON_URL}/{resolution}/{tile}.geojson"] = positions
+    return urls
+
+
+def write_map_geojson_tiles(resolutions):
+    """Writes the geojson tiles of the resolutions for the whole map area."""
+    area = {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [MAP_BOUNDS["lat_min"], MAP_BOUNDS["lon_min"]],
+                [MAP_BOUNDS["lat_min"], MAP_BOUNDS["lon_max"]],
+                [MAP_BOUNDS["lat_max"], MAP_BOUNDS["lon_max"]],
+                [MAP_BOUNDS["lat_max"], MAP_BOUNDS["lon_min"]],
+                [MAP_BOUNDS["lat_min"], MAP_BOUNDS["lon_min"]],
+            ]
+        ],
+    }
+    for resolution in resolutions:
+        tile_resolution = max(resolution - H3_GEOJSON_TILE_LEVELS, 0)
+        cells = h3.polyfill(area, resolution)
+        tiles = {h3.h3_to_parent(cell, tile_resolution) for cell in cells}
+        for tile in sorted(tiles):
+            write_geojson_tile(resolution, tile)
@@ -1,9 +1,25 @@
+import base64
+import hashlib
+import json
 import numpy as np
-from scipy.stats import pearsonr
+import pandas as pd
+from scipy.stats import t as student_t
 from scipy.signal import find_peaks, find_peaks_cwt
 from datetime import datetime
+from itertools import chain
 import time
 
+from dashboard.utils.cache import MemoryCache
+from dashboard.utils.compute_pool import run
+from configuration import (
+    FFT_WELCH_SEGMENT_S,
+    FFT_WELCH_MIN_SEGMENTS,
+    FFT_CACHE_SIZE,
+    LOMBSCARGLE_OVERSAMPLING,
+    LOMBSCARGLE_MAX_FREQUENCIES,
+    CROSS_CORRELATION_MAX_LAG_S,
+)
+
 
 def check_array_len(arrays):
     for arr in arrays:
@@ -22,111 +38,558 @@ def interpolate_nan(a: list):
     return list(a_interp)
 
 
-def correlation_matrix(data: list):
-    # t0 = time.time()
-    # data: [[[]]]
-    # data[0] : [[time string list],[values_list]]
-    if len(data) < 2:
+def to_json_list(a: np.ndarray):
+    """Array to list, NaN and inf become None"""
+    return np.where(np.isfinite(a), a, None).tolist()
+
+
+def normalize_series(values: list, method="minmax"):
+    """Scale a series with min-max (0..1), z-score or robust (median/IQR) scaling.
+    None and NaN values are kept as None, a constant series scales to 0.
+    """
+    if values is None or len(values) == 0:
+        return values
+    a = np.array(values, dtype=float)
+    mask = np.isfinite(a)
+    if not mask.any():
+        return to_json_list(a)
+    valid = a[mask]
+    if method == "zscore":
+        center = valid.mean()
+        scale = valid.std()
+    elif method == "robust":
+        q25, center, q75 = np.percentile(valid, [25, 50, 75])
+        scale = q75 - q25
+    else:
+        center = valid.min()
+        scale = valid.max() - center
+    if scale > 0:
+        scaled = (a - center) / scale
+    else:
+        scaled = np.where(mask, 0.0, np.nan)
+    return to_json_list(scaled)
+
+
+def time_suffix(times):
+    """The part of ISO time strings after the seconds, e.g. the utc offset
+    "+01:00", if all of them share it, else None."""
+    if times is None or len(times) == 0 or not isinstance(times[0], str):
         return None
-    num_datasets = len(data)
-
-    values_list = []
-    timestamps_list = []
-    for i in range(len(data)):
-        timestamps_list.append([datetime.fromisoformat(d) for d in data[i][0]])
-        values_list.append(data[i][1])
-    timestamps_unix_list = []
-    for timestamps in timestamps_list:
-        timestamps_unix_list.append(np.array([dt.timestamp() for dt in timestamps]))
-    correlation_matrix = np.zeros((num_datasets, num_datasets))
-
-    for i in range(num_datasets):
-        for j in range(i + 1, num_datasets):
-            if check_array_len(
-                [
-                    timestamps_unix_list[i],
-                    timestamps_unix_list[j],
-                    values_list[j],
-                    values_list[i],
-                ]
-            ):
-                interpolated_values_j = np.interp(
-                    timestamps_unix_list[i], timestamps_unix_list[j], values_list[j]
-                )
-                correlation, _ = pearsonr(values_list[i], interpolated_values_j)
-                correlation_matrix[i, j] = correlation
-            else:
-                correlation_matrix[i, j] = None
-
-    # print(correlation_matrix)
-    # print("took",time.time()-t0)
-    return correlation_matrix
-
-
-def compute_fft(amplitude, times):
+    suffixes = set(t[19:] for t in times)
+    return suffixes.pop() if len(suffixes) == 1 else None
+
+
+def suffix_offset(suffix: str):
+    """utc offset of a `time_suffix` as timedelta64[s]"""
+    offset = pd.Timestamp("2000-01-01T00:00:00" + suffix).utcoffset()
+    return np.timedelta64(int(offset.total_seconds()) if offset else 0, "s")
+
+
+def parse_times(times):
+    """ISO time strings, datetimes or datetime64 to a naive UTC datetime64[s] array"""
+    if isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64):
+        return times.astype("datetime64[s]")
+    if times is None or len(times) == 0:
+        return np.array([], dtype="datetime64[s]")
     if isinstance(times[0], str):
-        times = [datetime.fromisoformat(d) for d in times]
-    amplitude = interpolate_nan(amplitude)
-    n = len(amplitude)
-    n = n - (n % 24)
-    ft = np.fft.fft(amplitude, n=n) / n
-    ft = ft[range(int(n / 2))]
-
-    values = np.arange(int(n / 2))
-    tp = n * ((times[1] - times[0]).seconds)
-    if tp == 0:
-        return None, None
-    frequencies = values / tp
-    periods_s = [round(1 / f) for f in frequencies[1:]]
-    aft = list(np.abs(ft))
+        # api times share one utc offset, parse them without it and shift once
+        suffix = time_suffix(times)
+        if suffix is not None:
+            parsed = np.array([t[:19] for t in times], dtype="datetime64[s]")
+            return parsed - suffix_offset(suffix)
+    index = pd.to_datetime(times, utc=True, format="ISO8601").tz_localize(None)
+    return index.values.astype("datetime64[s]")
+
+
+def b64_array(a: np.ndarray, dtype):
+    return base64.b64encode(np.ascontiguousarray(a, dtype=dtype).tobytes()).decode()
+
+
+def from_b64_array(s: str, dtype):
+    return np.frombuffer(base64.b64decode(s), dtype=dtype)
+
+
+def encode_ts(times, values):
+    """Compact, json serializable encoding of a (times, values) series for dcc.Store.
+
+    Times are stored as epoch seconds: `start` and a fixed `step` for regular
+    buckets, otherwise `start` and base64 int32 `offsets`. The `suffix` (utc
+    offset) shared by the time strings is kept to format them as the api did,
+    see `ts_time_strings`. Values are stored as base64 int32 if they are all
+    integers, else as base64 float32 with NaN for missing values. Use
+    `decode_ts` to read it.
+    """
+    t = parse_times(times).astype(np.int64)
+    v = np.array(values if values is not None else [], dtype=float)
+    entry = {"n": len(t), "start": int(t[0]) if len(t) > 0 else 0, "step": 0}
+    entry["suffix"] = time_suffix(times)
+    steps = np.diff(t)
+    if len(steps) > 0 and (steps == steps[0]).all():
+        entry["step"] = int(steps[0])
+    elif len(steps) > 0:
+        entry["step"] = None
+        entry["offsets"] = b64_array(t - t[0], "<i4")
+    finite = np.isfinite(v)
+    if finite.all() and (v == np.round(v)).all() and (np.abs(v) < 2**31).all():
+        entry["dtype"] = "int32"
+        entry["values"] = b64_array(v, "<i4")
+    else:
+        entry["dtype"] = "float32"
+        entry["values"] = b64_array(v, "<f4")
+    return entry
+
+
+def decode_ts(entry):
+    """Returns the (datetime64[s] times, float values) arrays of a series encoded
+    with `encode_ts`, plain [times, values] lists are accepted as well."""
+    if not isinstance(entry, dict):
+        times, values = entry
+        values = np.array(values if values is not None else [], dtype=float)
+        return parse_times(times), values
+    if entry.get("step") is not None:
+        t = entry["start"] + entry["step"] * np.arange(entry["n"], dtype=np.int64)
+    else:
+        t = entry["start"] + from_b64_array(entry["offsets"], "<i4").astype(np.int64)
+    dtype = "<i4" if entry["dtype"] == "int32" else "<f4"
+    values = from_b64_array(entry["values"], dtype).astype(float)
+    return t.astype("datetime64[s]"), values
+
+
+def ts_time_strings(entry):
+    """ISO time strings of a series encoded with `encode_ts`, in the utc offset
+    and format of the api times it was encoded from. Series with mixed offsets
+    or from datetime64 times are formatted in utc, without offset."""
+    times, _ = decode_ts(entry)
+    suffix = entry.get("suffix") if isinstance(entry, dict) else time_suffix(entry[0])
+    return time_strings(times, suffix)
+
+
+def time_strings(times, suffix=None):
+    """ISO strings of naive utc datetime64 times in the utc offset of a
+    `time_suffix`, without offset if the suffix is None."""
+    if suffix is None:
+        return np.datetime_as_string(times, unit="s")
+    strings = np.datetime_as_string(times + suffix_offset(suffix), unit="s")
+    return np.char.add(strings, suffix)
+
+
+def content_hash(data):
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def align_series(data: list):
+    """Decode the series and interpolate them onto the union of their timestamps.
+
+    Returns the grid (epoch seconds) and a (k, m) array, a series is NaN outside
+    of its own time range. Missing values are interpolated.
+    """
+    series = []
+    for entry in data:
+        times, values = decode_ts(entry)
+        seconds = times.astype(np.int64)
+        valid = np.isfinite(values)
+        seconds, values = seconds[valid], values[valid]
+        order = np.argsort(seconds, kind="stable")
+        series.append((seconds[order], values[order]))
+    grid = np.unique(np.concatenate([s for s, _ in series]))
+    aligned = np.full((len(series), len(grid)), np.nan)
+    for i, (seconds, values) in enumerate(series):
+        if len(seconds) < 2:
+            continue
+        inside = (grid >= seconds[0]) & (grid <= seconds[-1])
+        aligned[i, inside] = np.interp(grid[inside], seconds, values)
+    return grid, aligned
+
+
+def pairwise_pearson(aligned: np.ndarray):
+    """Pearson coefficients, two sided p-values and overlap counts of all row
+    pairs, each pair uses the columns where both rows are finite."""
+    mask = np.isfinite(aligned)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if mask.all() and aligned.shape[1] > 2:
+            r = np.corrcoef(aligned)
+            n = np.full(r.shape, aligned.shape[1], dtype=float)
+        else:
+            m = mask.astype(float)
+            counts = m.sum(axis=1, keepdims=True)
+            means = np.where(mask, aligned, 0).sum(axis=1, keepdims=True) / counts
+            x = np.where(mask, aligned - means, 0)
+            n = m @ m.T
+            sx = x @ m.T
+            sxx = (x * x) @ m.T
+            cov = x @ x.T - sx * sx.T / n
+            var = sxx - sx**2 / n
+            r = cov / np.sqrt(var * var.T)
+        r = np.atleast_2d(r)
+        r[n < 3] = np.nan
+        r = np.clip(r, -1, 1)
+        dof = n - 2
+        t = r * np.sqrt(dof / (1 - r**2))
+        p = 2 * student_t.sf(np.abs(t), dof)
+    return r, p, n.astype(int)
+
+
+correlation_cache = MemoryCache(maxsize=32)
+
+
+def correlation_stats(data: list):
+    """Correlation of all series in a ts store, see `pairwise_pearson`.
+
+    Returns a dict with the symmetric (k, k) arrays "r", "p" and "n", or None for
+    less than two series. Results are memoized per store content.
+    """
+    if data is None or len(data) < 2:
+        return None
+    key = content_hash(data)
+    found, stats = correlation_cache.get(key)
+    if not found:
+        grid, aligned = align_series(data)
+        r, p, n = run(pairwise_pearson, aligned)
+        stats = {"r": r, "p": p, "n": n}
+        correlation_cache.set(key, stats)
+    return stats
+
+
+def correlation_matrix(data: list, stats=None):
+    # data: list of ts store entries, see encode_ts
+    # stats: the correlation_stats of data if the caller has them already
+    # returns the upper triangle of the pearson coefficients, NaN if undefined
+    if stats is None:
+        stats = correlation_stats(data)
+    if stats is None:
+        return None
+    return np.triu(stats["r"], k=1)
+
+
+def most_common_step(seconds):
+    """Most common positive difference of sorted epoch seconds, None if all are equal."""
+    steps = np.diff(seconds)
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return None
+    unique, counts = np.unique(steps, return_counts=True)
+    return int(unique[np.argmax(counts)])
 
-    return aft[1:], periods_s
+
+def regular_align_series(data: list, max_points=2**17):
+    """`align_series` on a regular grid of the most common step of the union grid.
+
+    The step is coarsened to keep the grid at most `max_points` long. Returns the
+    grid, its step in seconds and the (k, m) array, or a None step if the series
+    have less than two timestamps.
+    """
+    grid, aligned = align_series(data)
+    step = most_common_step(grid)
+    if step is None:
+        return grid, None, aligned
+    step *= max(1, -(-int(grid[-1] - grid[0]) // (step * max_points)))
+    regular = np.arange(grid[0], grid[-1] + 1, step)
+    regular_aligned = np.full((len(aligned), len(regular)), np.nan)
+    for i, row in enumerate(aligned):
+        valid = np.isfinite(row)
+        if valid.sum() < 2:
+            continue
+        seconds, values = grid[valid], row[valid]
+        inside = (regular >= seconds[0]) & (regular <= seconds[-1])
+        regular_aligned[i, inside] = np.interp(regular[inside], seconds, values)
+    return regular, step, regular_aligned
+
+
+def lagged_pearson(aligned: np.ndarray, max_lag: int):
+    """Pearson coefficients of all row pairs i < j at lags of -max_lag..max_lag
+    columns, a pair uses the columns where both rows are finite.
+
+    The lag l correlates row i with row j l columns later. The sums of all lags
+    are cross correlations of the masked rows, computed with FFTs. Returns the
+    (pairs, 2 * max_lag + 1) coefficients and overlap counts and the row pairs.
+    """
+    k, m = aligned.shape
+    mask = np.isfinite(aligned)
+    counts = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+    x = np.where(mask, aligned, 0)
+    x = np.where(mask, x - x.sum(axis=1, keepdims=True) / counts, 0)
+    n_fft = 1 << int(np.ceil(np.log2(m + max_lag)))
+    spectra = np.fft.rfft(np.stack([mask.astype(float), x, x * x]), n=n_fft)
+    rows_i, rows_j = np.triu_indices(k, 1)
+    lags = np.r_[n_fft - max_lag : n_fft, 0 : max_lag + 1]
+
+    def xcorr(a, b):
+        # sum over t of a_i(t) * b_j(t + l)
+        cross = np.conj(spectra[a][rows_i]) * spectra[b][rows_j]
+        return np.fft.irfft(cross, n=n_fft)[:, lags]
+
+    n = np.round(xcorr(0, 0))
+    sx, sy = xcorr(1, 0), xcorr(0, 1)
+    sxx, syy, sxy = xcorr(2, 0), xcorr(0, 2), xcorr(1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx**2) * (n * syy - sy**2))
+    r[n < 3] = np.nan
+    return np.clip(r, -1, 1), n.astype(int), (rows_i, rows_j)
+
+
+lagged_correlation_cache = MemoryCache(maxsize=32)
+
+
+def lagged_correlation_stats(data: list, max_lag_s=CROSS_CORRELATION_MAX_LAG_S):
+    """Peak lagged correlation of all series in a ts store, see `lagged_pearson`.
+
+    Returns a dict with the (k, k) arrays "r" (coefficient of the largest
+    magnitude), "lag_s" (its lag in seconds, positive if the column series
+    follows the row series) and "n" (overlap), or None for less than two series.
+    Results are memoized per aligned grid.
+    """
+    if data is None or len(data) < 2:
+        return None
+    grid, step, aligned = regular_align_series(data)
+    if step is None:
+        return None
+    key = hashlib.sha1(grid.tobytes() + aligned.tobytes()).hexdigest(), max_lag_s
+    found, stats = lagged_correlation_cache.get(key)
+    if not found:
+        max_lag = min(max_lag_s // step, len(grid) - 1)
+        r, n, (rows_i, rows_j) = run(lagged_pearson, aligned, max_lag)
+        defined = np.isfinite(r).any(axis=1)
+        best = np.argmax(np.where(np.isfinite(r), np.abs(r), -1), axis=1)
+        pairs = np.arange(len(best))
+        k = len(aligned)
+        stats = {
+            "r": np.full((k, k), np.nan),
+            "lag_s": np.zeros((k, k), dtype=int),
+            "n": np.zeros((k, k), dtype=int),
+        }
+        peak_lag = (best - max_lag) * step
+        for rows, cols, sign in [(rows_i, rows_j, 1), (rows_j, rows_i, -1)]:
+            stats["r"][rows, cols] = np.where(defined, r[pairs, best], np.nan)
+            stats["lag_s"][rows, cols] = sign * peak_lag
+            stats["n"][rows, cols] = n[pairs, best]
+        lagged_correlation_cache.set(key, stats)
+    return stats
+
+
+def regular_grid(times, values):
+    """Validates that a series is sampled on a regular grid, or resamples it onto one.
+
+    Returns the grid (epoch seconds), its step in seconds and the values on it,
+    missing values are interpolated. The step of an irregular series is its most
+    common time difference. The step is None for less than two finite samples.
+    """
+    seconds = parse_times(times).astype(np.int64)
+    values = np.asarray(values, dtype=float)
+    steps = np.diff(seconds)
+    if len(steps) > 0 and steps[0] > 0 and (steps == steps[0]).all():
+        grid = seconds
+        step = int(steps[0])
+    else:
+        order = np.argsort(seconds, kind="stable")
+        seconds, values = seconds[order], values[order]
+        step = most_common_step(seconds)
+        if step is None:
+            return seconds, None, values
+        grid = np.arange(seconds[0], seconds[-1] + 1, step)
+    valid = np.isfinite(values)
+    if valid.sum() < 2:
+        return grid, None, values
+    return grid, step, np.interp(grid, seconds[valid], values[valid])
+
+
+def welch_amplitudes(values, segment):
+    """Amplitude spectrum averaged over half overlapping hann windowed segments.
+
+    Scaled like `np.abs(np.fft.rfft(values)) / len(values)`, a sine of amplitude
+    a peaks at a / 2 in both.
+    """
+    window = np.hanning(segment)
+    frames = np.lib.stride_tricks.sliding_window_view(values, segment)
+    frames = frames[:: segment // 2]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+    return np.sqrt(power.mean(axis=0)) / window.sum()
+
+
+def compute_fft(amplitude, times, welch_segment_s=None, welch_min_segments=3):
+    """Amplitude spectrum of a series, without the constant component.
+
+    Returns the amplitudes and their periods in seconds, ordered from the
+    longest to the shortest period, or (None, None) if the series has no regular
+    sampling. Hourly and finer series of at least `welch_min_segments` segments
+    of `welch_segment_s` seconds are averaged over segments (Welch).
+    """
+    grid, step, values = regular_grid(times, amplitude)
+    if step is None:
+        return None, None
+    segment = welch_segment_s // step if welch_segment_s and step <= 3600 else 0
+    if segment >= 48 and len(values) >= welch_min_segments * segment:
+        n = segment
+        aft = welch_amplitudes(values, segment)
+    else:
+        n = len(values)
+        n = n - (n % 24)
+        aft = np.abs(np.fft.rfft(values[:n])) / n
+    if n < 4:
+        return None, None
+    k = np.arange(1, n // 2)
+    periods_s = np.round(n * step / k)
+    return aft[k], periods_s
 
 
 def create_fft_bins(aft, time_periods_s, n_bins=256, agg_fcn=np.max):
+    """Aggregates a spectrum into `n_bins` log spaced period bins.
+
+    Returns the aggregated amplitudes of the non empty bins and the bin edges.
+    `agg_fcn` is a numpy ufunc reduction (np.max, np.min, np.sum) or np.mean.
+    """
     if aft is None or time_periods_s is None:
         return [None], [0]
-    minf = min(time_periods_s)
-    maxf = max(time_periods_s)
-    lgs = np.logspace(np.log10(maxf), np.log10(minf), n_bins, endpoint=True)
+    aft = np.asarray(aft, dtype=float)
+    time_periods_s = np.asarray(time_periods_s, dtype=float)
+    lgs = np.logspace(
+        np.log10(time_periods_s.max()),
+        np.log10(time_periods_s.min()),
+        n_bins,
+        endpoint=True,
+    )
     dig = np.digitize(time_periods_s, lgs)
-    aggregated_values = []
-    bucket_ends = []
-    for i in range(len(lgs)):
-        indicies = list(np.where(dig == i)[0])
-        if len(indicies) > 0:
-            bucket_val = agg_fcn([aft[i] for i in indicies])
-            aggregated_values.append(bucket_val)
-            bucket_ends.append(lgs[i])
-    return aggregated_values, bucket_ends
+    inside = dig < len(lgs)
+    aft, dig = aft[inside], dig[inside]
+    # the periods decrease, so the bin indices are sorted
+    bins, starts = np.unique(dig, return_index=True)
+    if agg_fcn is np.mean:
+        aggregated_values = np.add.reduceat(aft, starts) / np.diff(
+            np.append(starts, len(aft))
+        )
+    else:
+        ufunc = {np.max: np.maximum, np.min: np.minimum, np.sum: np.add}[agg_fcn]
+        aggregated_values = ufunc.reduceat(aft, starts)
+    return aggregated_values, lgs[bins]
+
+
+def lomb_scargle(amplitude, times, oversampling=4, max_frequencies=2**18):
+    """Lomb-Scargle amplitude spectrum of the finite samples of a series.
+
+    Gaps are left out instead of interpolated. The sample times lie on a lattice
+    of the greatest common step of all times, missing samples included (the
+    time bucket), on which the sums of the periodogram are FFTs of the zero
+    filled samples. The lattice is coarsened for series with more than
+    `max_frequencies` steps, the times are rounded to it then.
+
+    Returns the amplitudes and periods in seconds like `compute_fft`, a sine of
+    amplitude a peaks at a / 2, or (None, None) for less than 3 samples.
+    """
+    seconds = parse_times(times).astype(np.int64)
+    values = np.asarray(amplitude, dtype=float)
+    # the gaps of the valid samples can be multiples of the bucket
+    steps = np.diff(np.unique(seconds))
+    valid = np.isfinite(values)
+    seconds, values = seconds[valid], values[valid]
+    if len(steps) == 0 or len(np.unique(seconds)) < 3:
+        return None, None
+    step = int(np.gcd.reduce(steps))
+    span = int(seconds.max() - seconds.min())
+    step *= max(1, -(-span // (step * max_frequencies)))
+    lattice = np.round((seconds - seconds.min()) / step).astype(np.int64)
+    m = int(lattice.max()) + 1
+    n_fft = 1 << int(np.ceil(np.log2(m * oversampling)))
+    n_fft = max(min(n_fft, 2 * max_frequencies), m)
+    y = values - values.mean()
+    # sums over the samples of y * exp(-iwt) and exp(-2iwt) at w_k = 2 pi k / n_fft
+    ft_y = np.fft.rfft(np.bincount(lattice, weights=y, minlength=m), n=n_fft)
+    ft_w = np.fft.fft(np.bincount(lattice, minlength=m).astype(float), n=n_fft)
+    k = np.arange(max(1, -(-n_fft // m)), n_fft // 2)
+    yc, ys = ft_y.real[k], -ft_y.imag[k]
+    c2, s2 = ft_w.real[(2 * k) % n_fft], -ft_w.imag[(2 * k) % n_fft]
+    wtau = np.arctan2(s2, c2) / 2
+    cos_wtau, sin_wtau = np.cos(wtau), np.sin(wtau)
+    hypot = np.hypot(c2, s2)
+    n = len(y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = (cos_wtau * yc + sin_wtau * ys) / ((n + hypot) / 2)
+        b = (cos_wtau * ys - sin_wtau * yc) / ((n - hypot) / 2)
+        aft = np.hypot(a, b) / 2
+    periods_s = np.round(n_fft * step / k)
+    finite = np.isfinite(aft)
+    return aft[finite], periods_s[finite]
+
+
+spectrum_cache = MemoryCache(maxsize=FFT_CACHE_SIZE)
+
+
+def binned_spectrum(seconds, values, n_bins=256, method="fft"):
+    """Binned amplitude spectrum of a series of epoch seconds and values, see
+    `create_fft_bins`. The method is "fft" (`compute_fft`) or "lombscargle"
+    (`lomb_scargle`).
+    """
+    times = seconds.astype("datetime64[s]")
+    if method == "lombscargle":
+        aft, periods_s = lomb_scargle(
+            values,
+            times,
+            oversampling=LOMBSCARGLE_OVERSAMPLING,
+            max_frequencies=LOMBSCARGLE_MAX_FREQUENCIES,
+        )
+    else:
+        aft, periods_s = compute_fft(
+            values,
+            times,
+            welch_segment_s=FFT_WELCH_SEGMENT_S,
+            welch_min_segments=FFT_WELCH_MIN_SEGMENTS,
+        )
+    return create_fft_bins(aft, periods_s, n_bins=n_bins)
+
+
+def fft_spectrum(times, values, n_bins=256, method="fft"):
+    """`binned_spectrum` of a series, memoized per series content.
+
+    Returns the amplitudes and periods (seconds) of the bins.
+    """
+    seconds = parse_times(times).astype(np.int64)
+    values = np.asarray(values, dtype=float)
+    key = hashlib.sha1(seconds.tobytes() + values.tobytes()).hexdigest()
+    key = key, n_bins, method
+    found, spectrum = spectrum_cache.get(key)
+    if not found:
+        spectrum = run(binned_spectrum, seconds, values, n_bins, method)
+        spectrum_cache.set(key, spectrum)
+    return spectrum
+
+
+def detection_values(values):
+    """Detection counts as an array, None counts as 0, integer counts stay int."""
+    a = np.asarray(values)
+    if a.dtype == object:
+        a = np.array([v if v is not None else 0 for v in values])
+    return a if len(a) > 0 else a.astype(int)
+
+
+def merge_detections(sources, time_key="bucket", value_key="detections"):
+    """Merges any number of detection series, values of the same key are summed.
+
+    Sources are dicts with a time_key and value_key list, entries that are None
+    or miss a key are skipped, None values count as 0. Time keys are compared
+    as instants, whatever their utc offset, minutes of day as numbers. Returns
+    the sorted union of the keys, times formatted in the utc offset they share,
+    else in utc.
+    """
+    valid = [s for s in sources if s is not None and time_key in s and value_key in s]
+    if len(valid) == 0:
+        return sources[-1] if len(sources) > 0 else None
+    raw = [s[time_key] for s in valid]
+    is_time = any(np.asarray(k).dtype.kind not in "iuf" for k in raw)
+    if is_time:
+        keys = [parse_times(k).astype(np.int64) for k in raw]
+    else:
+        keys = [np.asarray(k) for k in raw]
+    values = detection_values(list(chain(*(s[value_key] for s in valid))))
+    keys = np.concatenate(keys)
+    union = np.unique(keys)
+    merged = np.zeros(len(union), np.int64 if values.dtype.kind in "iub" else float)
+    np.add.at(merged, np.searchsorted(union, keys), values)
+    if is_time:
+        suffix = time_suffix(list(chain(*raw))) or "+00:00"
+        union = time_strings(union.astype("datetime64[s]"), suffix)
+    return {time_key: union.tolist(), value_key: merged.tolist()}
 
 
 def merge_detections_dicts(dict1, dict2, time_key="bucket", value_key="detections"):
-    if dict1 is None or time_key not in dict1 or value_key not in dict1:
-        return dict2
-    if dict2 is None or time_key not in dict2 or value_key not in dict2:
-        return dict1
-
-    merged_dict = {}
-    times_1 = dict1[time_key]
-    values_1 = dict1[value_key]
-    times_2 = dict2[time_key]
-    values_2 = dict2[value_key]
-    values_1 = [v if v is not None else 0 for v in values_1]
-    values_2 = [v if v is not None else 0 for v in values_2]
-
-    for i in range(len(times_1)):
-        merged_dict[times_1[i]] = values_1[i]
-    for i in range(len(times_2)):
-        if times_2[i] in merged_dict:
-            merged_dict[times_2[i]] += values_2[i]
-        else:
-            merged_dict[times_2[i]] = values_2[i]
-
-    merged_dict_sorted = dict(sorted(merged_dict.items()))
-    bucket_list = []
-    detections_list = []
-    for key, value in merged_dict_sorted.items():
-        bucket_list.append(key)
-        detections_list.append(value)
-    return {time_key: bucket_list, value_key: detections_list}
+    """Two source `merge_detections`."""
+    return merge_detections([dict1, dict2], time_key=time_key, value_key=value_key)
@@ -0,0 +1,141 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from dashboard.models import UrlSearchArgs, to_typed_dataset
+from dashboard.utils.communication import parse_nested_qargs, qargs_to_dict
+from dashboard.data_handler import (
+    load_ts_data,
+    load_tod_data,
+    load_map_data,
+    load_statsagg_data,
+    statsagg_derivable,
+    derive_statsagg_data,
+    dataset_cost,
+    run_batch,
+    EMPTY_LOCATIONS,
+)
+from configuration import (
+    VIEW_BUNDLE_TTL_S,
+    VIEW_BUNDLE_ERROR_TTL_S,
+    VIEW_BUNDLE_CACHE_SIZE,
+)
+
+
+class ViewBundle:
+    """Everything a compare or timeseries page renders, one entry per dataset.
+
+    errors lists (dataset title, error message) of the datasets that failed to
+    load, their entries hold empty defaults.
+    """
+
+    def __init__(self, datasets, ts, tod, stats, locations, errors):
+        self.datasets = datasets
+        self.ts = ts
+        self.tod = tod
+        self.stats = stats
+        self.locations = locations
+        self.errors = errors
+
+
+_bundles = OrderedDict()
+_bundles_lock = threading.Lock()
+
+
+def get_view_bundle(search: str, auth_cookie=None):
+    """Load the view bundle for a url search string.
+
+    The dash callbacks of a page all fire on the same search change, the first
+    one loads the bundle and the others wait for and share its result. Bundles
+    with errors expire after VIEW_BUNDLE_ERROR_TTL_S, a reload retries them.
+    """
+    key = (search, auth_cookie)
+    with _bundles_lock:
+        entry = _bundles.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _bundles.move_to_end(key)
+            future = entry[1]
+            owner = False
+        else:
+            future = Future()
+            _bundles[key] = (time.monotonic() + VIEW_BUNDLE_TTL_S, future)
+            while len(_bundles) > VIEW_BUNDLE_CACHE_SIZE:
+                _bundles.popitem(last=False)
+            owner = True
+    if owner:
+        try:
+            bundle = load_view_bundle(search, auth_cookie)
+            if bundle.errors:
+                with _bundles_lock:
+                    if _bundles.get(key, (None, None))[1] is future:
+                        _bundles[key] = (
+                            time.monotonic() + VIEW_BUNDLE_ERROR_TTL_S,
+                            future,
+                        )
+            future.set_result(bundle)
+        except Exception as e:
+            with _bundles_lock:
+                if _bundles.get(key, (None, None))[1] is future:
+                    del _bundles[key]
+            future.set_exception(e)
+    return future.result()
+
+
+def load_view_bundle(search: str, auth_cookie=None):
+    args = UrlSearchArgs(**parse_nested_qargs(qargs_to_dict(search)))
+    if args.datasets is not None:
+        datasets = args.datasets
+        configurations = [c.to_dict() for c in args.cfg]
+    else:
+        datasets = [args.dataset]
+        configurations = [args.view_config]
+    vc = args.view_config
+
+    # pax and pollinator stats are sums of the time series, no need to refetch it
+    derivable = [
+        statsagg_derivable(ds, cfg) for ds, cfg in zip(datasets, configurations)
+    ]
+    tasks = []
+    costs = []
+    for ds, cfg, derive_stats in zip(datasets, configurations, derivable):
+        kwargs = dict(dataset=ds, cfg=cfg, vc=vc, auth_cookie=auth_cookie)
+        fcns = [load_ts_data, load_tod_data, load_map_data]
+        if not derive_stats:
+            fcns.append(load_statsagg_data)
+        tasks += [(fcn, kwargs) for fcn in fcns]
+        costs += [dataset_cost(ds)] * len(fcns)
+    results, errors = run_batch(tasks, costs=costs)
+    results = iter(results)
+
+    ts, tod, stats, locations = [], [], [], []
+    for derive_stats in derivable:
+        ts_data, tod_data, location_data = next(results), next(results), next(results)
+        ts.append(list(ts_data) if ts_data is not None else [[], []])
+        tod.append(list(tod_data) if tod_data is not None else [[], []])
+        locations.append(location_data if location_data else EMPTY_LOCATIONS)
+        if derive_stats:
+            stats.append(derive_statsagg_data(ts[-1]))
+        else:
+            stats_data = next(results)
+            stats.append(stats_data if stats_data is not None else {})
+
+    return ViewBundle(
+        datasets=datasets,
+        ts=ts,
+        tod=tod,
+        stats=stats,
+        locations=locations,
+        errors=load_errors(tasks, errors),
+    )
+
+
+def load_errors(tasks, errors):
+    # one (title, message) per failed dataset, the first failed loader's message
+    failed = {}
+    for i, e in errors:
+        dataset = tasks[i][1]["dataset"]
+        typed = to_typed_dataset(dataset)
+        title = typed.get_title() if typed is not None else dataset.get("type")
+        failed.setdefault(title, e)
+    return list(failed.items())
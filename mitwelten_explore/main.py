@@ -8,6 +8,8 @@ from starlette.responses import FileResponse
 import time
 from dashboard.app import app as dash_app
 from configuration import (
+    H3_GEOJSON_DIR,
+    H3_GEOJSON_MAX_AGE_S,
     DOMAIN_NAME,
     KC_CLIENT_ID,
     KC_REALM_NAME,
@@ -151,8 +153,25 @@ async def auth_middleware(request: Request, call_next):
     return response
 
 
+class CachedStaticFiles(StaticFiles):
+    # the geometry of a cell never changes
+    cache_control = f"public, max-age={H3_GEOJSON_MAX_AGE_S}, immutable"
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
+
+
 app.mount("/app", WSGIMiddleware(dash_app.server))
 
+# written by the dash app while it is running, see dashboard/utils/geo_utils.py
+app.mount(
+    "/public/h3",
+    CachedStaticFiles(directory=H3_GEOJSON_DIR, check_dir=False),
+    name="h3",
+)
+
 app.mount("/public", StaticFiles(directory="public", html=True), name="public")
 
 @app.get("/favicon.ico", include_in_schema=False)
@@ -0,0 +1,61 @@
+"""Build time of the figure builders at 10k and 100k points.
+
+Run from mitwelten_explore with `python -m tests.bench_figures`, add --legacy
+to time the graph object builders of tests/legacy_charts as well (slow).
+Times are build plus json encoding as dash does it, best of 3, in ms. The
+location index and cell boundary caches are cleared before every run.
+"""
+import argparse
+import copy
+import importlib
+import time
+
+import tests.conftest  # noqa: F401, configuration settings
+from plotly.io.json import to_json_plotly
+
+from dashboard.utils.geo_utils import cell_boundary_cache, location_index_cache
+from tests.figure_cases import figure_cases
+
+SIZES = [10_000, 100_000]
+
+
+def best_of(fcn, kwargs, repeat=3):
+    times = []
+    for _ in range(repeat):
+        args = copy.deepcopy(kwargs)
+        location_index_cache.clear()
+        cell_boundary_cache.clear()
+        start = time.perf_counter()
+        to_json_plotly(fcn(**args))
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+    packages = ["dashboard.charts"]
+    if args.legacy:
+        packages.insert(0, "tests.legacy_charts")
+
+    results = {}
+    for n in SIZES:
+        for name, fcn, module, kwargs in figure_cases(n):
+            for package in packages:
+                builder = getattr(importlib.import_module(f"{package}.{module}"), fcn)
+                results[name, n, package] = best_of(builder, kwargs)
+
+    names = list(dict.fromkeys(name for name, _, _ in results))
+    header = f"{'':32}" + "".join(f"{n:>20,}" for n in SIZES)
+    print(header.replace(",", "'"))
+    for name in names:
+        cells = []
+        for n in SIZES:
+            timings = [results[name, n, package] for package in packages]
+            cells.append(" -> ".join(f"{t:.0f}" for t in timings))
+        print(f"{name:32}" + "".join(f"{c:>20}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
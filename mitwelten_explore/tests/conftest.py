@@ -0,0 +1,5 @@
+import os
+
+# configuration.py requires the keycloak and domain settings
+for key in ["KC_SERVER_URL", "KC_CLIENT_ID", "KC_REALM_NAME", "DOMAIN_NAME"]:
+    os.environ.setdefault(key, "test")
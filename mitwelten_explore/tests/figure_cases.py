@@ -0,0 +1,134 @@
+"""Inputs of the figure builders for the parity tests and the benchmark.
+
+Each case is a (name, builder name, module name, kwargs) tuple, the builder
+is looked up in `dashboard.charts` and in `tests.legacy_charts`, the graph
+object builders before they returned dicts.
+"""
+import datetime
+
+import numpy as np
+
+from dashboard.charts.map_charts import LocationData
+from dashboard.utils.ts import encode_ts
+
+START = np.datetime64("2023-01-01T00:00:00", "s")
+DATE_FROM = datetime.datetime(2023, 1, 1)
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    times = START + np.arange(n) * 3600
+    values = rng.poisson(5, n).astype(float)
+    return times, values
+
+
+def locations(n, seed=0, name=None):
+    # points around Basel, some of them share a location
+    rng = np.random.default_rng(seed)
+    lat = np.round(47.55 + rng.normal(0, 0.05, n), 4)
+    lon = np.round(7.6 + rng.normal(0, 0.08, n), 4)
+    values = rng.integers(1, 100, n)
+    return LocationData(
+        lat=lat.tolist(),
+        lon=lon.tolist(),
+        values=values.tolist(),
+        ids=[f"id{i}" for i in range(n)],
+        name=name,
+    )
+
+
+def ts_cases(n):
+    times, values = series(n)
+    strings = np.datetime_as_string(times, unit="s").tolist()
+    date_to = DATE_FROM + datetime.timedelta(hours=n)
+    store = [encode_ts(*series(n, seed)) for seed in range(3)]
+    for chart_type in ["line", "scatter", "area", "bar"]:
+        yield f"ts {chart_type}", "generate_ts_figure", "time_series_charts", dict(
+            times=strings,
+            values=values.tolist(),
+            date_from=DATE_FROM,
+            date_to=date_to,
+            chart_type=chart_type,
+        )
+        for layout_type in ["single", "subplots"]:
+            yield (
+                f"multi ts {chart_type} {layout_type}",
+                "generate_multi_ts_figure",
+                "time_series_charts",
+                dict(
+                    data=store,
+                    date_from=DATE_FROM,
+                    date_to=date_to,
+                    light_mode=False,
+                    chart_type=chart_type,
+                    layout_type=layout_type,
+                ),
+            )
+
+
+def tod_cases(n):
+    # time of day buckets of n / 1440 minutes
+    minutes = np.sort(np.random.default_rng(1).integers(0, 1440, n)).tolist()
+    values = series(n)[1].tolist()
+    for chart_type in ["line", "scatter", "area", "bar"]:
+        yield f"tod {chart_type}", "generate_time_of_day_scatter", "time_series_charts", dict(
+            minutes_of_day=minutes, values=values, chart_type=chart_type
+        )
+        yield (
+            f"multi tod {chart_type}",
+            "generate_multi_time_of_day_scatter",
+            "time_series_charts",
+            dict(
+                data=[[minutes, values], [minutes, values[::-1]]], chart_type=chart_type
+            ),
+        )
+
+
+def map_cases(n):
+    ds0 = locations(n, 0, "birds")
+    ds1 = locations(n // 2, 1, "pollinators")
+    yield "hexbin", "generate_h3hexbin_map", "map_charts", dict(
+        lat=ds0.lat, lon=ds0.lon, values=ds0.values, ids=ds0.ids
+    )
+    yield "hexbin zoom 13", "generate_h3hexbin_map", "map_charts", dict(
+        lat=ds0.lat,
+        lon=ds0.lon,
+        values=ds0.values,
+        ids=ds0.ids,
+        zoom=13,
+        clat=47.55,
+        clon=7.6,
+    )
+    yield "multi hexbin", "generate_multi_h3hexbin_map", "map_charts", dict(
+        ds0=ds0, ds1=ds1
+    )
+    yield "multi hexbin points zoom 12", "generate_multi_h3hexbin_map", "map_charts", dict(
+        ds0=ds0, ds1=ds1, zoom=12, clat=47.55, clon=7.6, scatter=True
+    )
+    yield "bubble", "generate_multi_bubble_map", "map_charts", dict(ds0=ds0, ds1=ds1)
+    yield "bubble zoom 12", "generate_multi_bubble_map", "map_charts", dict(
+        ds0=ds0, ds1=ds1, zoom=12, clat=47.55, clon=7.6
+    )
+
+
+def analytic_cases(n):
+    k = 4
+    rng = np.random.default_rng(2)
+    r = np.triu(rng.uniform(-1, 1, (k, k)), k=1)
+    labels = [f"Dataset {i}: name" for i in range(k)]
+    yield "correlation", "correlation_matrix_heatmap", "analytic_charts", dict(
+        matrix=r,
+        labels=labels,
+        pvalues=rng.uniform(0, 1, (k, k)),
+        overlap=rng.integers(3, n, (k, k)),
+    )
+    periods = np.linspace(7200, 3600 * 24 * 365, n)
+    ffts = [[periods, rng.uniform(0, 1, n)] for _ in range(3)]
+    yield "fft multi", "fft_multi", "analytic_charts", dict(
+        data=ffts, dataset_names=labels[:3]
+    )
+
+
+def figure_cases(n):
+    for cases in [ts_cases, tod_cases, map_cases, analytic_cases]:
+        yield from cases(n)
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from dashboard.utils import cache
+from dashboard.utils.cache import MemoryCache, SingleFlight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_memory_cache_expires_after_ttl(clock):
+    memory = MemoryCache(ttl=10)
+    memory.set("a", 1)
+    assert memory.get("a") == (True, 1)
+    clock.now += 9.9
+    assert memory.get("a") == (True, 1)
+    clock.now += 0.2
+    assert memory.get("a") == (False, None)
+    assert memory.stats() == {"hits": 2, "misses": 1, "size": 0}
+
+
+def test_memory_cache_ttl_per_entry_and_forever(clock):
+    memory = MemoryCache(ttl=10)
+    memory.set("short", 1, ttl=1)
+    memory2 = MemoryCache()
+    memory2.set("forever", 2)
+    clock.now += 5
+    assert memory.get("short") == (False, None)
+    assert memory2.get("forever") == (True, 2)
+    assert memory2.expires_in("forever") == float("inf")
+    assert memory.expires_in("missing") is None
+
+
+def test_memory_cache_serves_stale_entries_for_stale_ttl(clock):
+    memory = MemoryCache(ttl=10, stale_ttl=5)
+    memory.set("a", 1)
+    clock.now += 12
+    assert memory.get_or_stale("a") == (True, 1, True)
+    # plain get does not return stale entries but keeps them
+    assert memory.get("a") == (False, None)
+    assert memory.get_or_stale("a") == (True, 1, True)
+    clock.now += 4
+    assert memory.get_or_stale("a") == (False, None, False)
+    assert memory.stats()["size"] == 0
+
+
+def test_memory_cache_evicts_least_recently_used(clock):
+    memory = MemoryCache(maxsize=2)
+    memory.set("a", 1)
+    memory.set("b", 2)
+    memory.get("a")
+    memory.set("c", 3)
+    assert memory.get("b") == (False, None)
+    assert memory.get("a") == (True, 1)
+    assert memory.get("c") == (True, 3)
+    # setting an existing key refreshes it
+    memory.set("a", 4)
+    memory.set("d", 5)
+    assert memory.get("c") == (False, None)
+    assert memory.get("a") == (True, 4)
+
+
+def run_concurrently(single_flight, key, fcn, n=8):
+    """Calls single_flight.do(key, fcn) from n threads while the first call
+    runs, returns the results or exceptions in thread order."""
+    results = [None] * n
+
+    def call(i):
+        try:
+            results[i] = single_flight.do(key, fcn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+    release = threading.Event()
+
+    def fcn():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    single_flight = SingleFlight()
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(single_flight, "key", fcn)
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    # the key is done, the next call runs again
+    release.set()
+    assert single_flight.do("key", fcn) is not results[0]
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_exceptions():
+    def fcn():
+        time.sleep(0.2)
+        raise ValueError("api down")
+
+    results = run_concurrently(SingleFlight(), "key", fcn)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(set(map(id, results))) == 1
+
+
+def test_single_flight_keys_do_not_share():
+    single_flight = SingleFlight()
+    assert single_flight.do("a", lambda: 1) == 1
+    assert single_flight.do("b", lambda: 2) == 2
@@ -0,0 +1,247 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+from dashboard.cache_warmer import CacheWarmer
+from dashboard.utils import cache, communication
+from dashboard.utils.communication import (
+    BUCKET_ORIGIN,
+    CachedRequest,
+    canonical_args,
+    canonical_time_window,
+    snap_time,
+    trim_buckets,
+)
+from configuration import CACHE_OPEN_END_S
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+class FakeApi:
+    """Stands in for CachedRequest.request, answers with the number of calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url, params=None, **kwargs):
+        self.calls.append((url, params, kwargs))
+        return FakeResponse({"url": url, "call": len(self.calls)})
+
+
+@pytest.fixture(autouse=True)
+def instances(monkeypatch):
+    # keep the api clients and other tests out of the cache warmer
+    monkeypatch.setattr(CachedRequest, "instances", {})
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(CachedRequest, "request", lambda self, *a, **kw: api(*a, **kw))
+    return api
+
+
+def test_cached_request_answers_repeated_gets_from_memory(api):
+    cr = CachedRequest("test_memory", expire_after=60)
+    first = cr.get("http://api/a", params={"b": 2, "a": 1})
+    second = cr.get("http://api/a", params={"a": 1, "b": 2})
+    assert first.json() == second.json() == {"url": "http://api/a", "call": 1}
+    assert len(api.calls) == 1
+    assert cr.memory.stats()["hits"] == 1
+
+
+def test_cached_request_does_not_cache_authorized_requests(api):
+    cr = CachedRequest("test_auth", expire_after=60)
+    headers = {"Authorization": "Bearer token"}
+    cr.get("http://api/a", headers=headers)
+    cr.get("http://api/a", headers=headers)
+    assert len(api.calls) == 2
+    assert cr.memory.stats()["size"] == 0
+
+
+def test_cached_request_does_not_cache_errors(monkeypatch):
+    cr = CachedRequest("test_errors", expire_after=60)
+    monkeypatch.setattr(
+        CachedRequest, "request", lambda self, *a, **kw: FakeResponse(None, 500)
+    )
+    assert cr.get("http://api/a").status_code == 500
+    assert cr.memory.stats()["size"] == 0
+
+
+def test_cached_request_coalesces_concurrent_gets(monkeypatch):
+    calls = []
+
+    def slow_api(self, url, params=None, **kwargs):
+        calls.append(url)
+        time.sleep(0.2)
+        return FakeResponse({"url": url})
+
+    monkeypatch.setattr(CachedRequest, "request", slow_api)
+    cr = CachedRequest("test_coalesce", expire_after=60)
+    responses = []
+    threads = [
+        threading.Thread(target=lambda: responses.append(cr.get("http://api/a")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ["http://api/a"]
+    assert [r.json() for r in responses] == [{"url": "http://api/a"}] * 8
+
+
+class ImmediatePool:
+    def submit(self, fcn):
+        fcn()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(communication, "revalidation_pool", ImmediatePool())
+    return clock
+
+
+def test_cached_request_serves_stale_and_revalidates(api, clock):
+    cr = CachedRequest("test_swr", expire_after=10, stale_while_revalidate=60)
+    assert cr.get("http://api/a").json()["call"] == 1
+    clock[0] += 15
+    # the stale payload is answered, the refresh replaces it
+    assert cr.get("http://api/a").json()["call"] == 1
+    assert len(api.calls) == 2
+    assert cr.get("http://api/a").json()["call"] == 2
+    assert len(api.calls) == 2
+
+
+def test_cached_request_refetches_after_the_stale_window(api, clock):
+    cr = CachedRequest("test_swr_expired", expire_after=10, stale_while_revalidate=5)
+    cr.get("http://api/a")
+    clock[0] += 20
+    assert cr.get("http://api/a").json()["call"] == 2
+    assert len(api.calls) == 2
+
+
+def test_cache_warmer_refreshes_expiring_top_requests(api, clock):
+    cr = CachedRequest("test_warmer", expire_after=100)
+    for _ in range(3):
+        cr.get("http://api/top")
+    cr.get("http://api/other")
+    assert len(api.calls) == 2
+    CacheWarmer(interval_s=10, top_n=1).warm()
+    # the top url expires in 100s, after the next run
+    assert len(api.calls) == 2
+    clock[0] += 90
+    CacheWarmer(interval_s=10, top_n=1).warm()
+    assert api.calls[2:] == [("http://api/top", None, {"force_refresh": True})]
+
+
+def test_snap_time_on_and_off_the_lattice():
+    hour = datetime.timedelta(hours=1)
+    on = datetime.datetime(2023, 5, 1, 10)
+    assert snap_time(on, hour) == on
+    assert snap_time(on, hour, up=True) == on
+    off = datetime.datetime(2023, 5, 1, 10, 20)
+    assert snap_time(off, hour) == datetime.datetime(2023, 5, 1, 10)
+    assert snap_time(off, hour, up=True) == datetime.datetime(2023, 5, 1, 11)
+    # weeks start on the monday of the bucket origin
+    week = datetime.timedelta(weeks=1)
+    assert snap_time(off, week) == datetime.datetime(2023, 5, 1)
+    assert snap_time(off, week, up=True) == datetime.datetime(2023, 5, 8)
+
+
+def test_canonical_time_window_aligns_to_buckets():
+    time_from, time_to = canonical_time_window(
+        "2023-05-01T12:20:00+02:00", "2023-05-01T14:10:00+02:00", "1h"
+    )
+    assert time_from == datetime.datetime(2023, 5, 1, 10)
+    assert time_to == datetime.datetime(2023, 5, 1, 13)
+    on_lattice = canonical_time_window(
+        datetime.datetime(2023, 5, 1, 10), datetime.datetime(2023, 5, 1, 13), "1h"
+    )
+    assert on_lattice == (time_from, time_to)
+
+
+def test_canonical_time_window_without_buckets():
+    time_from, time_to = canonical_time_window(
+        datetime.datetime(2023, 5, 1, 10, 0, 30),
+        datetime.datetime(2023, 5, 1, 11, 0, 30),
+    )
+    assert time_from == datetime.datetime(2023, 5, 1, 10)
+    assert time_to == datetime.datetime(2023, 5, 1, 11, 1)
+    # ends close to now share one entry until the next open end step
+    _, open_end = canonical_time_window(None, datetime.datetime.utcnow())
+    assert open_end > datetime.datetime.utcnow()
+    assert (open_end - BUCKET_ORIGIN) % datetime.timedelta(
+        seconds=CACHE_OPEN_END_S
+    ) == datetime.timedelta(0)
+
+
+def test_canonical_args_share_almost_equal_requests():
+    args = {
+        "to": datetime.datetime(2023, 5, 1, 14, 10),
+        "from": datetime.datetime(2023, 5, 1, 10, 20),
+        "bucket_width": "1h",
+        "ids": [3, 1, 3],
+        "confidence": None,
+        "empty": [],
+    }
+    canonical = canonical_args(args)
+    assert canonical == [
+        ("bucket_width", "1h"),
+        ("from", "2023-05-01T10:00:00"),
+        ("ids", ["1", "3"]),
+        ("to", "2023-05-01T15:00:00"),
+    ]
+    shifted = dict(args, **{"from": datetime.datetime(2023, 5, 1, 10, 50)})
+    assert canonical_args(shifted) == canonical
+    unaligned = dict(canonical_args(args, align_buckets=False))
+    assert unaligned["from"] == "2023-05-01T10:20:00"
+    assert unaligned["to"] == "2023-05-01T14:10:00"
+
+
+def hourly_response():
+    times = [f"2023-05-01T{h:02d}:00:00+00:00" for h in range(8, 16)]
+    return {"bucket": times, "detections": list(range(8, 16)), "unit": ["n"]}
+
+
+def test_trim_buckets_at_lattice_bounds():
+    data = hourly_response()
+    trimmed = trim_buckets(
+        data,
+        "bucket",
+        datetime.datetime(2023, 5, 1, 10),
+        datetime.datetime(2023, 5, 1, 13),
+        "1h",
+    )
+    assert trimmed["detections"] == [10, 11, 12]
+    assert trimmed["bucket"][0] == "2023-05-01T10:00:00+00:00"
+    assert trimmed["unit"] == ["n"]
+    assert data == hourly_response()
+
+
+def test_trim_buckets_keeps_partial_edge_buckets_whole():
+    trimmed = trim_buckets(
+        hourly_response(),
+        "bucket",
+        "2023-05-01T12:20:00+02:00",
+        "2023-05-01T14:10:00+02:00",
+        "1h",
+    )
+    assert trimmed["detections"] == [10, 11, 12]
+
+
+def test_trim_buckets_without_window_or_width():
+    data = hourly_response()
+    assert trim_buckets(data, "bucket", None, None, "1h") is data
+    assert trim_buckets(data, "bucket", "2023-05-01T10:00:00", None, "weekly") is data
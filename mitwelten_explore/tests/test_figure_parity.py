@@ -0,0 +1,38 @@
+import copy
+import importlib
+import json
+
+import plotly.graph_objects as go
+import pytest
+
+from tests.figure_cases import figure_cases
+
+
+def builder(package, module, name):
+    return getattr(importlib.import_module(f"{package}.{module}"), name)
+
+
+def drop_default_fill(figure):
+    # the dict builders set fill="none" explicitly, so that patching the chart
+    # type can reset it, graph objects leave the default out
+    for trace in figure["data"]:
+        if trace.get("fill") == "none":
+            del trace["fill"]
+    return figure
+
+
+# 300 points draw long bar charts as lines, 1000 points cluster the map points
+CASES = [
+    pytest.param(n, name, fcn, module, kwargs, id=f"{name} {n}")
+    for n in [300, 1000]
+    for name, fcn, module, kwargs in figure_cases(n)
+]
+
+
+@pytest.mark.parametrize("n, name, fcn, module, kwargs", CASES)
+def test_figure_dicts_match_the_graph_object_builders(n, name, fcn, module, kwargs):
+    # the bubble maps sort their datasets in place
+    new = builder("dashboard.charts", module, fcn)(**copy.deepcopy(kwargs))
+    old = builder("tests.legacy_charts", module, fcn)(**copy.deepcopy(kwargs))
+    new_json = drop_default_fill(json.loads(go.Figure(new).to_json()))
+    assert new_json == json.loads(old.to_json())
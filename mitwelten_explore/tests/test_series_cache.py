@@ -0,0 +1,167 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from dashboard.data_handler import DatasetLoader
+from dashboard.models import ViewConfiguration
+from dashboard.series_cache import (
+    assemble_tiles,
+    fetch_tiled,
+    rollup_series,
+    split_tiles,
+    tile_cache,
+)
+from dashboard.utils.communication import BUCKET_ORIGIN, parse_bucket_width
+
+HOUR = datetime.timedelta(hours=1)
+
+
+def hourly_detections(t: datetime.datetime):
+    return int((t - BUCKET_ORIGIN) / HOUR) % 7
+
+
+class Dataset:
+    def to_dataset(self):
+        return {"type": "test", "id": 1}
+
+
+class FakeApi:
+    """ts fetcher with hourly detections summed into the requested buckets."""
+
+    def __init__(self):
+        self.windows = []
+
+    def __call__(self, ds, cfg, vc, auth_cookie=None):
+        self.windows.append((vc.bucket, vc.time_from, vc.time_to))
+        width = parse_bucket_width(vc.bucket)
+        sums = {}
+        t = vc.time_from
+        while t < vc.time_to:
+            start = BUCKET_ORIGIN + (t - BUCKET_ORIGIN) // width * width
+            sums[start] = sums.get(start, 0) + hourly_detections(t)
+            t += HOUR
+        return {
+            "bucket": [f"{t.isoformat()}+00:00" for t in sorted(sums)],
+            "detections": [sums[t] for t in sorted(sums)],
+        }
+
+
+@pytest.fixture
+def api():
+    tile_cache.clear()
+    return FakeApi()
+
+
+def loader(api, **kwargs):
+    return DatasetLoader(ts=api, rollup=lambda cfg: "sum", **kwargs)
+
+
+def window(bucket, time_from, time_to):
+    return ViewConfiguration(bucket=bucket, time_from=time_from, time_to=time_to)
+
+
+def test_fetch_tiled_serves_sub_windows_from_cached_tiles(api):
+    ts_loader = loader(api)
+    cfg = ViewConfiguration()
+    vc = window("1h", datetime.datetime(2023, 3, 5), datetime.datetime(2023, 4, 20))
+    res = fetch_tiled(ts_loader, Dataset(), cfg, vc)
+    # one request for the run of the march and april tiles
+    assert api.windows == [
+        ("1h", datetime.datetime(2023, 3, 1), datetime.datetime(2023, 5, 1))
+    ]
+    assert res == api(None, cfg, vc)
+    api.windows.clear()
+
+    inner = window("1h", datetime.datetime(2023, 3, 30), datetime.datetime(2023, 4, 2))
+    res = fetch_tiled(ts_loader, Dataset(), cfg, inner)
+    assert api.windows == []
+    assert res == api(None, cfg, inner)
+
+
+def test_fetch_tiled_fetches_only_missing_tiles(api):
+    ts_loader = loader(api)
+    cfg = ViewConfiguration()
+    march = window("1h", datetime.datetime(2023, 3, 1), datetime.datetime(2023, 4, 1))
+    fetch_tiled(ts_loader, Dataset(), cfg, march)
+    api.windows.clear()
+    wider = window("1h", datetime.datetime(2023, 2, 10), datetime.datetime(2023, 4, 3))
+    res = fetch_tiled(ts_loader, Dataset(), cfg, wider)
+    assert [w[1:] for w in api.windows] == [
+        (datetime.datetime(2023, 2, 1), datetime.datetime(2023, 3, 1)),
+        (datetime.datetime(2023, 4, 1), datetime.datetime(2023, 5, 1)),
+    ]
+    assert res == api(None, cfg, wider)
+
+
+def test_fetch_tiled_does_not_cache_private_loaders(api):
+    ts_loader = loader(api, private=True)
+    vc = window("1h", datetime.datetime(2023, 3, 5), datetime.datetime(2023, 3, 6))
+    for _ in range(2):
+        fetch_tiled(ts_loader, Dataset(), ViewConfiguration(), vc)
+    assert len(api.windows) == 2
+    assert tile_cache.stats()["size"] == 0
+
+
+def test_tiles_keep_and_dedup_buckets_across_tile_bounds(api):
+    # the week of 2023-01-30 overlaps the january and february tiles
+    vc = window("1w", datetime.datetime(2023, 1, 2), datetime.datetime(2023, 3, 6))
+    res = api(None, None, vc)
+    starts = [datetime.datetime(2023, 1, 1), datetime.datetime(2023, 2, 1)]
+    january, february = split_tiles(
+        res, "bucket", "detections", starts, False, parse_bucket_width("1w")
+    )
+    assert january["bucket"][-1] == february["bucket"][0]
+    assert january["bucket"][-1] == "2023-01-30T00:00:00+00:00"
+    assert assemble_tiles([january, february], "bucket", "detections") == res
+
+
+def test_rollup_series_aggregates_nested_buckets():
+    times = [f"2023-05-01T{h:02d}:00:00+00:00" for h in range(0, 12, 2)]
+    res = {"bucket": times, "detections": [1, 2, 3, None, 5, 6]}
+    six_hours = datetime.timedelta(hours=6)
+    summed = rollup_series(res, "bucket", "detections", six_hours, "sum")
+    assert summed == {
+        "bucket": ["2023-05-01T00:00:00+00:00", "2023-05-01T06:00:00+00:00"],
+        "detections": [6, 11],
+    }
+    floats = {"bucket": times, "detections": [1.5, 2, 3, None, 5, 6]}
+    assert rollup_series(floats, "bucket", "detections", six_hours, "min")[
+        "detections"
+    ] == [1.5, 5]
+    assert rollup_series(floats, "bucket", "detections", six_hours, "max")[
+        "detections"
+    ] == [3, 6]
+
+
+def test_rollup_series_keeps_naive_times_and_sorts():
+    times = ["2023-05-02T01:00:00", "2023-05-01T01:00:00", "2023-05-01T02:00:00"]
+    res = {"time": times, "value": [1, 2, 3]}
+    day = rollup_series(res, "time", "value", datetime.timedelta(days=1), "sum")
+    assert day == {
+        "time": ["2023-05-01T00:00:00", "2023-05-02T00:00:00"],
+        "value": [5, 1],
+    }
+
+
+def test_fetch_tiled_rolls_coarse_buckets_up_from_cached_fine_ones(api):
+    ts_loader = loader(api)
+    cfg = ViewConfiguration()
+    fine = window("1h", datetime.datetime(2023, 3, 1), datetime.datetime(2023, 4, 1))
+    fetch_tiled(ts_loader, Dataset(), cfg, fine)
+    api.windows.clear()
+    daily = window("1d", datetime.datetime(2023, 3, 3), datetime.datetime(2023, 3, 20))
+    res = fetch_tiled(ts_loader, Dataset(), cfg, daily)
+    assert api.windows == []
+    assert res == api(None, cfg, daily)
+
+
+def test_fetch_tiled_fetches_loaders_without_rollup(api):
+    ts_loader = DatasetLoader(ts=api)
+    cfg = ViewConfiguration()
+    fine = window("1h", datetime.datetime(2023, 3, 1), datetime.datetime(2023, 4, 1))
+    fetch_tiled(ts_loader, Dataset(), cfg, fine)
+    api.windows.clear()
+    daily = window("1d", datetime.datetime(2023, 3, 3), datetime.datetime(2023, 3, 20))
+    fetch_tiled(ts_loader, Dataset(), cfg, daily)
+    assert [w[0] for w in api.windows] == ["1d"]
@@ -0,0 +1,228 @@
+import numpy as np
+import pytest
+import scipy.signal
+import scipy.stats
+
+from dashboard.utils.ts import (
+    correlation_matrix,
+    correlation_stats,
+    decode_ts,
+    encode_ts,
+    lagged_pearson,
+    lomb_scargle,
+    merge_detections,
+    pairwise_pearson,
+    parse_times,
+    ts_time_strings,
+)
+
+
+def test_parse_times_shifts_offsets_to_utc():
+    times = ["2023-06-01T02:00:00+02:00", "2023-06-01T03:00:00+02:00"]
+    expected = np.array(["2023-06-01T00:00:00", "2023-06-01T01:00:00"], "M8[s]")
+    np.testing.assert_array_equal(parse_times(times), expected)
+
+
+def test_encoded_series_keeps_api_time_strings():
+    times = [f"2023-03-{d:02d}T00:00:00+01:00" for d in range(1, 31)]
+    del times[5]
+    values = np.arange(len(times), dtype=float)
+    entry = encode_ts(times, values)
+    assert list(ts_time_strings(entry)) == times
+    np.testing.assert_array_equal(decode_ts(entry)[0], parse_times(times))
+    np.testing.assert_array_equal(decode_ts(entry)[1], values)
+
+
+def test_mixed_offsets_are_formatted_in_utc():
+    times = ["2023-03-26T01:00:00+01:00", "2023-03-26T03:00:00+02:00"]
+    strings = ts_time_strings(encode_ts(times, [1, 2]))
+    assert list(strings) == ["2023-03-26T00:00:00", "2023-03-26T01:00:00"]
+
+
+def gappy_sine(amplitude, period_h, seed=0):
+    # 3 hourly samples and some hourly ones in between, in 1h buckets
+    rng = np.random.default_rng(seed)
+    hours = np.arange(24 * 90)
+    times = np.datetime64("2023-01-01T00:00:00", "s") + hours * 3600
+    values = amplitude * np.sin(2 * np.pi * hours / period_h)
+    values += rng.normal(0, 0.1 * amplitude, len(hours))
+    keep = (hours % 3 == 0) | ((hours % 3 == 1) & (rng.random(len(hours)) < 0.4))
+    values[~keep] = np.nan
+    return times, values
+
+
+def test_lomb_scargle_matches_scipy_on_gappy_series():
+    times, values = gappy_sine(3, period_h=7)
+    aft, periods_s = lomb_scargle(values, times)
+
+    valid = np.isfinite(values)
+    seconds = (times[valid] - times[0]).astype(float)
+    y = values[valid] - values[valid].mean()
+    power = scipy.signal.lombscargle(seconds, y, 2 * np.pi / periods_s)
+    # without the small sin/cos imbalance of the gaps, power = n * amplitude**2
+    reference = np.sqrt(power / len(y))
+
+    assert periods_s[np.argmax(aft)] == periods_s[np.argmax(reference)]
+    assert abs(periods_s[np.argmax(aft)] - 7 * 3600) < 60
+    assert np.max(aft) == pytest.approx(3 / 2, rel=0.02)
+    assert np.max(aft) == pytest.approx(np.max(reference), rel=0.02)
+    assert np.corrcoef(aft, reference)[0, 1] > 0.99
+
+
+def test_pairwise_pearson_matches_scipy_with_gaps():
+    rng = np.random.default_rng(2)
+    aligned = rng.normal(size=(4, 200))
+    aligned[1] += 0.5 * aligned[0]
+    aligned[2, 20:60] = np.nan
+    aligned[3, 150:] = np.nan
+    r, p, n = pairwise_pearson(aligned)
+    for i in range(4):
+        for j in range(4):
+            both = np.isfinite(aligned[i]) & np.isfinite(aligned[j])
+            expected = scipy.stats.pearsonr(aligned[i, both], aligned[j, both])
+            assert n[i, j] == both.sum()
+            assert r[i, j] == pytest.approx(expected[0], abs=1e-9)
+            assert p[i, j] == pytest.approx(expected[1], rel=1e-6, abs=1e-12)
+
+
+def test_pairwise_pearson_without_gaps_matches_scipy():
+    rng = np.random.default_rng(3)
+    aligned = rng.normal(size=(3, 50))
+    aligned[2] -= aligned[1]
+    r, p, n = pairwise_pearson(aligned)
+    expected = scipy.stats.pearsonr(aligned[1], aligned[2])
+    assert r[1, 2] == pytest.approx(expected[0])
+    assert p[1, 2] == pytest.approx(expected[1])
+    assert (n == 50).all()
+
+
+def test_correlation_matrix_reuses_the_stats():
+    times = np.datetime64("2023-01-01", "s") + np.arange(48) * 3600
+    rng = np.random.default_rng(4)
+    data = [encode_ts(times, rng.normal(size=48)) for _ in range(3)]
+    stats = correlation_stats(data)
+    matrix = correlation_matrix(data, stats=stats)
+    np.testing.assert_array_equal(matrix, np.triu(stats["r"], k=1))
+    np.testing.assert_array_equal(matrix, correlation_matrix(data))
+
+
+def shifted_pearson(x, y, lag):
+    """Pearson of x(t) and y(t + lag) over the t where both are finite."""
+    if lag >= 0:
+        a, b = x[: len(x) - lag], y[lag:]
+    else:
+        a, b = x[-lag:], y[: len(y) + lag]
+    both = np.isfinite(a) & np.isfinite(b)
+    if both.sum() < 3:
+        return np.nan, both.sum()
+    return scipy.stats.pearsonr(a[both], b[both])[0], both.sum()
+
+
+def test_lagged_pearson_matches_shifted_pearson():
+    rng = np.random.default_rng(3)
+    aligned = rng.normal(size=(3, 120)).cumsum(axis=1)
+    aligned[rng.random(aligned.shape) < 0.2] = np.nan
+    aligned[2, 30:] = np.nan
+    max_lag = 95
+    r, n, (rows_i, rows_j) = lagged_pearson(aligned, max_lag)
+    for p, (i, j) in enumerate(zip(rows_i, rows_j)):
+        for c, lag in enumerate(range(-max_lag, max_lag + 1)):
+            expected, count = shifted_pearson(aligned[i], aligned[j], lag)
+            assert n[p, c] == count
+            np.testing.assert_allclose(r[p, c], expected, atol=1e-9)
+
+
+def test_lagged_pearson_peaks_at_the_shift():
+    x = np.random.default_rng(4).normal(size=300)
+    aligned = np.stack([x[7:207], x[:200]])
+    r, _, _ = lagged_pearson(aligned, max_lag=20)
+    assert np.argmax(r[0]) - 20 == 7
+    assert r[0, 20 + 7] == pytest.approx(1)
+
+
+def test_merge_detections_sums_any_number_of_sources():
+    sources = [
+        {
+            "bucket": ["2023-01-01T00:00:00+00:00", "2023-01-03T00:00:00+00:00"],
+            "detections": [1, 2],
+        },
+        None,
+        {"bucket": ["2023-01-02T00:00:00+00:00"], "detections": [4]},
+        {
+            "bucket": ["2023-01-01T00:00:00+00:00", "2023-01-02T00:00:00+00:00"],
+            "detections": [8, 16],
+        },
+        {"error": "not found"},
+    ]
+    assert merge_detections(sources) == {
+        "bucket": [
+            "2023-01-01T00:00:00+00:00",
+            "2023-01-02T00:00:00+00:00",
+            "2023-01-03T00:00:00+00:00",
+        ],
+        "detections": [9, 20, 2],
+    }
+
+
+def test_merge_detections_sums_equal_instants_across_offsets():
+    sources = [
+        {
+            "bucket": ["2023-01-01T00:00:00Z", "2023-01-01T01:00:00Z"],
+            "detections": [1, 2],
+        },
+        {
+            "bucket": ["2023-01-01T01:00:00+01:00", "2023-01-01T00:30:00+00:00"],
+            "detections": [4, 8],
+        },
+        {"bucket": ["2023-01-01T03:00:00+02:00"], "detections": [16]},
+    ]
+    assert merge_detections(sources) == {
+        "bucket": [
+            "2023-01-01T00:00:00+00:00",
+            "2023-01-01T00:30:00+00:00",
+            "2023-01-01T01:00:00+00:00",
+        ],
+        "detections": [5, 8, 18],
+    }
+
+
+def test_merge_detections_keeps_a_shared_offset():
+    sources = [
+        {"bucket": ["2023-06-01T02:00:00+02:00"], "detections": [1]},
+        {"bucket": ["2023-06-01T01:00:00+02:00"], "detections": [2]},
+    ]
+    merged = merge_detections(sources)
+    assert merged["bucket"] == [
+        "2023-06-01T01:00:00+02:00",
+        "2023-06-01T02:00:00+02:00",
+    ]
+    assert merged["detections"] == [2, 1]
+
+
+def test_merge_detections_single_source_is_normalized():
+    source = {
+        "bucket": [
+            "2023-01-02T00:00:00Z",
+            "2023-01-01T00:00:00Z",
+            "2023-01-02T00:00:00Z",
+        ],
+        "detections": [1, None, 3],
+    }
+    assert merge_detections([source]) == {
+        "bucket": ["2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"],
+        "detections": [0, 4],
+    }
+
+
+def test_merge_detections_minutes_of_day():
+    sources = [
+        {"minuteOfDay": [30, 0], "detections": [1.5, None]},
+        {"minuteOfDay": [60, 30], "detections": [2, 3]},
+    ]
+    merged = merge_detections(sources, time_key="minuteOfDay")
+    assert merged == {"minuteOfDay": [0, 30, 60], "detections": [0.0, 4.5, 2.0]}
+
+
+def test_merge_detections_without_valid_source():
+    assert merge_detections([]) is None
+    assert merge_detections([None, {"error": 1}]) == {"error": 1}